@@ -1,23 +1,27 @@
 import os
+import re
+import sys
+import uuid
+from functools import lru_cache
 from typing import Dict, TypedDict, List
-from gen_ai_hub.proxy.langchain.init_models import init_llm
-from langchain.prompts import PromptTemplate
-from langgraph.graph import StateGraph, END
+from langchain_core.prompts import PromptTemplate
 from pydantic import BaseModel
 from datetime import datetime
 import logging
-from tenacity import retry, stop_after_attempt, wait_exponential
 from dotenv import load_dotenv
 
-# Set up logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
+# Shared helpers live at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sdlc_common.blobs import get_blob_store
+from sdlc_common.llm_cache import lazy_llm
+from sdlc_common.semantic_cache import canonical_fields, draft_threshold, get_semantic_cache
+from sdlc_common.tracing import trace, traced_node
+from brd_validator import validate_brd, parse_sections, merge_sections, mentions_name, without_sections
 
-# Load environment variables from .env file (recommended)
-load_dotenv()
+logger = logging.getLogger(__name__)
 
-# Initialize LLM 
-llm = init_llm("gpt-4o", max_tokens=4000)  
+# Initialize LLM lazily; environment variables are loaded from .env right before first use
+llm = lazy_llm("gpt-4o", setup=load_dotenv, max_tokens=4000)
 
 # Pydantic model for user input validation
 class BRDInput(BaseModel):
@@ -31,9 +35,11 @@ class BRDInput(BaseModel):
 # State definition for LangGraph
 class BRDState(TypedDict):
     user_input: BRDInput
-    draft_brd: str
-    validated_brd: str
+    draft_brd: str  # blob reference (sdlc_common.blobs) of the generated draft
+    validated_brd: str  # blob reference of the validated BRD ("" until validation succeeds)
     error: str
+    output_dir: str
+    output_path: str
 
 # Input collection function
 def collect_user_input() -> BRDInput:
@@ -112,60 +118,89 @@ brd_prompt_template = PromptTemplate(
 - Use bullet points for lists and proper headings (##) for sections."""
 )
 
-# Validation prompt template
-validation_prompt_template = PromptTemplate(
-    input_variables=["draft_brd", "user_input"],
-    template="""Validate the following Business Requirement Document (BRD) against the provided user inputs and the required structure. Ensure completeness (all 12 sections present), proper structure, and alignment with user inputs. Fill in any missing or incomplete sections with appropriate content. Return the validated BRD in Markdown format.
-
-**Required Structure**:
-1. Purpose
-2. Project Summary
-3. Project Success Criteria
-4. Project Objectives
-5. In-Scope
-6. Out of Scope
-7. Non-Functional Requirements
-8. Assumptions
-9. Dependencies
-10. Constraints
-11. Stakeholder Analysis
-12. Roles and Responsibilities
+# Section repair prompt template (only the sections that failed local validation are sent)
+repair_prompt_template = PromptTemplate(
+    input_variables=["user_input", "problems", "sections"],
+    template="""The following sections of a Business Requirement Document (BRD) failed validation against the user inputs. Rewrite ONLY these sections so they are complete and aligned with the inputs.
 
 **User Inputs**:
 {user_input}
 
-**Draft BRD**:
-{draft_brd}
+**Sections to fix and their problems**:
+{problems}
+
+**Current content of these sections**:
+{sections}
 
 **Instructions**:
-- Validate that all 12 sections are present and follow the structure.
-- Check alignment with user inputs:
-  - Purpose must match Project Purpose.
-  - Project Summary must reflect Scope Area.
-  - In-Scope and Out of Scope must match provided items.
-  - Stakeholder Analysis and Roles and Responsibilities must include all listed stakeholders.
-- If any section is missing, empty, or misaligned, fill it with appropriate content based on user inputs and general best practices (e.g., infer Success Criteria from Scope Area, add standard Non-Functional Requirements).
-- Return the validated BRD in Markdown format with all 12 sections complete and aligned."""
+- Purpose must match Project Purpose.
+- Project Summary must reflect Scope Area.
+- In-Scope and Out of Scope must cover every provided item.
+- Stakeholder Analysis and Roles and Responsibilities must include all listed stakeholders.
+- For missing or empty sections, infer appropriate content from the inputs and general best practices.
+- Return each fixed section as a Markdown heading (## <Section Name>) followed by its content. Do not return any other sections."""
 )
 
+# Nodes return only the keys they change, so a checkpointer does not re-serialize the rest of the state
+
 # Input node
-def input_node(state: BRDState) -> BRDState:
+def input_node(state: BRDState) -> dict:
+    if state.get("user_input") is not None:
+        # Input supplied up front (batch mode), nothing to collect
+        return {}
     try:
-        state["user_input"] = collect_user_input()
-        state["error"] = ""
+        user_input = collect_user_input()
         logger.info("User input collected successfully")
+        return {"user_input": user_input, "error": ""}
     except Exception as e:
-        state["error"] = f"Input collection failed: {str(e)}"
-        logger.error(state["error"])
-    return state
+        error = f"Input collection failed: {str(e)}"
+        logger.error(error)
+        return {"error": error}
+
+def semantic_key(user_input: BRDInput) -> str:
+    """Canonical request for the semantic cache; the project name is left out (see retarget_draft)."""
+    return canonical_fields(user_input.model_dump(), exclude=("project_name",))
 
-# BRD generation node
-def brd_generation_node(state: BRDState) -> BRDState:
+def same_project(first: str, second: str) -> bool:
+    return " ".join(first.lower().split()) == " ".join(second.lower().split())
+
+def retarget_draft(draft: str, previous_name: str, project_name: str) -> str:
+    """Another project's BRD as a draft for this one.
+
+    Sections that name the other project are dropped, so validation reports them
+    missing and has them rewritten from this project's input; a title naming it is
+    rebuilt. The text itself is never edited.
+    """
+    preamble, sections = parse_sections(draft)
+    stale = [name for name, (_, body) in sections.items() if mentions_name(body, previous_name)]
+    if mentions_name(preamble, previous_name):
+        preamble = f"# Business Requirement Document: {project_name}"
+    return without_sections(draft, stale, preamble)
+
+# BRD generation node: the draft goes to the blob store, state keeps its reference
+def brd_generation_node(state: BRDState) -> dict:
     if state.get("error"):
-        return state
+        return {}
     
     try:
         user_input = state["user_input"]
+        cache = get_semantic_cache()
+        match = cache.lookup("brd", semantic_key(user_input), draft_threshold()) if cache else None
+        previous_name = match["meta"].get("project_name", "") if match else ""
+        if match and not same_project(previous_name, user_input.project_name) and not (match["reuse"] and previous_name):
+            # Success criteria, NFRs, assumptions and constraints are inferred from the whole request,
+            # so another project's BRD is only a starting point when the request is near-identical
+            match = None
+        if match:
+            # Close enough to an earlier request: validation checks the cached BRD against this input
+            # and repairs only the sections that differ
+            draft = match["artifact"]
+            if not same_project(previous_name, user_input.project_name):
+                draft = retarget_draft(draft, previous_name, user_input.project_name)
+            logger.info(
+                f"Reusing cached BRD as {'is' if match['reuse'] else 'a draft'} (similarity {match['similarity']:.2f})"
+            )
+            return {"draft_brd": get_blob_store().put(draft), "error": ""}
         prompt = brd_prompt_template.format(
             project_name=user_input.project_name,
             project_purpose=user_input.project_purpose,
@@ -175,96 +210,124 @@ def brd_generation_node(state: BRDState) -> BRDState:
             stakeholders=", ".join(user_input.stakeholders)
         )
         response = llm.invoke(prompt)
-        state["draft_brd"] = response.content.strip()
+        draft = response.content.strip()
         logger.info("Draft BRD generated successfully")
-        logger.debug(f"Draft BRD: {state['draft_brd'][:500]}...")  # Log first 500 chars
-        state["error"] = ""
+        logger.debug(f"Draft BRD: {draft[:500]}...")  # Log first 500 chars
+        return {"draft_brd": get_blob_store().put(draft), "error": ""}
     except Exception as e:
-        state["error"] = f"BRD generation failed: {str(e)}"
-        logger.error(state["error"])
-    return state
+        error = f"BRD generation failed: {str(e)}"
+        logger.error(error)
+        return {"error": error}
 
-# BRD validation node with retry
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-def brd_validation_node(state: BRDState) -> BRDState:
+# BRD validation node (LLM retries are handled by the shared scheduler)
+def brd_validation_node(state: BRDState) -> dict:
     if state.get("error"):
-        return state
+        return {}
     
     try:
+        user_input = state["user_input"]
         user_input_str = f"""
-        Project Name: {state['user_input'].project_name}
-        Project Purpose: {state['user_input'].project_purpose}
-        Scope Area: {state['user_input'].scope_area}
-        In-Scope Items: {', '.join(state['user_input'].in_scope_items)}
-        Out of Scope Items: {', '.join(state['user_input'].out_of_scope_items)}
-        Stakeholders: {', '.join(state['user_input'].stakeholders)}
+        Project Name: {user_input.project_name}
+        Project Purpose: {user_input.project_purpose}
+        Scope Area: {user_input.scope_area}
+        In-Scope Items: {', '.join(user_input.in_scope_items)}
+        Out of Scope Items: {', '.join(user_input.out_of_scope_items)}
+        Stakeholders: {', '.join(user_input.stakeholders)}
         """
-        prompt = validation_prompt_template.format(
-            draft_brd=state["draft_brd"],
-            user_input=user_input_str
-        )
-        response = llm.invoke(prompt)
-        validated_brd = response.content.strip()
-        logger.debug(f"Validation response: {validated_brd[:500]}...")  # Log first 500 chars
-
-        # Verify the validated BRD has all 12 sections
-        if len(validated_brd.split("##")) >= 12:
-            state["validated_brd"] = validated_brd
-            state["error"] = ""
-            logger.info("BRD validated successfully")
+        validated_brd = get_blob_store().get(state["draft_brd"])
+        incomplete, problems = validate_brd(validated_brd, user_input)
+
+        if problems:
+            # Ask the LLM to fix only the failing sections, then merge them back in
+            logger.info(f"Repairing {len(problems)} BRD section(s): {', '.join(problems)}")
+            _, sections = parse_sections(validated_brd)
+            prompt = repair_prompt_template.format(
+                user_input=user_input_str,
+                problems="\n".join(f"- {name}: {'; '.join(issues)}" for name, issues in problems.items()),
+                sections="\n\n".join(
+                    f"## {name}\n{sections[name][1] if name in sections else '(missing)'}" for name in problems
+                )
+            )
+            response = llm.invoke(prompt)
+            logger.debug(f"Repair response: {response.content[:500]}...")  # Log first 500 chars
+            validated_brd = merge_sections(validated_brd, response.content.strip())
+            incomplete, problems = validate_brd(validated_brd, user_input)
         else:
-            state["validated_brd"] = ""
-            state["error"] = "Validation failed: Incomplete BRD returned"
-            logger.error(state["error"])
+            logger.info("Draft BRD passed local validation; skipping LLM validation")
+
+        # Missing or empty sections are fatal; remaining coverage gaps are only reported
+        if incomplete:
+            error = f"Validation failed: Incomplete BRD returned (missing: {', '.join(incomplete)})"
+            logger.error(error)
+            return {"validated_brd": "", "error": error}
+        for name, issues in problems.items():
+            logger.warning(f"BRD section '{name}': {'; '.join(issues)}")
+        logger.info("BRD validated successfully")
+        cache = get_semantic_cache()
+        if cache:
+            cache.store("brd", semantic_key(user_input), validated_brd, {"project_name": user_input.project_name})
+        # Content-addressed: a draft that needed no repair is the same blob as draft_brd
+        return {"validated_brd": get_blob_store().put(validated_brd), "error": ""}
         
     except Exception as e:
-        state["error"] = f"BRD validation failed: {str(e)}"
-        state["validated_brd"] = ""
-        logger.error(state["error"])
-    return state
+        error = f"BRD validation failed: {str(e)}"
+        logger.error(error)
+        return {"validated_brd": "", "error": error}
+
+def output_filename(project_name: str) -> str:
+    """BRD_<slug>_<timestamp>_<id>.md; the id keeps files written in the same second apart."""
+    slug = "-".join(re.findall(r"[a-z0-9]+", project_name.lower())) or "project"
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return f"BRD_{slug}_{timestamp}_{uuid.uuid4().hex[:8]}.md"
 
 # Output node
-def output_node(state: BRDState) -> BRDState:
+def output_node(state: BRDState) -> dict:
     if state.get("error"):
         print(f"Error: {state['error']}")
         logger.error(f"Output node error: {state['error']}")
-        return state
+        return {}
     
     try:
         # Save validated BRD to file
         if state["validated_brd"]:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"BRD_{state['user_input'].project_name}_{timestamp}.md"
+            filename = output_filename(state["user_input"].project_name)
+            if state.get("output_dir"):
+                os.makedirs(state["output_dir"], exist_ok=True)
+                filename = os.path.join(state["output_dir"], filename)
             with open(filename, "w", encoding="utf-8") as f:
-                f.write(state["validated_brd"])
+                f.write(get_blob_store().get(state["validated_brd"]))
             
             print(f"BRD saved to {filename}")
             logger.info(f"BRD saved to {filename}")
-        else:
-            state["error"] = "No valid BRD to output"
-            print(f"Error: {state['error']}")
-            logger.error(state["error"])
+            return {"output_path": filename}
+        error = "No valid BRD to output"
+        print(f"Error: {error}")
+        logger.error(error)
+        return {"error": error}
     except Exception as e:
-        state["error"] = f"Output failed: {str(e)}"
-        logger.error(state["error"])
-    return state
-
-# Build LangGraph workflow
-workflow = StateGraph(BRDState)
-workflow.add_node("input", input_node)
-workflow.add_node("brd_generation", brd_generation_node)
-workflow.add_node("brd_validation", brd_validation_node)
-workflow.add_node("output", output_node)
-
-# Define edges
-workflow.set_entry_point("input")
-workflow.add_edge("input", "brd_generation")
-workflow.add_edge("brd_generation", "brd_validation")
-workflow.add_edge("brd_validation", "output")
-workflow.add_edge("output", END)
-
-# Compile and run
-graph = workflow.compile()
+        error = f"Output failed: {str(e)}"
+        logger.error(error)
+        return {"error": error}
+
+# Build LangGraph workflow (compiled on first use; importing langgraph is slow)
+@lru_cache(maxsize=None)
+def get_graph():
+    from langgraph.graph import StateGraph, END
+
+    workflow = StateGraph(BRDState)
+    workflow.add_node("input", traced_node("input", input_node))
+    workflow.add_node("brd_generation", traced_node("brd_generation", brd_generation_node))
+    workflow.add_node("brd_validation", traced_node("brd_validation", brd_validation_node))
+    workflow.add_node("output", traced_node("output", output_node))
+
+    # Define edges
+    workflow.set_entry_point("input")
+    workflow.add_edge("input", "brd_generation")
+    workflow.add_edge("brd_generation", "brd_validation")
+    workflow.add_edge("brd_validation", "output")
+    workflow.add_edge("output", END)
+
+    return workflow.compile()
 
 # Execute the workflow
 def run_brd_generation():
@@ -272,15 +335,26 @@ def run_brd_generation():
         user_input=None,
         draft_brd="",
         validated_brd="",
-        error=""
+        error="",
+        output_dir="",
+        output_path=""
     )
     try:
-        result = graph.invoke(initial_state)
+        with trace("brd") as run:
+            result = get_graph().invoke(initial_state)
+            run["error"] = result.get("error") or None
         return result
     except Exception as e:
         print(f"Workflow execution failed: {str(e)}")
         logger.error(f"Workflow execution failed: {str(e)}")
         return None
 
-if __name__ == "__main__":
+def setup_logging():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def main(argv=None):
+    setup_logging()
     run_brd_generation()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import argparse
+import csv
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, List
+
+from pydantic import ValidationError
+
+from BrdNode import BRDInput, BRDState, get_graph, logger, setup_logging
+from sdlc_common.scheduler import BATCH, priority
+from sdlc_common.tracing import trace
+
+LIST_FIELDS = ("in_scope_items", "out_of_scope_items", "stakeholders")
+
+# Load project records from JSONL / JSON / CSV / YAML
+def load_records(path: str) -> List[Dict]:
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, encoding="utf-8") as f:
+        if extension == ".jsonl":
+            records = [json.loads(line) for line in f if line.strip()]
+        elif extension == ".json":
+            records = json.load(f)
+        elif extension == ".csv":
+            # List fields hold several items separated by ";"
+            records = []
+            for row in csv.DictReader(f):
+                for field in LIST_FIELDS:
+                    row[field] = [item.strip() for item in (row.get(field) or "").split(";") if item.strip()]
+                records.append(row)
+        elif extension in (".yaml", ".yml"):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("PyYAML is required for YAML input: pip install pyyaml")
+            records = yaml.safe_load(f)
+        else:
+            raise ValueError(f"Unsupported input format: {extension} (use .jsonl, .json, .csv, .yaml)")
+    if not isinstance(records, list):
+        raise ValueError("Input file must contain a list of project records")
+    return records
+
+# Run the BRD graph for a single project
+def run_project(record: Dict, output_dir: str) -> Dict:
+    start = time.perf_counter()
+    if not isinstance(record, dict):
+        return {
+            "project_name": "<unnamed>",
+            "status": "failed",
+            "output_path": "",
+            "latency_seconds": 0.0,
+            "error": f"Invalid input: expected a project record object, got {type(record).__name__}",
+        }
+    project_name = record.get("project_name", "<unnamed>")
+    try:
+        user_input = BRDInput(**record)
+        initial_state = BRDState(
+            user_input=user_input,
+            draft_brd="",
+            validated_brd="",
+            error="",
+            output_dir=output_dir,
+            output_path=""
+        )
+        # Batch projects yield to interactive work when the rate limit is reached
+        with priority(BATCH), trace("brd", project_name=project_name, batch=True) as run:
+            result = get_graph().invoke(initial_state)
+            run["error"] = result.get("error") or None
+        error = result.get("error", "")
+        output_path = result.get("output_path", "")
+    except ValidationError as e:
+        error = f"Invalid input: {e}"
+        output_path = ""
+    except Exception as e:
+        error = f"Workflow execution failed: {str(e)}"
+        output_path = ""
+    return {
+        "project_name": project_name,
+        "status": "failed" if error else "ok",
+        "output_path": output_path,
+        "latency_seconds": round(time.perf_counter() - start, 3),
+        "error": error,
+    }
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+# Generate BRDs for every record with bounded concurrency
+def run_batch(input_path: str, output_dir: str, concurrency: int = 4) -> Dict:
+    records = load_records(input_path)
+    os.makedirs(output_dir, exist_ok=True)
+    results_path = os.path.join(output_dir, "results.jsonl")
+    write_lock = threading.Lock()
+    results = []
+    start = time.perf_counter()
+
+    logger.info(f"Generating {len(records)} BRDs with concurrency {concurrency}")
+    with open(results_path, "a", encoding="utf-8") as results_file, \
+            ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(run_project, record, output_dir) for record in records]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            # Stream each result to disk as soon as the project finishes
+            with write_lock:
+                results_file.write(json.dumps(result) + "\n")
+                results_file.flush()
+            if result["status"] == "ok":
+                logger.info(f"[{len(results)}/{len(records)}] {result['project_name']}: {result['output_path']} ({result['latency_seconds']}s)")
+            else:
+                logger.error(f"[{len(results)}/{len(records)}] {result['project_name']}: {result['error']}")
+
+    latencies = [r["latency_seconds"] for r in results if r["status"] == "ok"]
+    summary = {
+        "input": input_path,
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+        "concurrency": concurrency,
+        "total": len(results),
+        "succeeded": len(latencies),
+        "failed": len(results) - len(latencies),
+        "wall_time_seconds": round(time.perf_counter() - start, 3),
+        "latency_p50_seconds": percentile(latencies, 50),
+        "latency_p95_seconds": percentile(latencies, 95),
+        "latency_max_seconds": max(latencies, default=0.0),
+        "projects": sorted(results, key=lambda r: r["project_name"]),
+        "failures": [r for r in results if r["status"] == "failed"],
+    }
+    with open(os.path.join(output_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    logger.info(f"Batch finished: {summary['succeeded']} succeeded, {summary['failed']} failed in {summary['wall_time_seconds']}s")
+    return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate BRDs for many projects without interactive input.")
+    parser.add_argument("input", help="JSONL, JSON, CSV or YAML file of BRDInput records")
+    parser.add_argument("--output-dir", default="brd_output", help="Directory for BRDs, results.jsonl and summary.json")
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum number of projects generated at once")
+    args = parser.parse_args(argv)
+    setup_logging()
+    run_batch(args.input, args.output_dir, args.concurrency)
+
+if __name__ == "__main__":
+    main()
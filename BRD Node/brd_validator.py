@@ -0,0 +1,151 @@
+import re
+from typing import Dict, List, Tuple
+
+# The 12 sections every BRD must contain, in document order
+REQUIRED_SECTIONS = [
+    "Purpose",
+    "Project Summary",
+    "Project Success Criteria",
+    "Project Objectives",
+    "In-Scope",
+    "Out of Scope",
+    "Non-Functional Requirements",
+    "Assumptions",
+    "Dependencies",
+    "Constraints",
+    "Stakeholder Analysis",
+    "Roles and Responsibilities",
+]
+
+HEADING = re.compile(r"^\s{0,3}(#{1,6})\s+(.*?)\s*#*\s*$")
+STOPWORDS = {"a", "an", "and", "the", "of", "to", "for", "in", "on", "using", "with", "from", "into", "by", "or", "data"}
+MIN_SECTION_CHARS = 20
+
+
+def _canonical(title: str) -> str:
+    text = title.lower().replace("&", " and ")
+    text = re.sub(r"^[\s\d.)]*", "", re.sub(r"[*_`:]", "", text))
+    text = " ".join(re.sub(r"[^a-z]+", " ", text).split())
+    return text[len("project "):] if text.startswith("project ") and text != "project summary" else text
+
+
+SECTION_KEYS = {_canonical(name): name for name in REQUIRED_SECTIONS}
+SECTION_KEYS.update({
+    "in scope items": "In-Scope",
+    "out of scope items": "Out of Scope",
+    "nonfunctional requirements": "Non-Functional Requirements",
+})
+
+
+def section_name(title: str) -> str:
+    """Map a heading to its required section name, or "" if it is not one of them."""
+    return SECTION_KEYS.get(_canonical(title), "")
+
+
+def parse_sections(markdown: str) -> Tuple[str, Dict[str, Tuple[str, str]]]:
+    """Split a BRD into (preamble, {section: (heading line, body)}).
+
+    Headings that are not one of the required sections (sub-headings) stay in the
+    body of the section they appear in.
+    """
+    preamble: List[str] = []
+    sections: Dict[str, Tuple[str, List[str]]] = {}
+    current = None
+    for line in markdown.splitlines():
+        match = HEADING.match(line)
+        name = section_name(match.group(2)) if match else ""
+        if name and name not in sections:
+            current = name
+            sections[current] = (line, [])
+        elif current:
+            sections[current][1].append(line)
+        else:
+            preamble.append(line)
+    return "\n".join(preamble).strip(), {name: (heading, "\n".join(body).strip()) for name, (heading, body) in sections.items()}
+
+
+def _tokens(text: str) -> set:
+    return {word for word in re.findall(r"[a-z0-9]+", text.lower()) if word not in STOPWORDS}
+
+
+def mentions(body: str, item: str, threshold: float = 0.6) -> bool:
+    """True if most of the significant words of item appear in body."""
+    wanted = _tokens(item)
+    if not wanted:
+        return True
+    return len(wanted & _tokens(body)) / len(wanted) >= threshold
+
+
+def validate_brd(markdown: str, user_input) -> Tuple[List[str], Dict[str, List[str]]]:
+    """Deterministically check structure and alignment with the user input.
+
+    Returns (incomplete, problems): the sections that are missing or empty, and
+    {section: [problems]} for every section that needs repair. An empty dict means
+    the draft is acceptable as-is.
+    """
+    _, sections = parse_sections(markdown)
+    incomplete: List[str] = []
+    problems: Dict[str, List[str]] = {}
+
+    def add(section, problem):
+        problems.setdefault(section, []).append(problem)
+
+    for name in REQUIRED_SECTIONS:
+        if name not in sections:
+            incomplete.append(name)
+            add(name, "section is missing")
+        elif len(sections[name][1]) < MIN_SECTION_CHARS:
+            incomplete.append(name)
+            add(name, "section is empty")
+
+    def check(section, items, label, threshold=0.6):
+        if section in incomplete:
+            return
+        for item in items:
+            if not mentions(sections[section][1], item, threshold):
+                add(section, f"does not cover {label} '{item}'")
+
+    check("Purpose", [user_input.project_purpose], "the project purpose", 0.5)
+    check("Project Summary", [user_input.scope_area], "the scope area", 0.5)
+    check("In-Scope", user_input.in_scope_items, "in-scope item")
+    check("Out of Scope", user_input.out_of_scope_items, "out-of-scope item")
+    check("Stakeholder Analysis", user_input.stakeholders, "stakeholder")
+    check("Roles and Responsibilities", user_input.stakeholders, "stakeholder")
+    return incomplete, problems
+
+
+def mentions_name(text: str, name: str) -> bool:
+    """True if the name appears in text as a whole phrase, ignoring case and spacing."""
+    words = name.split()
+    if not words:
+        return False
+    pattern = r"(?<![\w])" + r"\s+".join(map(re.escape, words)) + r"(?![\w])"
+    return re.search(pattern, text, re.IGNORECASE) is not None
+
+
+def without_sections(markdown: str, names: List[str], preamble: str = None) -> str:
+    """The BRD without the named sections (and with another preamble, if given), in the required order."""
+    original_preamble, sections = parse_sections(markdown)
+    preamble = original_preamble if preamble is None else preamble
+    parts = [preamble] if preamble else []
+    for name in REQUIRED_SECTIONS:
+        if name in sections and name not in names:
+            heading, body = sections[name]
+            parts.append(f"{heading}\n{body}".strip())
+    return "\n\n".join(parts) + "\n"
+
+
+def merge_sections(markdown: str, repaired: str) -> str:
+    """Replace or add the sections found in repaired, keeping the required order."""
+    preamble, sections = parse_sections(markdown)
+    _, fixes = parse_sections(repaired)
+    for name, (_, body) in fixes.items():
+        heading = sections[name][0] if name in sections else f"## {REQUIRED_SECTIONS.index(name) + 1}. {name}"
+        sections[name] = (heading, body)
+
+    parts = [preamble] if preamble else []
+    for name in REQUIRED_SECTIONS:
+        if name in sections:
+            heading, body = sections[name]
+            parts.append(f"{heading}\n{body}".strip())
+    return "\n\n".join(parts) + "\n"
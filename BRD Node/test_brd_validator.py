@@ -0,0 +1,124 @@
+from types import SimpleNamespace
+
+from brd_validator import (
+    REQUIRED_SECTIONS, mentions, mentions_name, merge_sections, parse_sections, section_name, validate_brd,
+    without_sections,
+)
+
+USER_INPUT = SimpleNamespace(
+    project_name="Atlas",
+    project_purpose="Modernize the technology stack and leverage AWS cloud capabilities",
+    scope_area="Recreate the existing data warehouse from Oracle into AWS Redshift",
+    in_scope_items=["Table migration", "Stored procedure migration"],
+    out_of_scope_items=["Infrastructure setup"],
+    stakeholders=["IT department", "Dealers"],
+)
+
+BODIES = {
+    "Purpose": "Atlas will modernize the technology stack and leverage AWS cloud capabilities.",
+    "Project Summary": "Recreate the existing data warehouse from Oracle into AWS Redshift.",
+    "Project Success Criteria": "Reports run on Redshift with matching figures by the cut-over date.",
+    "Project Objectives": "Retire the Oracle warehouse and cut nightly load times in half.",
+    "In-Scope": "- Table migration of all reporting schemas\n- Stored procedure migration to Redshift SQL",
+    "Out of Scope": "- Infrastructure setup, which the platform team provides",
+    "Non-Functional Requirements": "Nightly loads finish within four hours; data is encrypted at rest.",
+    "Assumptions": "Source extracts stay available during the parallel run.",
+    "Dependencies": "The AWS landing zone and network connectivity to the data centre.",
+    "Constraints": "The migration must finish before the Oracle licence renewal.",
+    "Stakeholder Analysis": "The IT department owns the platform; Dealers consume the sales reports.",
+    "Roles and Responsibilities": "IT department: build and run. Dealers: acceptance testing of reports.",
+}
+
+
+def brd(bodies=BODIES, title="# Business Requirement Document: Atlas"):
+    parts = [title] + [f"## {number}. {name}\n{bodies[name]}" for number, name in enumerate(REQUIRED_SECTIONS, start=1) if name in bodies]
+    return "\n\n".join(parts) + "\n"
+
+
+def test_section_name_accepts_heading_variants():
+    assert section_name("1. Purpose") == "Purpose"
+    assert section_name("**In Scope Items:**") == "In-Scope"
+    assert section_name("Nonfunctional Requirements") == "Non-Functional Requirements"
+    assert section_name("Objectives") == "Project Objectives"
+    assert section_name("Roles & Responsibilities") == "Roles and Responsibilities"
+    assert section_name("Background") == ""
+
+
+def test_parse_sections_keeps_sub_headings_and_the_preamble():
+    markdown = brd().replace(BODIES["Constraints"], f"{BODIES['Constraints']}\n\n### Budget\nFixed price.")
+
+    preamble, sections = parse_sections(markdown)
+
+    assert preamble == "# Business Requirement Document: Atlas"
+    assert list(sections) == REQUIRED_SECTIONS
+    assert sections["Constraints"][1].endswith("### Budget\nFixed price.")
+    assert sections["Purpose"] == ("## 1. Purpose", BODIES["Purpose"])
+
+
+def test_validate_brd_accepts_a_complete_aligned_brd():
+    assert validate_brd(brd(), USER_INPUT) == ([], {})
+
+
+def test_validate_brd_reports_missing_and_empty_sections():
+    bodies = {name: body for name, body in BODIES.items() if name != "Dependencies"}
+    bodies["Assumptions"] = "TBD"
+
+    incomplete, problems = validate_brd(brd(bodies), USER_INPUT)
+
+    assert incomplete == ["Assumptions", "Dependencies"]
+    assert problems == {"Dependencies": ["section is missing"], "Assumptions": ["section is empty"]}
+
+
+def test_validate_brd_reports_input_items_a_section_does_not_cover():
+    bodies = dict(BODIES, **{
+        "In-Scope": "- Table migration of all reporting schemas and their history",
+        "Roles and Responsibilities": "The IT department builds and runs the new warehouse platform.",
+    })
+
+    incomplete, problems = validate_brd(brd(bodies), USER_INPUT)
+
+    assert incomplete == []
+    assert problems == {
+        "In-Scope": ["does not cover in-scope item 'Stored procedure migration'"],
+        "Roles and Responsibilities": ["does not cover stakeholder 'Dealers'"],
+    }
+
+
+def test_mentions_ignores_stopwords_and_needs_most_words():
+    # "using" and "the" are stopwords: two of the three significant words are present
+    assert mentions("Table migration is in scope.", "Table migration using the tools")
+    assert not mentions("Table migration is in scope.", "Table migration using the tools", 0.7)
+    assert not mentions("We migrate every table.", "Table migration using the tools")
+    assert mentions("anything", "the and of")
+
+
+def test_mentions_name_matches_whole_phrases_only():
+    assert mentions_name("Project Atlas  Migration starts in May.", "atlas migration")
+    assert not mentions_name("The Atlassian tools stay in place.", "Atlas")
+    assert not mentions_name("Anything at all.", "  ")
+
+
+def test_without_sections_drops_sections_and_replaces_the_preamble():
+    markdown = without_sections(brd(), ["Purpose", "Constraints"], "# BRD: Borealis")
+
+    preamble, sections = parse_sections(markdown)
+    assert preamble == "# BRD: Borealis"
+    assert list(sections) == [name for name in REQUIRED_SECTIONS if name not in ("Purpose", "Constraints")]
+    assert validate_brd(markdown, USER_INPUT) == (
+        ["Purpose", "Constraints"], {"Purpose": ["section is missing"], "Constraints": ["section is missing"]}
+    )
+
+
+def test_merge_sections_replaces_and_adds_sections_in_order():
+    bodies = {name: body for name, body in BODIES.items() if name != "Dependencies"}
+    bodies["Roles and Responsibilities"] = "The IT department builds and runs the new warehouse platform."
+    repaired = "## Dependencies\n" + BODIES["Dependencies"] + "\n\n## 12. Roles and Responsibilities\n" + BODIES["Roles and Responsibilities"]
+
+    merged = merge_sections(brd(bodies), repaired)
+
+    preamble, sections = parse_sections(merged)
+    assert preamble == "# Business Requirement Document: Atlas"
+    assert list(sections) == REQUIRED_SECTIONS
+    assert sections["Dependencies"] == ("## 9. Dependencies", BODIES["Dependencies"])
+    assert sections["Roles and Responsibilities"] == ("## 12. Roles and Responsibilities", BODIES["Roles and Responsibilities"])
+    assert validate_brd(merged, USER_INPUT) == ([], {})
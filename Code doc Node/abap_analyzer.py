@@ -0,0 +1,434 @@
+import re
+from typing import Dict, List, Optional, Set, Tuple, TypedDict
+
+from abap_chunker import normalize_abap
+
+ROUTINE_KINDS = ("FORM", "METHOD", "FUNCTION", "MODULE")
+LOOP_KINDS = ("LOOP", "DO", "WHILE", "SELECT")
+MAIN = "MAIN"
+
+NAME = r"[\w/]+"
+TABLE_DECLARATION = re.compile(rf"^(?:DATA|TYPES|CLASS-DATA|STATICS)\s+({NAME})\s+TYPE\s+(?:(SORTED|HASHED|STANDARD)\s+)?TABLE\b")
+TYPE_REFERENCE = re.compile(rf"^(?:DATA|CLASS-DATA|STATICS)\s+({NAME})\s+TYPE\s+({NAME})\s*$")
+DECLARATION = re.compile(rf"^(?:DATA|CLASS-DATA|STATICS|CONSTANTS|FIELD-SYMBOLS|PARAMETERS|SELECT-OPTIONS|TABLES|RANGES)\s+(<?{NAME}>?)")
+PARAMETER = re.compile(rf"(?:VALUE|REFERENCE)\(\s*({NAME})\s*\)|\b({NAME})\s+(?:TYPE|LIKE|STRUCTURE)\b", re.IGNORECASE)
+FROM_TABLE = re.compile(rf"\b(?:FROM|JOIN)\s+({NAME})", re.IGNORECASE)
+FAE = re.compile(rf"\bFOR\s+ALL\s+ENTRIES\s+IN\s+@?({NAME})", re.IGNORECASE)
+SELECT_STAR = re.compile(r"^SELECT\s+(?:SINGLE\s+)?(?:DISTINCT\s+)?\*|\bFIELDS\s+\*")
+DB_WRITE = re.compile(rf"^(?:UPDATE\s+({NAME})\s+(?:SET|FROM)|DELETE\s+FROM\s+({NAME})|INSERT\s+(?:INTO\s+)?({NAME})\s+(?:FROM|VALUES)|MODIFY\s+({NAME})\s+FROM)\b")
+CALLS = [
+    ("FORM", re.compile(rf"^PERFORM\s+({NAME})")),
+    ("FUNCTION", re.compile(r"\bCALL\s+FUNCTION\s+'([^']+)'")),
+    ("METHOD", re.compile(rf"\bCALL\s+METHOD\s+(?:[\w/]+(?:->|=>))?({NAME})")),
+    # Functional calls "meth( )", "lo_obj->meth( )", "zcl=>meth( )"; not constructors "NEW zcl( )"
+    ("METHOD", re.compile(rf"(?:^|[\s(=])(?<!NEW\s)(?:[\w/]+(?:->|=>))*({NAME})\(\s")),
+    ("PROGRAM", re.compile(rf"^SUBMIT\s+({NAME})")),
+    ("TRANSACTION", re.compile(r"\bCALL\s+TRANSACTION\s+'([^']+)'")),
+]
+# Built-in functions and constructor operators that look like method calls
+NOT_METHODS = {
+    "LINES", "STRLEN", "XSTRLEN", "CONDENSE", "CONCAT_LINES_OF", "TO_UPPER", "TO_LOWER", "LINE_EXISTS",
+    "LINE_INDEX", "BOOLC", "XSDBOOL", "ABS", "CEIL", "FLOOR", "ROUND", "SUBSTRING", "REPLACE", "SHIFT_LEFT",
+    "SHIFT_RIGHT", "COND", "SWITCH", "VALUE", "NEW", "REF", "CONV", "CAST", "CORRESPONDING", "REDUCE",
+    "FILTER", "EXACT", "DATA", "COUNT", "SUM", "MIN", "MAX", "AVG", "SY",
+}
+SEVERITY_ORDER = {"error": 0, "warning": 1, "info": 2}
+
+
+class Statement(TypedDict):
+    text: str   # comments removed, whitespace collapsed, original case
+    upper: str  # text upper-cased outside literals, for matching keywords and names
+    line: int   # 1-based line where the statement starts
+
+
+class Finding(TypedDict):
+    rule: str
+    severity: str  # error / warning / info
+    line: int
+    routine: str   # e.g. "FORM load_data", or MAIN for code outside routines
+    message: str
+
+
+def _split_outside_literals(text: str, separator: str) -> List[str]:
+    parts, current, quote, depth = [], [], None, 0
+    for ch in text:
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in "'`|":
+            quote = ch
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == separator and depth <= 0:
+            parts.append("".join(current))
+            current = []
+            continue
+        current.append(ch)
+    parts.append("".join(current))
+    return parts
+
+
+def _upper(text: str) -> str:
+    out, quote = [], None
+    for ch in text:
+        if quote:
+            if ch == quote:
+                quote = None
+            out.append(ch)
+        else:
+            if ch in "'`|":
+                quote = ch
+            out.append(ch.upper())
+    return "".join(out)
+
+
+def _statement(text: str, line: int) -> Statement:
+    text = " ".join(text.split())
+    return {"text": text, "upper": _upper(text), "line": line}
+
+
+def abap_statements(source: str) -> List[Statement]:
+    """Split ABAP source into statements, without comments.
+
+    Chained statements ("DATA: a TYPE i, b TYPE c.") become one statement per
+    link, each with the chain prefix.
+    """
+    statements: List[Statement] = []
+    current: List[str] = []
+    start = 0
+    quote = None
+    for number, line in enumerate(source.splitlines(), start=1):
+        if line.startswith("*") and not quote:
+            continue
+        for ch in line:
+            if quote:
+                current.append(ch)
+                if ch == quote:
+                    quote = None
+                continue
+            if ch == '"':
+                break
+            if not current and ch.isspace():
+                continue
+            if not current:
+                start = number
+            if ch in "'`|":
+                quote = ch
+            if ch == ".":
+                text = "".join(current).strip()
+                current = []
+                chain = _split_outside_literals(text, ":")
+                if len(chain) > 1:
+                    prefix, rest = chain[0], ":".join(chain[1:])
+                    statements.extend(_statement(f"{prefix} {link}", start) for link in _split_outside_literals(rest, ",") if link.strip())
+                elif text:
+                    statements.append(_statement(text, start))
+                continue
+            current.append(ch)
+        if quote != "|":
+            # Only string templates continue on the next line
+            quote = None
+        if current:
+            current.append(" ")
+    if "".join(current).strip():
+        statements.append(_statement("".join(current), start))
+    return statements
+
+
+def compact_abap(source: str) -> str:
+    """Source without comments, blank lines and repeated spaces; indentation is kept."""
+    lines = []
+    for line in source.splitlines():
+        if line.startswith("*"):
+            continue
+        out, quote = [], None
+        for ch in line:
+            if quote:
+                if ch == quote:
+                    quote = None
+            elif ch in "'`|":
+                quote = ch
+            elif ch == '"':
+                break
+            out.append(ch)
+        text = "".join(out).rstrip()
+        if text.strip():
+            indent = len(text) - len(text.lstrip())
+            lines.append(" " * indent + re.sub(r" {2,}", " ", text.strip()))
+    return "\n".join(lines)
+
+
+def duplicate_routines(chunks: List[dict]) -> Dict[int, int]:
+    """{index: index of the first routine with the same code} for routines that differ only in name and comments."""
+    first: Dict[Tuple[str, str], int] = {}
+    duplicates = {}
+    for index, chunk in enumerate(chunks):
+        if chunk["kind"] == "MAIN":
+            continue
+        name = re.escape(chunk["name"].lower())
+        body = re.sub(rf"(?<![\w/-]){name}(?![\w/])", "<name>", normalize_abap(chunk["source"]))
+        duplicates_of = first.setdefault((chunk["kind"], body), index)
+        if duplicates_of != index:
+            duplicates[index] = duplicates_of
+    return duplicates
+
+
+def _parameters(upper: str, text: str) -> List[str]:
+    # Names in the USING / CHANGING / TABLES / IMPORTING ... part of a FORM or METHODS statement
+    match = re.search(r"\b(USING|CHANGING|TABLES|IMPORTING|EXPORTING|RETURNING|RAISING)\b", upper)
+    if not match:
+        return []
+    section = text[match.start():]
+    return [value or name for value, name in PARAMETER.findall(section)]
+
+
+def _is_guard(condition: str, itab: str) -> bool:
+    name = re.escape(itab)
+    return bool(
+        re.search(rf"(?<![\w-]){name}\s+IS\s+NOT\s+INITIAL\b", condition)
+        or re.search(rf"\bNOT\s+{name}\s+IS\s+INITIAL\b", condition)
+        or re.search(rf"\bLINES\(\s*{name}\s*\)\s*(?:>|GT|<>|NE)\s*0\b", condition)
+    )
+
+
+class _Block:
+    def __init__(self, kind: str, statement: Statement, condition: str = "", subject: str = ""):
+        self.kind = kind
+        self.statement = statement
+        self.condition = condition
+        self.subject = subject
+        self.leaves_routine = False
+
+
+def _endselect_partners(statements: List[Statement]) -> Set[int]:
+    # SELECT ... ENDSELECT loops: array fetches (INTO TABLE) and SELECT SINGLE have no ENDSELECT
+    open_selects, loops = [], set()
+    for index, statement in enumerate(statements):
+        upper = statement["upper"]
+        if upper.startswith("SELECT ") and not re.match(r"SELECT\s+SINGLE\b", upper) and not re.search(r"\b(?:INTO|APPENDING)\s+(?:CORRESPONDING\s+FIELDS\s+OF\s+)?TABLE\b", upper):
+            open_selects.append(index)
+        elif upper == "ENDSELECT" and open_selects:
+            loops.add(open_selects.pop())
+    return loops
+
+
+def analyze_abap(source: str) -> dict:
+    """Facts and anti-patterns found without a model call.
+
+    Returns {"routines", "selection_screen", "tables": {"read", "written"},
+    "selects", "calls", "findings"}. Findings are sorted by severity, then line.
+    """
+    statements = abap_statements(source)
+    select_loops = _endselect_partners(statements)
+    table_kinds: Dict[str, str] = {}
+    declared: Set[str] = set()
+    routines: List[dict] = []
+    method_parameters: Dict[str, List[str]] = {}
+    selection_screen: List[str] = []
+    reads, writes = set(), set()
+    selects: List[dict] = []
+    calls: List[dict] = []
+    findings: List[Finding] = []
+    routine = MAIN
+    blocks: List[_Block] = []
+    guards: Set[str] = set()
+
+    def add(rule: str, severity: str, statement: Statement, message: str) -> None:
+        findings.append({"rule": rule, "severity": severity, "line": statement["line"], "routine": routine, "message": message})
+
+    def in_loop() -> Optional[_Block]:
+        return next((block for block in reversed(blocks) if block.kind in LOOP_KINDS), None)
+
+    for index, statement in enumerate(statements):
+        text, upper = statement["text"], statement["upper"]
+        keyword = upper.split(" ", 1)[0]
+
+        # Declarations and parameters
+        match = TABLE_DECLARATION.match(upper)
+        if match:
+            table_kinds[match.group(1)] = match.group(2) or "STANDARD"
+        match = TYPE_REFERENCE.match(upper)
+        if match and match.group(2) in table_kinds:
+            table_kinds[match.group(1)] = table_kinds[match.group(2)]
+        match = DECLARATION.match(upper)
+        if match:
+            declared.add(match.group(1))
+            if keyword in ("PARAMETERS", "SELECT-OPTIONS"):
+                selection_screen.append(f"{text.split()[0]} {text.split()[1]}")
+        if keyword in ("METHODS", "CLASS-METHODS") and len(upper.split()) > 1:
+            # Signatures are in the class definition, before the METHOD implementations
+            method_parameters[upper.split()[1]] = _parameters(upper, text)
+            continue
+
+        # Routine boundaries
+        if keyword in ROUTINE_KINDS:
+            name = text.split()[1] if len(text.split()) > 1 else ""
+            routine = f"{keyword} {name}"
+            parameters = _parameters(upper, text) if keyword == "FORM" else method_parameters.get(name.upper(), [])
+            declared.update(parameter.upper() for parameter in parameters)
+            routines.append({"kind": keyword, "name": name, "line": statement["line"], "parameters": parameters})
+            blocks, guards = [], set()
+            continue
+        if keyword in tuple(f"END{kind}" for kind in ROUTINE_KINDS):
+            routine, blocks, guards = MAIN, [], set()
+            continue
+
+        # Control blocks
+        if keyword == "IF":
+            blocks.append(_Block("IF", statement, condition=upper[3:]))
+        elif keyword in ("ELSEIF", "ELSE") and blocks and blocks[-1].kind == "IF":
+            blocks[-1].condition = upper[7:] if keyword == "ELSEIF" else ""
+        elif keyword == "ENDIF" and blocks and blocks[-1].kind == "IF":
+            block = blocks.pop()
+            # IF itab IS INITIAL. RETURN. ENDIF. guards everything after it in the routine
+            initial = re.match(rf"^({NAME})\s+IS\s+INITIAL$", block.statement["upper"][3:].strip())
+            if block.leaves_routine and initial:
+                guards.add(initial.group(1))
+        elif keyword == "CHECK":
+            guards.update(name for name in re.findall(NAME, upper) if _is_guard(upper, name))
+        elif keyword in ("RETURN", "EXIT") and blocks and blocks[-1].kind == "IF":
+            if keyword == "RETURN" or not in_loop():
+                blocks[-1].leaves_routine = True
+        elif keyword in ("DO", "WHILE"):
+            blocks.append(_Block(keyword, statement))
+        elif keyword in ("ENDDO", "ENDWHILE", "ENDLOOP", "ENDSELECT"):
+            kind = {"ENDDO": "DO", "ENDWHILE": "WHILE", "ENDLOOP": "LOOP", "ENDSELECT": "SELECT"}[keyword]
+            for position in range(len(blocks) - 1, -1, -1):
+                if blocks[position].kind == kind:
+                    del blocks[position:]
+                    break
+        elif keyword == "LOOP":
+            match = re.match(rf"^LOOP\s+AT\s+({NAME})", upper)
+            subject = match.group(1) if match else ""
+            outer = in_loop()
+            if outer is not None and outer.kind == "LOOP" and subject:
+                optimized = table_kinds.get(subject) in ("SORTED", "HASHED") and " WHERE " in upper
+                parallel_cursor = re.search(r"\bFROM\s+\S+", upper) is not None
+                if not optimized and not parallel_cursor:
+                    add("nested-loop", "warning", statement,
+                        f"LOOP AT {text.split()[2]} is nested in LOOP AT {outer.subject.lower()} (line {outer.statement['line']}): "
+                        "it scans the inner table once per outer row; use a SORTED/HASHED table with WHERE, or a parallel cursor")
+            blocks.append(_Block("LOOP", statement, subject=subject))
+        elif keyword == "READ" and re.match(rf"^READ\s+TABLE\s+({NAME})", upper):
+            subject = re.match(rf"^READ\s+TABLE\s+({NAME})", upper).group(1)
+            linear = " WITH KEY " in f" {upper} " and "BINARY SEARCH" not in upper and table_kinds.get(subject) not in ("SORTED", "HASHED")
+            if linear and in_loop() is not None:
+                add("linear-read-in-loop", "warning", statement,
+                    f"READ TABLE {text.split()[2]} WITH KEY inside a loop is a linear search per iteration; "
+                    "use a SORTED/HASHED table (WITH TABLE KEY) or SORT once and READ ... BINARY SEARCH")
+
+        # Database access
+        if keyword == "SELECT":
+            tables = sorted({name.upper() for name in FROM_TABLE.findall(text) if not name.startswith("@")})
+            reads.update(tables)
+            loop = in_loop()
+            fae = FAE.search(text)
+            selects.append({
+                "line": statement["line"], "routine": routine, "tables": tables,
+                "single": bool(re.match(r"SELECT\s+SINGLE\b", upper)), "for_all_entries": fae.group(1) if fae else "",
+            })
+            if loop is not None:
+                add("select-in-loop", "error", statement,
+                    f"SELECT from {', '.join(tables) or 'the database'} runs once per iteration of the {loop.kind} at line "
+                    f"{loop.statement['line']}; read all rows once before the loop (JOIN, FOR ALL ENTRIES or a range) and READ TABLE inside it")
+            if SELECT_STAR.search(upper):
+                add("select-star", "warning", statement,
+                    f"SELECT * from {', '.join(tables) or 'the database'} transfers every column; list only the fields the program uses")
+            if fae and not any(_is_guard(block.condition, fae.group(1).upper()) for block in blocks if block.kind == "IF") \
+                    and fae.group(1).upper() not in guards:
+                add("for-all-entries-unguarded", "error", statement,
+                    f"FOR ALL ENTRIES IN {fae.group(1)} has no IS NOT INITIAL check; an empty {fae.group(1)} selects every row of "
+                    f"{', '.join(tables) or 'the table'}")
+            if index in select_loops:
+                blocks.append(_Block("SELECT", statement, subject=", ".join(tables)))
+        match = DB_WRITE.match(upper)
+        if match:
+            name = next(group for group in match.groups() if group)
+            if name not in declared and (" FROM TABLE " in upper or not re.search(r"\b(?:INDEX|TRANSPORTING|ASSIGNING)\b", upper)):
+                writes.add(name)
+
+        # Call graph
+        for target_kind, pattern in CALLS:
+            for name in pattern.findall(upper):
+                if target_kind == "METHOD" and (name.upper() in NOT_METHODS or keyword in ("METHODS", "CLASS-METHODS")):
+                    continue
+                loop = in_loop()
+                calls.append({
+                    "routine": routine, "target": f"{target_kind} {name if target_kind in ('FUNCTION', 'TRANSACTION') else name.lower()}",
+                    "line": statement["line"], "in_loop": loop.statement["line"] if loop else 0,
+                })
+
+    # A PERFORM / method call in a loop to a routine that selects (directly or further down the call graph)
+    selecting = {select["routine"].upper() for select in selects}
+    changed = True
+    while changed:
+        changed = False
+        for call in calls:
+            if call["target"].upper() in selecting and call["routine"].upper() not in selecting:
+                selecting.add(call["routine"].upper())
+                changed = True
+    for call in calls:
+        if call["in_loop"] and call["target"].upper() in selecting:
+            findings.append({
+                "rule": "select-in-loop", "severity": "error", "line": call["line"], "routine": call["routine"],
+                "message": f"{call['target']} reads the database and is called once per iteration of the loop at line {call['in_loop']}",
+            })
+
+    findings.sort(key=lambda finding: (SEVERITY_ORDER[finding["severity"]], finding["line"]))
+    return {
+        "routines": routines,
+        "selection_screen": selection_screen,
+        "tables": {"read": sorted(reads), "written": sorted(writes)},
+        "selects": selects,
+        "calls": calls,
+        "findings": findings,
+    }
+
+
+def routine_findings(analysis: dict, kind: str, name: str) -> List[Finding]:
+    key = MAIN if kind == "MAIN" else f"{kind} {name}".upper()
+    return [finding for finding in analysis["findings"] if finding["routine"].upper() == key]
+
+
+def routine_start(analysis: dict, kind: str, name: str) -> int:
+    """Source line of the routine's first statement; 0 for code outside routines or an unknown routine."""
+    key = f"{kind} {name}".upper()
+    for routine in analysis["routines"]:
+        if f"{routine['kind']} {routine['name']}".upper() == key:
+            return routine["line"]
+    return 0
+
+
+def format_findings(findings: List[Finding]) -> str:
+    """Markdown section listing the findings, shown before the LLM's documentation."""
+    if not findings:
+        return "## Static Analysis Findings\nNo issues found by the static checks."
+    lines = [f"## Static Analysis Findings\n{len(findings)} issue(s) found by the static checks:"]
+    lines += [f"- **{finding['severity'].upper()}** line {finding['line']} ({finding['routine']}) [{finding['rule']}]: {finding['message']}" for finding in findings]
+    return "\n".join(lines)
+
+
+def format_summary(analysis: dict) -> str:
+    """Compact facts for the prompt, so the model does not have to re-derive them from the source.
+
+    Routines are left out: their names and parameters are in the code or notes the prompt already has.
+    """
+    lines = []
+    if analysis["selection_screen"]:
+        lines.append(f"Selection screen: {', '.join(analysis['selection_screen'])}")
+    lines.append(f"Database tables read: {', '.join(analysis['tables']['read']) or 'none'}")
+    lines.append(f"Database tables written: {', '.join(analysis['tables']['written']) or 'none'}")
+    edges: Dict[str, List[str]] = {}
+    for call in analysis["calls"]:
+        targets = edges.setdefault(call["routine"], [])
+        if call["target"] not in targets:
+            targets.append(call["target"])
+    lines += [f"Calls from {routine}: {', '.join(targets)}" for routine, targets in edges.items()]
+    counts: Dict[Tuple[str, str], int] = {}
+    for finding in analysis["findings"]:
+        counts[(finding["rule"], finding["severity"])] = counts.get((finding["rule"], finding["severity"]), 0) + 1
+    if counts:
+        lines.append("Static findings (already reported): " + ", ".join(f"{rule} x{count}" for (rule, _), count in counts.items()))
+    return "\n".join(lines)
@@ -0,0 +1,105 @@
+import hashlib
+import re
+from typing import List, TypedDict
+
+# Statements that open / close a modularization unit
+ROUTINE_START = re.compile(r"^\s*(FORM|METHOD|FUNCTION|MODULE)\s+([\w/~<>-]+)", re.IGNORECASE)
+ROUTINE_END = re.compile(r"^\s*END(FORM|METHOD|FUNCTION|MODULE)\s*\.", re.IGNORECASE)
+
+
+class ABAPChunk(TypedDict):
+    kind: str   # FORM / METHOD / FUNCTION / MODULE, or MAIN for code outside routines
+    name: str
+    source: str
+
+
+def normalize_abap(source: str) -> str:
+    """Drop comments and blank lines, collapse whitespace and case-fold outside literals."""
+    normalized = []
+    for line in source.splitlines():
+        if line.startswith("*"):
+            continue
+        out, quote = [], None
+        for ch in line:
+            if quote:
+                out.append(ch)
+                if ch == quote:
+                    quote = None
+            elif ch in "'`|":
+                quote = ch
+                out.append(ch)
+            elif ch == '"':
+                break
+            else:
+                out.append(ch.lower())
+        text = " ".join("".join(out).split())
+        if text:
+            normalized.append(text)
+    return "\n".join(normalized)
+
+
+def routine_fingerprint(chunk: "ABAPChunk") -> str:
+    """Stable hash of a routine that ignores comment, whitespace and case-only edits."""
+    payload = f"{chunk['kind']} {chunk['name'].lower()}\n{normalize_abap(chunk['source'])}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _is_comment(line: str) -> bool:
+    return line.startswith("*") or line.lstrip().startswith('"')
+
+
+def _split_lines(lines: List[str], max_chars: int) -> List[str]:
+    # Split an oversized block at line boundaries, preferring blank lines
+    pieces, current, size = [], [], 0
+    for line in lines:
+        if size + len(line) > max_chars and current:
+            # Cut after the last blank line that follows some code, otherwise before this line
+            blanks = [index for index, text in enumerate(current) if index and not text.strip()]
+            cut = blanks[-1] + 1 if blanks else len(current)
+            pieces.append("\n".join(current[:cut]))
+            current = current[cut:]
+            size = sum(len(text) + 1 for text in current)
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        pieces.append("\n".join(current))
+    return pieces
+
+
+def split_abap_routines(abap_code: str, max_chars: int = 12000) -> List[ABAPChunk]:
+    """Split ABAP source at FORM / METHOD / FUNCTION / MODULE boundaries.
+
+    Code outside any routine (declarations, events, class definitions) is collected
+    into leading MAIN chunks, split further if it exceeds max_chars. Routines follow
+    in source order.
+    """
+    routines: List[ABAPChunk] = []
+    main_lines: List[str] = []
+    routine_lines: List[str] = []
+    kind = name = None
+
+    for line in abap_code.splitlines():
+        if kind is None:
+            match = None if _is_comment(line) else ROUTINE_START.match(line)
+            if match:
+                kind, name = match.group(1).upper(), match.group(2)
+                routine_lines = [line]
+            else:
+                main_lines.append(line)
+            continue
+
+        routine_lines.append(line)
+        end = None if _is_comment(line) else ROUTINE_END.match(line)
+        if end and end.group(1).upper() == kind:
+            routines.append({"kind": kind, "name": name, "source": "\n".join(routine_lines)})
+            kind = name = None
+
+    if kind is not None:
+        # Unterminated routine: keep what we have rather than dropping it
+        routines.append({"kind": kind, "name": name, "source": "\n".join(routine_lines)})
+
+    chunks: List[ABAPChunk] = []
+    if any(line.strip() and not _is_comment(line) for line in main_lines):
+        for piece in _split_lines(main_lines, max_chars):
+            chunks.append({"kind": "MAIN", "name": "main program", "source": piece})
+    return chunks + routines
@@ -1,8 +1,17 @@
-from flask import Flask
+from flask import Flask, Response
 from code_doc import development_bp  # assuming your file is named code_doc.py
+from sdlc_common.tracing import render_metrics
 
 app = Flask(__name__)
 app.register_blueprint(development_bp, url_prefix="/")
 
-if __name__ == "__main__":
+# Prometheus scrape endpoint: per-node latency, LLM tokens, cache hits and cost
+@app.route("/metrics")
+def metrics():
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+def main(argv=None):
     app.run(debug=True)
+
+if __name__ == "__main__":
+    main()
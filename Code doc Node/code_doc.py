@@ -1,15 +1,24 @@
-from flask import Blueprint, request, render_template, send_from_directory
-from langgraph.graph import StateGraph
-from langchain_core.runnables import RunnableLambda
-from gen_ai_hub.proxy.langchain.init_models import init_llm
+from flask import Blueprint, Response, request, render_template, send_from_directory, jsonify, url_for, stream_with_context
+from functools import lru_cache
 from typing import TypedDict
 from datetime import datetime
+import hashlib
+import json
+import logging
 import os
-import time
 import re
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph
-from reportlab.lib.styles import getSampleStyleSheet
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# Shared helpers live at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from jobs import JobQueue, QueueFullError
+from abap_chunker import normalize_abap, split_abap_routines, routine_fingerprint
+from routine_notes import get_notes_store
+from abap_analyzer import analyze_abap, compact_abap, duplicate_routines, format_findings, format_summary, routine_findings, routine_start
+from sdlc_common.scheduler import INTERACTIVE, priority
+from sdlc_common.semantic_cache import get_semantic_cache
+from sdlc_common.tracing import map_ordered, trace, traced_node
 
 env_vars = {
     'AICORE_AUTH_URL': 'https://genai-ltim.authentication.eu10.hana.ondemand.com/oauth/token',
@@ -18,43 +27,52 @@ env_vars = {
     'AICORE_BASE_URL': 'https://api.ai.prod.eu-central-1.aws.ml.hana.ondemand.com/v2',
     'AICORE_RESOURCE_GROUP': 'default'
 }
-for key, value in env_vars.items():
-    os.environ[key] = value
 
-# Initialize GPT-4o
-llm = init_llm("gpt-4o")
-llm = llm.bind(max_completion_tokens=None)
+def configure_ai_core():
+    # Values already set in the environment take precedence
+    for key, value in env_vars.items():
+        os.environ.setdefault(key, value)
+
+# GPT-4o is created on first upload so the Flask app starts without importing langchain;
+# AI Core credentials are applied right before the first request
+@lru_cache(maxsize=None)
+def get_llm():
+    from sdlc_common.llm_cache import lazy_llm
+    return lazy_llm("gpt-4o", setup=configure_ai_core, bind={"max_completion_tokens": None})
+
+# Directory where generated PDFs are written and served from (output/ in the repository by default)
+PDF_SAVE_DIR = os.getenv("ABAP_DOC_SAVE_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "output"))
+
+# Programs are documented routine by routine; code outside routines is split at this size
+CHUNK_MAX_CHARS = int(os.getenv("ABAP_DOC_CHUNK_CHARS", "12000"))
+MAX_CONCURRENCY = int(os.getenv("ABAP_DOC_MAX_CONCURRENCY", "4"))
+
+# Uploads are processed by a bounded worker pool instead of the request thread
+job_queue = JobQueue(
+    max_workers=int(os.getenv("CODE_DOC_WORKERS", "4")),
+    max_pending=int(os.getenv("CODE_DOC_MAX_PENDING", "32")),
+)
 
 class ABAPDocState(TypedDict):
     abap_code: str
     output: str
+    analysis: dict  # static analysis: tables, routines, calls and findings (see abap_analyzer)
 
 development_bp = Blueprint("development", __name__)
+logger = logging.getLogger(__name__)
 
-def clean_output_for_pdf(text: str) -> str:
-    text = re.sub(r"\*\*(.*?)\*\*", r"\1", text)
-    text = re.sub(r"#{1,6}\s*", "", text)
-    return text
+# Saving output PDF in local directory (PDF_SAVE_DIR unless the caller has its own)
+def save_pdf(raw_text: str, save_dir: str = "") -> str:
+    from sdlc_common.pdf_render import render_markdown_pdf
 
-# Saving output PDF in local directory
-def save_pdf(raw_text: str) -> str:
-    styles = getSampleStyleSheet()
-    save_dir = r"C:\Users\10828991\OneDrive - LTIMindtree\Desktop\langgraph task"
+    save_dir = save_dir or PDF_SAVE_DIR
     os.makedirs(save_dir, exist_ok=True)
 
-    filename = f"ABAP_Documentation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+    # Microseconds keep names unique when several jobs finish in the same second
+    filename = f"ABAP_Documentation_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.pdf"
     pdf_path = os.path.join(save_dir, filename)
 
-    doc = SimpleDocTemplate(pdf_path, pagesize=letter)
-    elements = [Paragraph("ABAP Documentation", styles['Title'])]
-
-    cleaned = clean_output_for_pdf(raw_text)
-    for line in cleaned.split("\n"):
-        if line.strip():
-            elements.append(Paragraph(line.strip(), styles["Normal"]))
-
-    doc.build(elements)
-    return pdf_path
+    return render_markdown_pdf(pdf_path, raw_text, title="ABAP Documentation")
 
 # Validate output 
 def validate_output(output: str) -> bool:
@@ -65,64 +83,251 @@ def validate_output(output: str) -> bool:
     ]
     return all(section in output for section in required_sections)
 
-# Documentation generation
-def generate_abap_doc(state: ABAPDocState) -> ABAPDocState:
-    abap_code = state["abap_code"]
-    prompt = f"""
-You are an expert SAP ABAP code reviewer and documentation generator.
+# Rate limits, retries and backoff are handled by the shared LLM scheduler
+def invoke_llm(prompt: str):
+    try:
+        return get_llm().invoke(prompt).content
+    except Exception as e:
+        logger.error(f"LLM call failed: {e}")
+        return None
+
+def findings_prompt(findings: list, start_line: int = 0) -> str:
+    # Rule names only: the full messages are in the report, the model just needs to know what is covered.
+    # Lines are counted from the routine's first line, so the prompt (and the notes cache key) stays the same
+    # when code above the routine changes; without a start line (code outside routines) only rules are listed.
+    if not findings:
+        return ""
+    if start_line:
+        lines = "\n".join(f"- line {finding['line'] - start_line + 1} of the routine: {finding['rule']}" for finding in findings)
+    else:
+        lines = "\n".join(f"- {finding['rule']}" for finding in findings)
+    return f"\nAlready reported by static analysis (do not repeat):\n{lines}\n"
+
+# Static analysis: facts and anti-patterns found without a model call
+def analyze_abap_node(state: ABAPDocState) -> ABAPDocState:
+    analysis = analyze_abap(state["abap_code"])
+    logger.info(f"Static analysis: {len(analysis['findings'])} finding(s), {len(analysis['routines'])} routine(s)")
+    return {"analysis": analysis}
+
+DOC_SECTIONS = ["Technical Documentation", "Code Review Comments", "Optimization Suggestions"]
+# A notes heading in any style the model uses: "### Code Review Comments", "**2. Code Review Comments**", ...
+NOTES_HEADING = re.compile(rf"^[\s#*_]*(?:\d+[.)]\s*)?({'|'.join(DOC_SECTIONS)})\b[\s*_:]*$", re.IGNORECASE)
+
+def routine_title(chunk: dict) -> str:
+    return "Main program" if chunk["kind"] == "MAIN" else f"{chunk['kind']} {chunk['name']}"
 
-Given the following ABAP code, provide:
-1. Technical Documentation (purpose, inputs, outputs, logic, tables used)
-2. Code Review Comments
-3. Optimization Suggestions (performance, readability, best practices)
+# Map step: notes for a single routine, reused across uploads while the routine and its findings are unchanged
+def document_chunk(chunk: dict, analysis: dict):
+    findings = findings_prompt(
+        routine_findings(analysis, chunk["kind"], chunk["name"]), routine_start(analysis, chunk["kind"], chunk["name"])
+    )
+    store = get_notes_store()
+    key = f"{routine_fingerprint(chunk)}:{hashlib.sha256(findings.encode('utf-8')).hexdigest()[:16]}"
+    if store is not None:
+        notes = store.get(key)
+        if notes is not None:
+            chunk["reused"] = True
+            return notes
 
-ABAP Code:
-{abap_code}
+    part = "the code outside routines (declarations and events)" if chunk["kind"] == "MAIN" else f"{chunk['kind']} {chunk['name']}"
+    prompt = f"""
+You are an expert SAP ABAP code reviewer. The code below is one part ({part}) of an ABAP program.
+
+Write concise notes for it under exactly these three headings, in this order:
+#### Technical Documentation
+(purpose, inputs / outputs such as parameters, USING / CHANGING / TABLES and selection screen fields, logic, tables used)
+#### Code Review Comments
+#### Optimization Suggestions
+(performance, readability, best practices)
+{findings}
+ABAP Code (comments removed):
+{compact_abap(chunk['source'])}
 """
+    notes = invoke_llm(prompt)
+    if notes and store is not None:
+        store.put(key, notes)
+    return notes
 
-    for attempt in range(5):
-        try:
-            response = llm.invoke(prompt)
-            return {"output": response.content, "abap_code": abap_code}
-        except Exception as e:
-            print(f"[Retry {attempt + 1}] Error: {e}")
-            time.sleep(2 ** attempt)
+def split_notes(notes: str) -> dict:
+    """{section: text} for the DOC_SECTIONS headings in a routine's notes; text before any heading is technical documentation."""
+    sections = {name: [] for name in DOC_SECTIONS}
+    current = DOC_SECTIONS[0]
+    for line in notes.splitlines():
+        match = NOTES_HEADING.match(line)
+        if match:
+            current = next(name for name in DOC_SECTIONS if name.lower() == match.group(1).lower())
+            continue
+        sections[current].append(line)
+    return {name: "\n".join(lines).strip() for name, lines in sections.items()}
 
-    return {"output": "Error generating documentation.", "abap_code": abap_code}
+# Reduce step: the document is stitched together from the routine notes, without another LLM call
+def assemble_document(chunks: list, notes: list, duplicates: dict, analysis: dict) -> str:
+    parts = {index: split_notes(note) for index, note in enumerate(notes) if index not in duplicates}
+    document = []
+    for number, section in enumerate(DOC_SECTIONS, start=1):
+        document.append(f"## {number}. {section}")
+        if number == 1:
+            document.append("Program facts from static analysis:\n\n" + "\n".join(f"- {line}" for line in format_summary(analysis).splitlines()))
+        for index, chunk in enumerate(chunks):
+            if index in duplicates:
+                if number == 1:
+                    document.append(f"### {routine_title(chunk)}\nSame code as {routine_title(chunks[duplicates[index]])}.")
+                continue
+            document.append(f"### {routine_title(chunk)}\n{parts[index][section] or 'None.'}")
+    return "\n\n".join(document)
+
+# Documentation generation: per-routine notes from the LLM (or the notes store), assembled after the static analysis facts
+def generate_abap_doc(state: ABAPDocState) -> ABAPDocState:
+    from langgraph.config import get_stream_writer
+
+    abap_code = state["abap_code"]
+    analysis = state.get("analysis") or analyze_abap(abap_code)
+    # Tokens go to graph.stream(stream_mode="custom") readers; a no-op under graph.invoke
+    write = get_stream_writer()
+    findings = format_findings(analysis["findings"])
+    write(f"{findings}\n\n")
+    # Same program up to comments, blank lines, indentation and case: reuse its documentation.
+    # Only the LLM's sections are cached; the findings above carry this upload's line numbers.
+    cache = get_semantic_cache()
+    normalized = normalize_abap(abap_code)
+    match = cache.lookup("abap_doc", normalized) if cache else None
+    if match:
+        logger.info(f"Reusing cached documentation (similarity {match['similarity']:.2f})")
+        write(match["artifact"])
+        return {"output": f"{findings}\n\n{match['artifact']}", "abap_code": abap_code}
+    chunks = split_abap_routines(abap_code, CHUNK_MAX_CHARS)
+    duplicates = duplicate_routines(chunks)
+    # Every routine is fingerprinted: an edited upload only sends its changed routines to the LLM,
+    # concurrently, so latency follows the largest changed routine rather than the program
+    distinct = [chunk for index, chunk in enumerate(chunks) if index not in duplicates]
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENCY) as executor:
+        distinct_notes = dict(zip(map(id, distinct), map_ordered(executor, lambda chunk: document_chunk(chunk, analysis), distinct)))
+    notes = ["" if index in duplicates else distinct_notes[id(chunk)] for index, chunk in enumerate(chunks)]
+    reused = sum(1 for chunk in distinct if chunk.get("reused"))
+    logger.info(f"Documented {len(distinct) - reused} changed routine(s), reused notes for {reused}; {len(duplicates)} duplicate(s) of {len(chunks)}")
+    if not all(distinct_notes.values()):
+        return {"output": "Error generating documentation.", "abap_code": abap_code}
+    output = assemble_document(chunks, notes, duplicates, analysis)
+    write(output)
+    if cache:
+        cache.store("abap_doc", normalized, output)
+    # Deterministic findings come first in the document, ahead of the LLM's sections
+    return {"output": f"{findings}\n\n{output}", "abap_code": abap_code}
 
 # LangGraph 
-graph_builder = StateGraph(ABAPDocState)
-graph_builder.add_node("generate_doc", RunnableLambda(generate_abap_doc))
-graph_builder.set_entry_point("generate_doc")
-graph_builder.set_finish_point("generate_doc")
-graph = graph_builder.compile()
+@lru_cache(maxsize=None)
+def get_graph():
+    # Built on first upload so the Flask app starts without importing langgraph
+    from langgraph.graph import StateGraph
+    from langchain_core.runnables import RunnableLambda
+
+    graph_builder = StateGraph(ABAPDocState)
+    graph_builder.add_node("analyze", RunnableLambda(traced_node("analyze", analyze_abap_node)))
+    graph_builder.add_node("generate_doc", RunnableLambda(traced_node("generate_doc", generate_abap_doc)))
+    graph_builder.set_entry_point("analyze")
+    graph_builder.add_edge("analyze", "generate_doc")
+    graph_builder.set_finish_point("generate_doc")
+    return graph_builder.compile()
+
+# Background job: run the graph and render the PDF off the request thread.
+# Findings and documentation tokens are published as job events for the SSE stream.
+def run_documentation_job(job: dict, abap_code: str) -> dict:
+    state: ABAPDocState = {"abap_code": abap_code, "output": "", "analysis": {}}
+    output = ""
+    # Uploads are interactive: their LLM calls go ahead of pipeline and batch work
+    with priority(INTERACTIVE), trace("code_doc", job_id=job["id"], queue_seconds=round(job["started_at"] - job["submitted_at"], 4)):
+        for mode, chunk in get_graph().stream(state, stream_mode=["updates", "custom"]):
+            if mode == "custom":
+                job_queue.publish(job["id"], "token", chunk)
+                continue
+            if "analyze" in chunk:
+                # Static findings are visible on the job while the LLM is still writing
+                job["findings"] = chunk["analyze"]["analysis"]["findings"]
+                job_queue.publish(job["id"], "findings", job["findings"])
+            if "generate_doc" in chunk:
+                output = chunk["generate_doc"]["output"]
+        job_queue.publish(job["id"], "generated")
+        pdf_path = save_pdf(output) if validate_output(output) else None
+
+    if pdf_path:
+        return {
+            "output": output,
+            "pdf_filename": os.path.basename(pdf_path),
+            "message": " Documentation generated successfully.",
+        }
+    return {
+        "output": output,
+        "pdf_filename": None,
+        "message": " Documentation validation failed. Please check the ABAP code or try again.",
+    }
 
 # Flask UI 
 @development_bp.route("/", methods=["GET", "POST"])
 def development():
-    output = None
     message = None
-    pdf_filename = None
+    job_id = None
 
     if request.method == "POST":
         uploaded_file = request.files["code_file"]
         if uploaded_file and uploaded_file.filename.endswith(".txt"):
             abap_code = uploaded_file.read().decode("utf-8")
-            state: ABAPDocState = {"abap_code": abap_code, "output": ""}
-            result = graph.invoke(state)
-            output = result["output"]
+            try:
+                job_id = job_queue.submit(run_documentation_job, abap_code)
+            except QueueFullError:
+                message = " Server is busy. Please try again in a few minutes."
+                if request.accept_mimetypes.best == "application/json":
+                    return jsonify({"error": message.strip()}), 503
+                return render_template("development.html", message=message), 503
+
+            if request.accept_mimetypes.best == "application/json":
+                return jsonify({
+                    "job_id": job_id,
+                    "status_url": url_for("development.job_status", job_id=job_id),
+                    "events_url": url_for("development.job_events", job_id=job_id),
+                }), 202
+            message = " Documentation is being generated..."
+
+    return render_template("development.html", message=message, job_id=job_id)
+
+# Job status / result
+@development_bp.route("/jobs/<job_id>")
+def job_status(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    if job.get("pdf_filename"):
+        job["download_url"] = url_for("development.download_file", filename=job["pdf_filename"])
+    return jsonify(job)
+
+# Server-sent events: findings, then documentation tokens as they are generated, then the final job record.
+# A reconnecting EventSource sends Last-Event-ID and continues from the next event.
+@development_bp.route("/jobs/<job_id>/events")
+def job_events(job_id):
+    if job_queue.get(job_id) is None:
+        return jsonify({"error": "Unknown job"}), 404
+    try:
+        last_event = int(request.headers.get("Last-Event-ID", -1))
+    except ValueError:
+        # Not an id we sent: replay from the first event
+        last_event = -1
+    start = max(last_event, -1) + 1
 
-            if validate_output(output):
-                pdf_path = save_pdf(output)
-                pdf_filename = os.path.basename(pdf_path)
-                message = " Documentation generated successfully."
-            else:
-                message = " Documentation validation failed. Please check the ABAP code or try again."
+    def events():
+        for item in job_queue.events(job_id, start=start):
+            if item is None:
+                yield ": keep-alive\n\n"
+                continue
+            index, event, data = item
+            yield f"id: {index}\nevent: {event}\ndata: {json.dumps(data)}\n\n"
+        job = job_queue.get(job_id) or {}
+        if job.get("pdf_filename"):
+            job["download_url"] = url_for("development.download_file", filename=job["pdf_filename"])
+        yield f"event: done\ndata: {json.dumps(job)}\n\n"
 
-    return render_template("development.html", output=output, message=message, pdf_filename=pdf_filename)
+    return Response(stream_with_context(events()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 # location of PDF
 @development_bp.route("/download/<filename>")
 def download_file(filename):
-    save_dir = r"C:\Users\10828991\OneDrive - LTIMindtree\Desktop\langgraph task"
-    return send_from_directory(save_dir, filename, as_attachment=True)
+    return send_from_directory(PDF_SAVE_DIR, filename, as_attachment=True)
@@ -0,0 +1,100 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class QueueFullError(Exception):
+    pass
+
+
+# Background job queue so uploads don't hold a request thread for the whole generation
+class JobQueue:
+    def __init__(self, max_workers: int = 4, max_pending: int = 32, retention_seconds: float = 3600):
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="code-doc-job")
+        self._jobs: Dict[str, dict] = {}
+        # Events published while a job runs (e.g. streamed tokens), read by events()
+        self._events: Dict[str, List[Tuple[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+
+    def submit(self, fn: Callable[[dict], dict], *args) -> str:
+        """Queue fn(job, *args); its returned dict is merged into the job record."""
+        with self._lock:
+            self._prune()
+            pending = sum(1 for job in self._jobs.values() if job["status"] in ("queued", "running"))
+            if pending >= self.max_pending:
+                raise QueueFullError(f"{pending} jobs already pending")
+            job_id = uuid.uuid4().hex
+            job = {
+                "id": job_id,
+                "status": "queued",
+                "submitted_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "error": None,
+            }
+            self._jobs[job_id] = job
+            self._events[job_id] = []
+        self._executor.submit(self._run, job, fn, args)
+        return job_id
+
+    def _run(self, job: dict, fn: Callable[[dict], dict], args: tuple) -> None:
+        job["status"] = "running"
+        job["started_at"] = time.time()
+        try:
+            job.update(fn(job, *args) or {})
+            job["status"] = "done"
+        except Exception as e:
+            job["status"] = "failed"
+            job["error"] = str(e)
+        job["finished_at"] = time.time()
+        with self._changed:
+            self._changed.notify_all()
+
+    def publish(self, job_id: str, event: str, data: Any = None) -> None:
+        """Append an event for events() readers; ignored for unknown jobs."""
+        with self._changed:
+            if job_id in self._events:
+                self._events[job_id].append((event, data))
+                self._changed.notify_all()
+
+    def events(self, job_id: str, start: int = 0, heartbeat: float = 15.0) -> Iterator[Optional[Tuple[int, str, Any]]]:
+        """Yield (index, event, data) from index ``start`` until the job has finished.
+
+        Yields None after ``heartbeat`` seconds without an event, so the caller can
+        keep an idle connection open.
+        """
+        index = start
+        while True:
+            with self._changed:
+                if index >= len(self._events.get(job_id, ())) and not self._finished(job_id):
+                    self._changed.wait(timeout=heartbeat)
+                pending = self._events.get(job_id, [])[index:]
+                finished = self._finished(job_id)
+            if not pending:
+                if finished:
+                    return
+                yield None
+            for event, data in pending:
+                yield index, event, data
+                index += 1
+
+    def _finished(self, job_id: str) -> bool:
+        job = self._jobs.get(job_id)
+        return job is None or job["finished_at"] is not None
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _prune(self) -> None:
+        # Forget finished jobs after the retention window; their PDFs stay on disk
+        cutoff = time.time() - self.retention_seconds
+        for job_id in [k for k, job in self._jobs.items() if job["finished_at"] and job["finished_at"] < cutoff]:
+            del self._jobs[job_id]
+            self._events.pop(job_id, None)
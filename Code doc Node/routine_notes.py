@@ -0,0 +1,75 @@
+"""Per-routine ABAP notes, reused across uploads while the routine is unchanged.
+
+Notes are keyed by the routine fingerprint (abap_chunker.routine_fingerprint,
+which ignores comments, whitespace and case) plus a digest of the static
+findings passed to the prompt. An edited upload therefore only sends its changed
+routines to the LLM; the document is assembled from cached and fresh notes.
+The store is separate from the LLM response cache, so disabling that cache
+does not disable routine reuse.
+
+Configuration (environment variables):
+    ABAP_NOTES_DISABLED      set to 1 to document every routine again (default: off)
+    ABAP_NOTES_PATH          database file (default: <repo>/.llm_cache/abap_notes.sqlite3)
+    ABAP_NOTES_MAX_AGE_DAYS  notes not used for this long are dropped (default: 90)
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".llm_cache", "abap_notes.sqlite3")
+
+
+class RoutineNotesStore:
+    """SQLite table of routine key -> notes."""
+
+    def __init__(self, path: Optional[str] = None, max_age_seconds: Optional[float] = None):
+        self.path = path or os.getenv("ABAP_NOTES_PATH", DEFAULT_PATH)
+        self.max_age_seconds = (
+            max_age_seconds if max_age_seconds is not None else float(os.getenv("ABAP_NOTES_MAX_AGE_DAYS", "90")) * 86400
+        )
+        self._local = threading.local()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS notes (key TEXT PRIMARY KEY, notes TEXT NOT NULL, last_access REAL NOT NULL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; routines are documented concurrently
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT notes FROM notes WHERE key = ? AND last_access >= ?", (key, now - self.max_age_seconds)).fetchone()
+            if row is not None:
+                conn.execute("UPDATE notes SET last_access = ? WHERE key = ?", (now, key))
+        return row[0] if row else None
+
+    def put(self, key: str, notes: str) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO notes VALUES (?, ?, ?)", (key, notes, now))
+            conn.execute("DELETE FROM notes WHERE last_access < ?", (now - self.max_age_seconds,))
+
+
+_default_store: Optional[RoutineNotesStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_notes_store() -> Optional[RoutineNotesStore]:
+    """Process-wide notes store, or None when ABAP_NOTES_DISABLED=1."""
+    global _default_store
+    if os.getenv("ABAP_NOTES_DISABLED") == "1":
+        return None
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = RoutineNotesStore()
+        return _default_store
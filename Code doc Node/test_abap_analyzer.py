@@ -0,0 +1,139 @@
+from abap_analyzer import abap_statements, analyze_abap, duplicate_routines, routine_findings, routine_start
+
+# Line numbers in the assertions below refer to this source
+SALES_REPORT = """\
+REPORT zsales_report.
+
+TYPES ty_items TYPE SORTED TABLE OF vbap WITH NON-UNIQUE KEY vbeln.
+DATA: lt_orders TYPE STANDARD TABLE OF vbak,
+      lt_items  TYPE ty_items,
+      lt_lookup TYPE STANDARD TABLE OF kna1,
+      ls_order  TYPE vbak.
+PARAMETERS p_vkorg TYPE vkorg.
+
+START-OF-SELECTION.
+  PERFORM load_orders.
+  PERFORM process_orders.
+
+FORM load_orders.
+  SELECT * FROM vbak INTO TABLE lt_orders WHERE vkorg = p_vkorg.
+  SELECT vbeln posnr FROM vbap INTO TABLE lt_items
+    FOR ALL ENTRIES IN lt_orders WHERE vbeln = lt_orders-vbeln.
+ENDFORM.
+
+FORM process_orders.
+  LOOP AT lt_orders INTO ls_order.
+    SELECT SINGLE name1 FROM kna1 INTO @DATA(lv_name) WHERE kunnr = @ls_order-kunnr.
+    READ TABLE lt_lookup WITH KEY kunnr = ls_order-kunnr TRANSPORTING NO FIELDS.
+    LOOP AT lt_items INTO DATA(ls_item) WHERE vbeln = ls_order-vbeln.
+    ENDLOOP.
+    LOOP AT lt_lookup INTO DATA(ls_kna1).
+    ENDLOOP.
+    PERFORM log_order USING ls_order.
+  ENDLOOP.
+  UPDATE zsales_log SET processed = 'X' WHERE vkorg = p_vkorg.
+ENDFORM.
+
+FORM log_order USING is_order TYPE vbak.
+  SELECT SINGLE * FROM zsales_log INTO @DATA(ls_log) WHERE vbeln = @is_order-vbeln.
+ENDFORM.
+"""
+
+
+def rules(analysis):
+    return [(finding["rule"], finding["line"], finding["routine"]) for finding in analysis["findings"]]
+
+
+def test_statements_split_chains_and_skip_comments_and_literals():
+    source = "* header\nDATA: lv_a TYPE i, \" counter\n      lv_b TYPE string VALUE 'a. b'.\nWRITE lv_b."
+
+    statements = abap_statements(source)
+
+    assert [statement["text"] for statement in statements] == ["DATA lv_a TYPE i", "DATA lv_b TYPE string VALUE 'a. b'", "WRITE lv_b"]
+    assert [statement["line"] for statement in statements] == [2, 2, 4]
+
+
+def test_findings_on_the_sales_report_sorted_by_severity_then_line():
+    assert rules(analyze_abap(SALES_REPORT)) == [
+        ("for-all-entries-unguarded", 16, "FORM load_orders"),
+        ("select-in-loop", 22, "FORM process_orders"),
+        # PERFORM log_order inside the loop: log_order selects
+        ("select-in-loop", 28, "FORM process_orders"),
+        ("select-star", 15, "FORM load_orders"),
+        ("linear-read-in-loop", 23, "FORM process_orders"),
+        # The LOOP AT lt_items at line 24 is not reported: lt_items is a SORTED table read with WHERE
+        ("nested-loop", 26, "FORM process_orders"),
+        ("select-star", 34, "FORM log_order"),
+    ]
+
+
+def test_facts_on_the_sales_report():
+    analysis = analyze_abap(SALES_REPORT)
+
+    assert [(routine["name"], routine["line"], routine["parameters"]) for routine in analysis["routines"]] == [
+        ("load_orders", 14, []), ("process_orders", 20, []), ("log_order", 33, ["is_order"]),
+    ]
+    assert analysis["tables"] == {"read": ["KNA1", "VBAK", "VBAP", "ZSALES_LOG"], "written": ["ZSALES_LOG"]}
+    assert analysis["selection_screen"] == ["PARAMETERS p_vkorg"]
+    assert [(call["routine"], call["target"], call["in_loop"]) for call in analysis["calls"]] == [
+        ("MAIN", "FORM load_orders", 0), ("MAIN", "FORM process_orders", 0), ("FORM process_orders", "FORM log_order", 21),
+    ]
+
+
+def test_routine_helpers():
+    analysis = analyze_abap(SALES_REPORT)
+
+    assert routine_start(analysis, "FORM", "LOG_ORDER") == 33
+    assert routine_start(analysis, "MAIN", "main program") == 0
+    assert [finding["line"] for finding in routine_findings(analysis, "FORM", "load_orders")] == [16, 15]
+    assert routine_findings(analysis, "MAIN", "main program") == []
+
+
+def test_for_all_entries_guarded_by_if_or_early_return():
+    source = """\
+FORM by_if.
+  IF lt_orders IS NOT INITIAL.
+    SELECT vbeln FROM vbap INTO TABLE lt_items FOR ALL ENTRIES IN lt_orders WHERE vbeln = lt_orders-vbeln.
+  ENDIF.
+ENDFORM.
+FORM by_return.
+  IF lt_orders IS INITIAL.
+    RETURN.
+  ENDIF.
+  SELECT vbeln FROM vbap INTO TABLE lt_items FOR ALL ENTRIES IN lt_orders WHERE vbeln = lt_orders-vbeln.
+ENDFORM.
+FORM by_check.
+  CHECK lines( lt_orders ) > 0.
+  SELECT vbeln FROM vbap INTO TABLE lt_items FOR ALL ENTRIES IN lt_orders WHERE vbeln = lt_orders-vbeln.
+ENDFORM.
+FORM unguarded.
+  SELECT vbeln FROM vbap INTO TABLE lt_items FOR ALL ENTRIES IN lt_orders WHERE vbeln = lt_orders-vbeln.
+ENDFORM.
+"""
+    assert rules(analyze_abap(source)) == [("for-all-entries-unguarded", 17, "FORM unguarded")]
+
+
+def test_select_endselect_is_a_loop_and_binary_search_is_not_linear():
+    source = """\
+DATA lt_kna1 TYPE STANDARD TABLE OF kna1.
+FORM scan.
+  SELECT vbeln kunnr FROM vbak INTO ls_vbak.
+    READ TABLE lt_kna1 WITH KEY kunnr = ls_vbak-kunnr BINARY SEARCH TRANSPORTING NO FIELDS.
+    READ TABLE lt_kna1 WITH KEY name1 = ls_vbak-vbeln TRANSPORTING NO FIELDS.
+  ENDSELECT.
+  READ TABLE lt_kna1 WITH KEY kunnr = '1' TRANSPORTING NO FIELDS.
+ENDFORM.
+"""
+    assert rules(analyze_abap(source)) == [("linear-read-in-loop", 5, "FORM scan")]
+
+
+def test_duplicate_routines_ignore_names_and_comments():
+    chunks = [
+        {"kind": "MAIN", "name": "main program", "source": "REPORT z."},
+        {"kind": "FORM", "name": "total_a", "source": "FORM total_a.\n  lv_sum = lv_sum + 1.\nENDFORM."},
+        {"kind": "FORM", "name": "total_b", "source": "FORM total_b.\n* copy of total_a\n  LV_SUM = lv_sum + 1. \" same\nENDFORM."},
+        {"kind": "METHOD", "name": "total_a", "source": "METHOD total_a.\n  lv_sum = lv_sum + 1.\nENDMETHOD."},
+        {"kind": "FORM", "name": "total_c", "source": "FORM total_c.\n  lv_sum = lv_sum + 2.\nENDFORM."},
+    ]
+
+    assert duplicate_routines(chunks) == {2: 1}
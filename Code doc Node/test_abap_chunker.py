@@ -0,0 +1,114 @@
+from abap_chunker import normalize_abap, routine_fingerprint, split_abap_routines
+
+CLASS_PROGRAM = """\
+REPORT zorders.
+CLASS lcl_orders DEFINITION.
+  PUBLIC SECTION.
+    METHODS load.
+    METHODS total RETURNING VALUE(rv_total) TYPE i.
+ENDCLASS.
+CLASS lcl_orders IMPLEMENTATION.
+  METHOD load.
+*   FORM old_load. was replaced by this method
+    SELECT * FROM vbak INTO TABLE mt_orders.
+    " ENDMETHOD. in a comment does not close the method
+  ENDMETHOD.
+  METHOD total.
+    LOOP AT mt_orders INTO DATA(ls_order).
+      rv_total = rv_total + 1.
+    ENDLOOP.
+  ENDMETHOD.
+ENDCLASS.
+START-OF-SELECTION.
+  PERFORM run.
+FORM run.
+  NEW lcl_orders( )->load( ).
+ENDFORM.
+"""
+
+
+def kinds_and_names(chunks):
+    return [(chunk["kind"], chunk["name"]) for chunk in chunks]
+
+
+def test_methods_and_forms_become_chunks_and_class_frames_stay_in_main():
+    chunks = split_abap_routines(CLASS_PROGRAM)
+
+    assert kinds_and_names(chunks) == [("MAIN", "main program"), ("METHOD", "load"), ("METHOD", "total"), ("FORM", "run")]
+    main = chunks[0]["source"]
+    assert "CLASS lcl_orders DEFINITION." in main and "CLASS lcl_orders IMPLEMENTATION." in main
+    assert main.count("ENDCLASS.") == 2 and "START-OF-SELECTION." in main
+    assert "METHODS load." in main
+
+
+def test_comments_inside_a_routine_do_not_open_or_close_a_chunk():
+    load = split_abap_routines(CLASS_PROGRAM)[1]
+
+    assert load["source"].splitlines()[0] == "  METHOD load."
+    assert load["source"].splitlines()[-1] == "  ENDMETHOD."
+    assert "*   FORM old_load." in load["source"]
+    assert '" ENDMETHOD. in a comment' in load["source"]
+
+
+def test_a_routine_ends_only_at_its_own_end_statement():
+    source = """\
+METHOD outer.
+  FORM inner.
+  ENDFORM.
+  WRITE 'still outer'.
+ENDMETHOD.
+FORM after.
+ENDFORM.
+"""
+    chunks = split_abap_routines(source)
+
+    assert kinds_and_names(chunks) == [("METHOD", "outer"), ("FORM", "after")]
+    assert chunks[0]["source"].endswith("WRITE 'still outer'.\nENDMETHOD.")
+
+
+def test_unterminated_routine_is_kept():
+    chunks = split_abap_routines("FORM a.\nENDFORM.\nFORM b.\n  WRITE 'x'.")
+
+    assert kinds_and_names(chunks) == [("FORM", "a"), ("FORM", "b")]
+    assert chunks[1]["source"] == "FORM b.\n  WRITE 'x'."
+
+
+def test_comment_only_main_code_is_dropped():
+    chunks = split_abap_routines("* Program header\n\" note\n\nFORM a.\nENDFORM.")
+
+    assert kinds_and_names(chunks) == [("FORM", "a")]
+
+
+def test_large_main_code_is_split_at_blank_lines():
+    block = "\n".join(f"DATA lv_{index} TYPE i." for index in range(10))
+    source = f"{block}\n\n{block}\n\n{block}\nFORM a.\nENDFORM."
+
+    chunks = split_abap_routines(source, max_chars=200)
+
+    assert kinds_and_names(chunks) == [("MAIN", "main program")] * 3 + [("FORM", "a")]
+    assert all(chunk["source"].strip() == block for chunk in chunks[:3])
+
+
+def test_main_code_without_blank_lines_is_split_below_the_limit():
+    source = "\n".join(f"DATA lv_{index} TYPE i." for index in range(40))
+
+    chunks = split_abap_routines(source, max_chars=200)
+
+    assert len(chunks) == 4
+    assert all(len(chunk["source"]) <= 200 for chunk in chunks)
+    assert "\n".join(chunk["source"] for chunk in chunks) == source
+
+
+def test_normalize_ignores_comments_spacing_and_case_outside_literals():
+    edited = "* new header\nFORM Load.\n  SELECT   *  FROM VBAK.  \" all orders\n\n  WRITE 'Done'.\nENDFORM."
+
+    assert normalize_abap(edited) == "form load.\nselect * from vbak.\nwrite 'Done'.\nendform."
+
+
+def test_fingerprint_changes_only_with_the_code():
+    chunk = {"kind": "FORM", "name": "load", "source": "FORM load.\n  WRITE 'Done'.\nENDFORM."}
+    commented = dict(chunk, name="LOAD", source="* header\nform LOAD.\n  write 'Done'. \" ok\nENDFORM.")
+    changed = dict(chunk, source="FORM load.\n  WRITE 'done'.\nENDFORM.")
+
+    assert routine_fingerprint(commented) == routine_fingerprint(chunk)
+    assert routine_fingerprint(changed) != routine_fingerprint(chunk)
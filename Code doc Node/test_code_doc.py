@@ -0,0 +1,105 @@
+import pytest
+
+import code_doc
+import routine_notes
+from abap_analyzer import analyze_abap
+from abap_chunker import split_abap_routines
+from routine_notes import RoutineNotesStore
+
+PROGRAM = """\
+REPORT zorders.
+DATA lt_orders TYPE STANDARD TABLE OF vbak.
+START-OF-SELECTION.
+  PERFORM load.
+FORM load.
+  SELECT vbeln FROM vbak INTO TABLE lt_orders.
+ENDFORM.
+FORM load_copy.
+  SELECT vbeln FROM vbak INTO TABLE lt_orders.
+ENDFORM.
+FORM total.
+  WRITE lines( lt_orders ).
+ENDFORM.
+"""
+
+NOTES = """#### Technical Documentation
+Reads the orders.
+#### Code Review Comments
+- Fine.
+**3. Optimization Suggestions**
+- None needed."""
+
+
+@pytest.fixture
+def llm_calls(tmp_path, monkeypatch):
+    # The response cache is off: routine reuse must not depend on it
+    monkeypatch.setenv("LLM_CACHE_DISABLED", "1")
+    monkeypatch.delenv("ABAP_NOTES_DISABLED", raising=False)
+    monkeypatch.setenv("ABAP_NOTES_PATH", str(tmp_path / "notes.sqlite3"))
+    monkeypatch.setattr(routine_notes, "_default_store", None)
+    prompts = []
+    monkeypatch.setattr(code_doc, "invoke_llm", lambda prompt: prompts.append(prompt) or NOTES)
+    return prompts
+
+
+def test_notes_store_round_trip_and_expiry(tmp_path):
+    store = RoutineNotesStore(str(tmp_path / "notes.sqlite3"))
+    store.put("key", "notes")
+
+    assert store.get("key") == "notes"
+    assert store.get("other") is None
+    assert RoutineNotesStore(str(tmp_path / "notes.sqlite3"), max_age_seconds=-1).get("key") is None
+
+
+def test_unchanged_routines_are_reused_across_uploads(llm_calls):
+    def document(source):
+        analysis = analyze_abap(source)
+        chunks = split_abap_routines(source)
+        return [code_doc.document_chunk(chunk, analysis) for chunk in chunks], chunks
+
+    document(PROGRAM)
+    assert len(llm_calls) == 4
+
+    # A comment and a changed FORM total: only that routine goes to the LLM
+    notes, chunks = document("* Orders report\n" + PROGRAM.replace("WRITE lines( lt_orders ).", "WRITE / lines( lt_orders )."))
+    assert len(llm_calls) == 5
+    assert "FORM total" in llm_calls[-1]
+    assert [bool(chunk.get("reused")) for chunk in chunks] == [True, True, True, False]
+    assert notes == [NOTES] * 4
+
+
+def test_notes_disabled(llm_calls, monkeypatch):
+    monkeypatch.setenv("ABAP_NOTES_DISABLED", "1")
+    source = "FORM a.\nENDFORM."
+    chunk = split_abap_routines(source)[0]
+
+    code_doc.document_chunk(chunk, analyze_abap(source))
+    code_doc.document_chunk(chunk, analyze_abap(source))
+
+    assert len(llm_calls) == 2
+
+
+def test_split_notes_by_heading_style():
+    assert code_doc.split_notes(NOTES) == {
+        "Technical Documentation": "Reads the orders.",
+        "Code Review Comments": "- Fine.",
+        "Optimization Suggestions": "- None needed.",
+    }
+    assert code_doc.split_notes("Just a description.")["Technical Documentation"] == "Just a description."
+
+
+def test_document_is_assembled_from_routine_notes_in_source_order():
+    chunks = split_abap_routines(PROGRAM)
+    duplicates = {2: 1}
+    notes = [NOTES.replace("orders", chunk["name"]) if index not in duplicates else "" for index, chunk in enumerate(chunks)]
+
+    document = code_doc.assemble_document(chunks, notes, duplicates, analyze_abap(PROGRAM))
+
+    assert code_doc.validate_output(document)
+    technical, review, optimization = document.split("\n## ")
+    assert technical.startswith("## 1. Technical Documentation\n\nProgram facts from static analysis:")
+    assert "- Database tables read: VBAK" in technical
+    assert technical.index("### Main program\nReads the main program.") < technical.index("### FORM load\nReads the load.")
+    assert "### FORM load_copy\nSame code as FORM load." in technical
+    assert review.startswith("2. Code Review Comments") and "FORM load_copy" not in review
+    assert optimization.startswith("3. Optimization Suggestions") and "### FORM total\n- None needed." in optimization
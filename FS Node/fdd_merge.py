@@ -0,0 +1,148 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+
+# The 12 sections the FDD prompts ask for, in document order
+FDD_SECTIONS = [
+    "Introduction",
+    "Business Requirements",
+    "Functional Requirements",
+    "Assumptions and Constraints",
+    "In-Scope / Out-of-Scope",
+    "Process Flow Description",
+    "Use Case Scenarios",
+    "Screen Layout / Field Mapping",
+    "Security and Roles",
+    "Error Handling",
+    "Dependencies",
+    "Appendix",
+]
+
+# Markdown headings, and bold-only lines such as "**3. Functional Requirements**"
+HEADING = re.compile(r"^\s{0,3}(?:(#{1,6})\s+(.*?)\s*#*|\*\*(.+?)\*\*:?)\s*$")
+# Bold-only lines rank below every Markdown heading level
+BOLD_LEVEL = 7
+# "1.2 Scope", "5.1. In-Scope": numbered sub-headings of a section
+SUBSECTION_NUMBER = re.compile(r"^[\s*_`]*\d+\.\d+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "be", "by", "for", "from", "in", "is", "it", "of", "on", "or",
+    "that", "the", "this", "to", "will", "with",
+}
+MIN_SECTION_CHARS = 20
+# Fewer recognized sections than this and the draft is merged by the LLM as a whole
+MIN_PARSED_SECTIONS = 6
+
+
+def _canonical(title: str) -> str:
+    text = re.sub(r"\(.*?\)", " ", title.lower().replace("&", " and "))
+    text = re.sub(r"^[\s\d.)]*", "", re.sub(r"[*_`:]", "", text))
+    return " ".join(re.sub(r"[^a-z]+", " ", text).split())
+
+
+SECTION_KEYS = {_canonical(name): name for name in FDD_SECTIONS}
+SECTION_KEYS.update({
+    "in scope out of scope": "In-Scope / Out-of-Scope",
+    "process flow": "Process Flow Description",
+    "use cases": "Use Case Scenarios",
+    "screen layout": "Screen Layout / Field Mapping",
+    "field mapping": "Screen Layout / Field Mapping",
+    "security and authorizations": "Security and Roles",
+})
+
+
+def section_name(title: str) -> str:
+    """Map a heading to its FDD section name, or "" if it is not one of them."""
+    return SECTION_KEYS.get(_canonical(title), "")
+
+
+def _section_headings(lines: List[str]) -> Dict[int, Tuple[int, str]]:
+    """{line index: (heading level, section name)} for the headings that name one of the 12 sections."""
+    headings = {}
+    for index, line in enumerate(lines):
+        match = HEADING.match(line)
+        if not match:
+            continue
+        title = match.group(2) or match.group(3)
+        if SUBSECTION_NUMBER.match(title):
+            continue
+        name = section_name(title)
+        if name:
+            headings[index] = (len(match.group(1)) if match.group(1) else BOLD_LEVEL, name)
+    return headings
+
+
+def parse_sections(markdown: str) -> Tuple[str, Dict[str, Tuple[str, str]]]:
+    """Split an FDD into (preamble, {section: (heading line, body)}).
+
+    Sections start at the shallowest heading level that names one of the 12
+    sections. Other headings, including numbered ("1.2 Scope") or deeper ones
+    that happen to share a section's name, stay in the body of the section
+    they appear in.
+    """
+    lines = markdown.splitlines()
+    headings = _section_headings(lines)
+    section_level = min((level for level, _ in headings.values()), default=0)
+    preamble: List[str] = []
+    sections: Dict[str, Tuple[str, List[str]]] = {}
+    current = None
+    for index, line in enumerate(lines):
+        level, name = headings.get(index, (0, ""))
+        if name and level == section_level and name not in sections:
+            current = name
+            sections[current] = (line, [])
+        elif current:
+            sections[current][1].append(line)
+        else:
+            preamble.append(line)
+    return "\n".join(preamble).strip(), {name: (heading, "\n".join(body).strip()) for name, (heading, body) in sections.items()}
+
+
+def _words(text: str) -> Counter:
+    return Counter(word for word in re.findall(r"[a-z0-9]+", text.lower()) if word not in STOPWORDS)
+
+
+def similarity(first: str, second: str) -> float:
+    """Cosine similarity of the two texts' word counts (0 = unrelated, 1 = same wording)."""
+    a, b = _words(first), _words(second)
+    dot = sum(count * b[word] for word, count in a.items())
+    norm = math.sqrt(sum(c * c for c in a.values())) * math.sqrt(sum(c * c for c in b.values()))
+    return dot / norm if norm else 0.0
+
+
+def completeness(body: str) -> int:
+    """Significant words plus list items and table rows; 0 for a missing or empty section."""
+    if len(body.strip()) < MIN_SECTION_CHARS:
+        return 0
+    structure = sum(1 for line in body.splitlines() if re.match(r"^\s*(?:[-*+|]|\d+[.)])\s*", line))
+    return sum(_words(body).values()) + structure
+
+
+def plan_merge(
+    primary: Dict[str, Tuple[str, str]], secondary: Dict[str, Tuple[str, str]], min_similarity: float
+) -> Dict[str, str]:
+    """Decide each section: "primary", "secondary", "llm" (conflict or one-sided) or "" (in neither draft).
+
+    Sections that agree are taken from the more complete draft; ties go to the primary.
+    """
+    plan = {}
+    for name in FDD_SECTIONS:
+        first = primary[name][1] if name in primary else ""
+        second = secondary[name][1] if name in secondary else ""
+        first_score, second_score = completeness(first), completeness(second)
+        if not first_score and not second_score:
+            plan[name] = ""
+        elif not first_score or not second_score or similarity(first, second) < min_similarity:
+            plan[name] = "llm"
+        else:
+            plan[name] = "primary" if first_score >= second_score else "secondary"
+    return plan
+
+
+def assemble(preamble: str, bodies: Dict[str, str]) -> str:
+    """Join the chosen section bodies in FDD order under uniform "## N. Section" headings."""
+    parts = [preamble] if preamble else []
+    for number, name in enumerate(FDD_SECTIONS, start=1):
+        if name in bodies:
+            parts.append(f"## {number}. {name}\n{bodies[name]}".strip())
+    return "\n\n".join(parts) + "\n"
@@ -0,0 +1,106 @@
+from fdd_merge import FDD_SECTIONS, assemble, parse_sections, plan_merge
+
+# Bodies long enough to count as present (MIN_SECTION_CHARS) and similar across the two drafts
+BODIES = {
+    "Introduction": "This document describes the migration of customer master data from Oracle to Redshift.",
+    "Business Requirements": "Finance needs daily reconciled customer balances available for reporting.",
+    "Functional Requirements": "- Extract customer records nightly\n- Load them into the Redshift staging schema",
+    "Assumptions and Constraints": "Source extracts are delivered by 02:00; the load window is four hours.",
+    "In-Scope / Out-of-Scope": "In scope: customer master and balances. Out of scope: vendor master data.",
+    "Process Flow Description": "The extract job writes files, the loader stages them, then reconciliation runs.",
+    "Use Case Scenarios": "A finance analyst opens the daily balance report after the nightly load.",
+    "Screen Layout / Field Mapping": "| Source | Target |\n| KUNNR | customer_id |\n| NAME1 | customer_name |",
+    "Security and Roles": "Only the finance reporting role may read the reconciled balance tables.",
+    "Error Handling": "Rejected records are written to an error table and reported to the data steward.",
+    "Dependencies": "The Redshift cluster and the nightly Oracle extract schedule must be available.",
+    "Appendix": "Glossary of SAP and Redshift terms used in this document, with their definitions.",
+}
+
+
+def markdown_draft() -> str:
+    """A draft as GPT-4o writes it: numbered "##" sections with "###" sub-headings."""
+    parts = ["# Functional Design Document (FDD)\nProject: Oracle to Redshift migration"]
+    for number, name in enumerate(FDD_SECTIONS, start=1):
+        parts.append(f"## {number}. {name}\n{BODIES[name]}")
+    draft = "\n\n".join(parts)
+    # Sub-headings that share a name with another section
+    draft = draft.replace(
+        BODIES["Introduction"],
+        f"### 1.1 Purpose\n{BODIES['Introduction']}\n\n### 1.2 Scope\nThe customer master data of the EU company codes.",
+    )
+    draft = draft.replace(
+        BODIES["Assumptions and Constraints"],
+        f"{BODIES['Assumptions and Constraints']}\n\n### Dependencies\nThe extract depends on the Oracle batch calendar.",
+    )
+    return draft.replace(
+        BODIES["Security and Roles"],
+        f"### Security\n{BODIES['Security and Roles']}\n\n### Roles\nFinance reporting, data steward.",
+    )
+
+
+def bold_draft() -> str:
+    """A draft as Gemini writes it: bold section titles, no Markdown headings."""
+    return "\n\n".join(f"**{number}. {name}**\n{BODIES[name]}" for number, name in enumerate(FDD_SECTIONS, start=1))
+
+
+def test_parse_sections_keeps_sub_headings_in_their_section():
+    preamble, sections = parse_sections(markdown_draft())
+
+    assert preamble.startswith("# Functional Design Document (FDD)")
+    assert list(sections) == FDD_SECTIONS
+    assert sections["Introduction"][1].endswith("The customer master data of the EU company codes.")
+    assert sections["In-Scope / Out-of-Scope"] == ("## 5. In-Scope / Out-of-Scope", BODIES["In-Scope / Out-of-Scope"])
+    assert "### Dependencies" in sections["Assumptions and Constraints"][1]
+    assert sections["Dependencies"][1] == BODIES["Dependencies"]
+    assert sections["Security and Roles"][1].startswith("### Security\n")
+
+
+def test_parse_sections_bold_titles():
+    preamble, sections = parse_sections(bold_draft())
+
+    assert preamble == ""
+    assert {name: body for name, (_, body) in sections.items()} == BODIES
+
+
+def test_parse_sections_bold_lines_below_markdown_headings_are_not_sections():
+    draft = markdown_draft().replace("### 1.2 Scope", "**Dependencies**")
+
+    _, sections = parse_sections(draft)
+
+    assert "**Dependencies**" in sections["Introduction"][1]
+    assert sections["Dependencies"][1] == BODIES["Dependencies"]
+
+
+def test_plan_merge_picks_agreeing_sections_locally():
+    _, primary = parse_sections(markdown_draft())
+    _, secondary = parse_sections(bold_draft())
+
+    plan = plan_merge(primary, secondary, 0.3)
+
+    # Every section is in both drafts with similar wording; the sub-headings make the primary more complete
+    assert set(plan.values()) <= {"primary", "secondary"}
+    assert plan["Introduction"] == "primary"
+    assert plan["In-Scope / Out-of-Scope"] == "primary"
+
+
+def test_plan_merge_sends_conflicting_and_one_sided_sections_to_the_llm():
+    _, primary = parse_sections(markdown_draft())
+    secondary_draft = bold_draft().replace(BODIES["Error Handling"], "Failed loads page the on-call engineer through PagerDuty immediately.")
+    _, secondary = parse_sections(secondary_draft.replace(f"**12. Appendix**\n{BODIES['Appendix']}", ""))
+
+    plan = plan_merge(primary, secondary, 0.3)
+
+    assert plan["Error Handling"] == "llm"
+    assert plan["Appendix"] == "llm"
+    assert plan["Dependencies"] in {"primary", "secondary"}
+
+
+def test_assemble_renumbers_sections_in_fdd_order():
+    _, sections = parse_sections(bold_draft())
+    bodies = {name: body for name, (_, body) in sections.items()}
+
+    document = assemble("# FDD", {name: bodies[name] for name in reversed(FDD_SECTIONS)})
+
+    _, reparsed = parse_sections(document)
+    assert list(reparsed) == FDD_SECTIONS
+    assert reparsed["In-Scope / Out-of-Scope"][0] == "## 5. In-Scope / Out-of-Scope"
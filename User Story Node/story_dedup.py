@@ -0,0 +1,59 @@
+import os
+from typing import List, Tuple
+
+from sdlc_common.minhash import jaccard, near_duplicates, shingles
+
+# Jaccard similarity of word 3-shingles (title, description, acceptance criteria) at which stories are merged.
+# Stories written from one template that differ only in an object name (e.g. two tables) stay around 0.7.
+DEDUP_THRESHOLD = float(os.getenv("USER_STORY_DEDUP_THRESHOLD", "0.8"))
+
+TEXT_FIELDS = ("title", "description", "acceptance_criteria")
+DETAIL_FIELDS = ("description", "acceptance_criteria", "definition_of_done", "definition_of_ready")
+
+
+def _joined(value) -> str:
+    return " ".join(str(item) for item in value) if isinstance(value, list) else str(value or "")
+
+
+def story_text(story: dict) -> str:
+    """The text two stories are compared on; DoD / DoR are left out because they are mostly boilerplate."""
+    return " ".join(_joined(story.get(field)) for field in TEXT_FIELDS)
+
+
+def detail(story: dict) -> int:
+    """Characters of description, criteria, DoD and DoR; the most detailed story represents its cluster."""
+    return sum(len(_joined(story.get(field))) for field in DETAIL_FIELDS)
+
+
+def dedup_stories(stories: List[dict], threshold: float = DEDUP_THRESHOLD) -> Tuple[List[dict], List[dict]]:
+    """Keep one story per cluster of near-duplicates; returns (kept stories, merge records).
+
+    The kept story takes the place of the cluster's first story, so the order
+    still follows the work units. Each merge record names the kept story and
+    the stories folded into it, with their similarity to it.
+    """
+    texts = [story_text(story) for story in stories]
+    clusters = near_duplicates(texts, threshold)
+    kept, merged = [], []
+    for cluster in clusters:
+        # Most detailed first; ties go to the earlier story
+        keep = max(cluster, key=lambda index: (detail(stories[index]), -index))
+        kept.append(stories[keep])
+        if len(cluster) == 1:
+            continue
+        kept_shingles = shingles(texts[keep])
+        merged.append({
+            "kept": stories[keep].get("id", ""),
+            "title": stories[keep].get("title", ""),
+            "merged": [
+                {
+                    "id": stories[index].get("id", ""),
+                    "work_unit": stories[index].get("work_unit", ""),
+                    "title": stories[index].get("title", ""),
+                    # Can be below the threshold when the two are linked through another story in the cluster
+                    "similarity": round(jaccard(kept_shingles, shingles(texts[index])), 3),
+                }
+                for index in cluster if index != keep
+            ],
+        })
+    return kept, merged
@@ -0,0 +1,139 @@
+import csv
+import json
+import logging
+import os
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# (story field, column header) in export order
+COLUMNS = [
+    ("title", "Title"),
+    ("description", "Description"),
+    ("acceptance_criteria", "Acceptance Criteria"),
+    ("definition_of_done", "Definition of Done"),
+    ("definition_of_ready", "Definition of Ready"),
+]
+FORMATS = ("pdf", "csv", "jsonl", "xlsx")
+
+# Stories per PDF table; a page break only ever re-lays out the current table
+PDF_TABLE_ROWS = int(os.getenv("USER_STORY_PDF_TABLE_ROWS", "200"))
+XLSX_COLUMN_WIDTHS = [40, 60, 60, 40, 40]
+XLSX_MAX_CELL_CHARS = 32767
+
+
+def story_row(story: dict, separator: str = "; ") -> List[str]:
+    """The story's column values; list fields (criteria, DoD, DoR) are joined with separator."""
+    row = []
+    for field, _ in COLUMNS:
+        value = story.get(field, "")
+        if isinstance(value, list):
+            value = separator.join(str(item) for item in value)
+        row.append(str(value))
+    return row
+
+
+class StoryExporter:
+    """Writes user stories to PDF, CSV, JSONL and XLSX in a single pass.
+
+    Each story is converted once and appended to every open file, so no format
+    needs its own copy of the whole dataset. The PDF is laid out as a sequence of
+    splittable tables of PDF_TABLE_ROWS stories and built on close().
+    """
+
+    def __init__(self, paths: Dict[str, str], title: str = "User Stories"):
+        """paths maps each format to write ("pdf", "csv", "jsonl", "xlsx") to its file."""
+        self.paths = dict(paths)
+        self.count = 0
+        self._files = []
+        self._csv = self._jsonl = self._xlsx = self._sheet = None
+        self._pdf_elements: Optional[list] = None
+        self._pdf_rows: List[List[str]] = []
+
+        if "csv" in paths:
+            # utf-8-sig so that Excel detects the encoding; the Jira CSV importer accepts it too
+            f = open(paths["csv"], "w", encoding="utf-8-sig", newline="")
+            self._files.append(f)
+            self._csv = csv.writer(f)
+            self._csv.writerow([header for _, header in COLUMNS])
+        if "jsonl" in paths:
+            self._jsonl = open(paths["jsonl"], "w", encoding="utf-8")
+            self._files.append(self._jsonl)
+        if "xlsx" in paths:
+            try:
+                from openpyxl import Workbook
+            except ImportError:
+                logger.warning("openpyxl is not installed; skipping the XLSX export")
+                del self.paths["xlsx"]
+            else:
+                # Write-only mode streams rows to disk instead of keeping every cell in memory
+                self._xlsx = Workbook(write_only=True)
+                self._sheet = self._xlsx.create_sheet("User Stories")
+                for letter, width in zip("ABCDE", XLSX_COLUMN_WIDTHS):
+                    self._sheet.column_dimensions[letter].width = width
+                self._sheet.append([header for _, header in COLUMNS])
+        if "pdf" in paths:
+            from reportlab.platypus import Paragraph, Spacer
+            from sdlc_common.pdf_render import get_styles
+
+            self._pdf_elements = [Paragraph(title, get_styles()["Title"]), Spacer(1, 12)]
+
+    def write(self, story: dict) -> None:
+        self.count += 1
+        if self._jsonl is not None:
+            self._jsonl.write(json.dumps(story, ensure_ascii=False) + "\n")
+        if self._csv is not None or self._sheet is not None:
+            # Line breaks keep list items on separate lines in Jira / ALM imports
+            row = story_row(story, "\n")
+            if self._csv is not None:
+                self._csv.writerow(row)
+            if self._sheet is not None:
+                self._sheet.append([value[:XLSX_MAX_CELL_CHARS] for value in row])
+        if self._pdf_elements is not None:
+            self._pdf_rows.append(story_row(story))
+            if len(self._pdf_rows) >= PDF_TABLE_ROWS:
+                self._flush_pdf_table()
+
+    def write_all(self, stories: Iterable[dict]) -> "StoryExporter":
+        for story in stories:
+            self.write(story)
+        return self
+
+    def _flush_pdf_table(self) -> None:
+        from sdlc_common.pdf_render import table_flowable
+
+        header = [header for _, header in COLUMNS]
+        self._pdf_elements.append(table_flowable([header] + self._pdf_rows, markup=False))
+        self._pdf_rows = []
+
+    def close(self) -> Dict[str, str]:
+        """Finish every file and return {format: path}."""
+        for f in self._files:
+            f.close()
+        self._files = []
+        if self._xlsx is not None:
+            self._xlsx.save(self.paths["xlsx"])
+            self._xlsx = self._sheet = None
+        if self._pdf_elements is not None:
+            from sdlc_common.pdf_render import build_pdf
+
+            if not self.count:
+                self._pdf_rows.append(["No user stories generated.", "", "", "", ""])
+            if self._pdf_rows:
+                self._flush_pdf_table()
+            build_pdf(self.paths["pdf"], self._pdf_elements)
+            self._pdf_elements = None
+        return self.paths
+
+    def __enter__(self) -> "StoryExporter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def export_stories(stories: Iterable[dict], paths: Dict[str, str]) -> Dict[str, str]:
+    """Write stories to every format in paths ({format: file}); returns the files written."""
+    with StoryExporter(paths) as exporter:
+        exporter.write_all(stories)
+    return exporter.paths
@@ -0,0 +1,82 @@
+from typing import Dict, List, Tuple
+
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator
+
+LIST_FIELDS = ("acceptance_criteria", "definition_of_done", "definition_of_ready")
+
+
+class UserStory(BaseModel):
+    """One user story as the export and import tooling expect it."""
+
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    title: str = Field(min_length=1, description="Short, unique story title")
+    description: str = Field(min_length=1, description="'As a <role>, I want <goal> so that <benefit>'")
+    acceptance_criteria: List[str] = Field(min_length=1, description="Testable acceptance criteria")
+    definition_of_done: List[str] = Field(min_length=1, description="Definition of Done (DoD) items")
+    definition_of_ready: List[str] = Field(min_length=1, description="Definition of Ready (DoR) items")
+
+    @field_validator(*LIST_FIELDS, mode="before")
+    @classmethod
+    def _split_text(cls, value):
+        # Models sometimes return a single string (one item per line) instead of a list
+        if isinstance(value, str):
+            return [line.strip(" -*•") for line in value.splitlines() if line.strip(" -*•")]
+        return value
+
+    @field_validator(*LIST_FIELDS)
+    @classmethod
+    def _drop_empty(cls, value: List[str]) -> List[str]:
+        items = [item.strip() for item in value if item.strip()]
+        if not items:
+            raise ValueError("must contain at least one non-empty item")
+        return items
+
+
+class UserStoryList(BaseModel):
+    user_stories: List[UserStory]
+
+
+def _strict(schema: dict, definitions: dict) -> dict:
+    # OpenAI strict mode: every property required, no extra properties, no length keywords
+    if "$ref" in schema:
+        return _strict(definitions[schema["$ref"].split("/")[-1]], definitions)
+    schema = {key: value for key, value in schema.items() if key not in ("$defs", "title", "minLength", "minItems", "default")}
+    if schema.get("type") == "object":
+        schema["properties"] = {name: _strict(prop, definitions) for name, prop in schema["properties"].items()}
+        schema["required"] = list(schema["properties"])
+        schema["additionalProperties"] = False
+    if schema.get("type") == "array":
+        schema["items"] = _strict(schema["items"], definitions)
+    return schema
+
+
+def response_format() -> dict:
+    """OpenAI ``response_format`` that constrains the reply to {"user_stories": [UserStory, ...]}."""
+    schema = UserStoryList.model_json_schema()
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": "user_stories", "strict": True, "schema": _strict(schema, schema.get("$defs", {}))},
+    }
+
+
+def validate_story(story: dict) -> Tuple[dict, List[str]]:
+    """(normalized story, []) if the story is valid, otherwise (story, [problems]).
+
+    Extra keys such as "id" and "work_unit" are kept.
+    """
+    try:
+        return {**story, **UserStory.model_validate(story).model_dump()}, []
+    except ValidationError as e:
+        return story, [f"{'.'.join(str(part) for part in error['loc']) or 'story'}: {error['msg']}" for error in e.errors()]
+
+
+def validate_stories(stories: List[dict]) -> Tuple[List[dict], Dict[int, List[str]]]:
+    """Validate every story; returns (stories, {index: problems}) for the ones that failed."""
+    checked, problems = [], {}
+    for index, story in enumerate(stories):
+        story, errors = validate_story(story)
+        checked.append(story)
+        if errors:
+            problems[index] = errors
+    return checked, problems
@@ -0,0 +1,63 @@
+import json
+from typing import List
+
+
+class StoryStreamParser:
+    """Incrementally extract story objects from a streamed JSON array.
+
+    Text is fed chunk by chunk; every JSON object that sits directly inside an
+    array (``[{...}, {...}]`` or ``{"user_stories": [{...}]}``) is returned as soon
+    as its closing brace arrives. Markdown fences and prose around the JSON are
+    ignored, and a truncated tail never affects the objects completed before it.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._stack = []          # open containers: "{" or "["
+        self._in_string = False
+        self._escape = False
+        self._start = None        # buffer offset of the object being captured
+        self._depth = 0           # stack depth at which the captured object opened
+
+    def feed(self, text: str) -> List[dict]:
+        self._buffer += text
+        stories = []
+        buffer = self._buffer
+        for i in range(self._pos, len(buffer)):
+            ch = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+            if ch == '"' and self._stack:
+                self._in_string = True
+            elif ch in "{[":
+                if ch == "{" and self._start is None and self._stack and self._stack[-1] == "[":
+                    self._start = i
+                    self._depth = len(self._stack)
+                self._stack.append(ch)
+            elif ch in "}]" and self._stack:
+                self._stack.pop()
+                if ch == "}" and self._start is not None and len(self._stack) == self._depth:
+                    try:
+                        story = json.loads(buffer[self._start:i + 1])
+                        if isinstance(story, dict):
+                            stories.append(story)
+                    except json.JSONDecodeError:
+                        pass
+                    self._start = None
+        self._pos = len(buffer)
+        if self._start is None:
+            # Completed objects are no longer needed; keep memory bounded for long streams
+            self._buffer, self._pos = "", 0
+        return stories
+
+
+def parse_stories(text: str) -> List[dict]:
+    """Parse every complete story object in text, tolerating fences and truncation."""
+    return StoryStreamParser().feed(text)
@@ -0,0 +1,48 @@
+import re
+from typing import Dict, List
+
+# "1. Migrate ... 2.Convert ... AWS Redshift.3. Implement ..." -> separate items
+NUMBERED_ITEM = re.compile(r"(?:^|(?<=[\s.]))\d{1,2}\.(?=\s|[A-Z])\s*")
+
+# BRD fields that are broken into independent work units
+UNIT_FIELDS = (("objectives", "OBJ", "Project objective"), ("in_scope", "SCOPE", "In-scope item"))
+
+
+def split_numbered(text: str) -> List[str]:
+    items = [item.strip(" .;") for item in NUMBERED_ITEM.split(text or "")]
+    return [item for item in items if item]
+
+
+def split_work_units(brd_data: Dict[str, str]) -> List[Dict[str, str]]:
+    """Split the BRD into work units (each objective / in-scope item), in document order.
+
+    Falls back to a single unit covering the whole BRD when neither field is present.
+    """
+    units = []
+    for field, prefix, label in UNIT_FIELDS:
+        for number, item in enumerate(split_numbered(brd_data.get(field, "")), start=1):
+            units.append({"id": f"{prefix}-{number}", "label": label, "text": item})
+    if not units:
+        units.append({"id": "BRD", "label": "Entire BRD", "text": "All requirements in the BRD"})
+    return units
+
+
+def normalize_title(title: str) -> str:
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", str(title).lower()).split())
+
+
+def merge_unit_stories(units: List[Dict[str, str]], results: List[List[dict]]) -> List[dict]:
+    """Merge per-unit stories in unit order, drop duplicate titles and assign stable IDs.
+
+    The result depends only on unit order and per-unit output, not on which unit
+    finished first, so IDs are reproducible across runs.
+    """
+    merged, seen = [], set()
+    for unit, stories in zip(units, results):
+        for story in stories:
+            key = normalize_title(story.get("title", ""))
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            merged.append({"id": f"US-{len(merged) + 1:03d}", "work_unit": unit["id"], **story})
+    return merged
@@ -0,0 +1,86 @@
+import json
+
+from story_stream import StoryStreamParser, parse_stories
+
+STORIES = [
+    {
+        "title": "Migrate customer tables",
+        "description": 'As a data engineer I want the "KNA1" table in Redshift, so that reports run on AWS.',
+        "acceptance_criteria": ["Row counts match {source} and target", "Escaped \\ backslashes survive"],
+        "definition_of_done": "Reconciled [daily]",
+        "definition_of_ready": "Source extract agreed",
+    },
+    {
+        "title": "Migrate stored procedures",
+        "description": "Closing braces } and brackets ] inside strings are not structure.",
+        "acceptance_criteria": [],
+        "definition_of_done": "Procedures rewritten",
+        "definition_of_ready": "Inventory complete",
+    },
+]
+
+
+def feed_in_chunks(text, size):
+    parser = StoryStreamParser()
+    stories = []
+    for start in range(0, len(text), size):
+        stories.extend(parser.feed(text[start:start + size]))
+    return stories
+
+
+def test_parse_stories_from_a_plain_array():
+    assert parse_stories(json.dumps(STORIES)) == STORIES
+
+
+def test_parse_stories_from_a_wrapped_array_in_a_markdown_fence():
+    text = "Here are the stories:\n```json\n" + json.dumps({"user_stories": STORIES}, indent=2) + "\n```\nLet me know."
+
+    assert parse_stories(text) == STORIES
+
+
+def test_chunks_split_anywhere_give_the_same_stories():
+    text = json.dumps({"user_stories": STORIES}, indent=2)
+
+    # Size 1 splits every escape sequence and every token in two
+    for size in (1, 2, 3, 7, 64):
+        assert feed_in_chunks(text, size) == STORIES
+
+
+def test_each_story_is_returned_when_its_closing_brace_arrives():
+    text = json.dumps(STORIES)
+    end_of_first = text.index("}, {") + 1
+    parser = StoryStreamParser()
+
+    assert parser.feed(text[:end_of_first - 1]) == []
+    assert parser.feed(text[end_of_first - 1:end_of_first]) == [STORIES[0]]
+    assert parser.feed(text[end_of_first:]) == [STORIES[1]]
+
+
+def test_escaped_quote_at_a_chunk_boundary_does_not_end_the_string():
+    story = {"title": 'Say "hi" and } then', "description": "x"}
+    text = json.dumps([story])
+    split = text.index('\\"') + 1
+
+    parser = StoryStreamParser()
+    assert parser.feed(text[:split]) == []
+    assert parser.feed(text[split:]) == [story]
+
+
+def test_truncated_stream_keeps_the_completed_stories():
+    text = json.dumps(STORIES)
+    truncated = text[:text.index("Closing braces")]
+
+    assert parse_stories(truncated) == STORIES[:1]
+    assert feed_in_chunks(truncated, 5) == STORIES[:1]
+
+
+def test_nested_objects_are_part_of_their_story():
+    story = {"title": "Audit", "details": {"owner": "IT", "steps": [{"step": 1}]}}
+
+    assert parse_stories(json.dumps([story])) == [story]
+
+
+def test_invalid_object_is_skipped():
+    text = '[{"title": "broken", "points": 3 4}, {"title": "fine"}]'
+
+    assert parse_stories(text) == [{"title": "fine"}]
@@ -1,30 +1,65 @@
 import os
+import sys
 import asyncio
 import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Union
 from typing_extensions import TypedDict
 from dotenv import load_dotenv
-from langgraph.graph import StateGraph, START, END
 from langchain_core.messages import HumanMessage, SystemMessage
-from gen_ai_hub.proxy.langchain.init_models import init_llm
-from langchain.prompts import ChatPromptTemplate
-from langchain.schema.output_parser import StrOutputParser
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib import colors
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+
+# Shared helpers live at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sdlc_common.blobs import get_blob_store, is_ref
+from sdlc_common.llm_cache import lazy_llm
+from sdlc_common.prompts import brd_context, cacheable
+from sdlc_common.semantic_cache import canonical_fields, get_semantic_cache
+from sdlc_common.tracing import map_ordered, trace, traced_node
+from story_stream import StoryStreamParser, parse_stories
+from story_schema import response_format, validate_stories, validate_story
+from story_units import split_work_units, merge_unit_stories
+from story_dedup import dedup_stories
+from story_export import export_stories
+
+logger = logging.getLogger(__name__)
+
+# Stories are appended here (inside output_dir) as they are parsed from the stream
+STORY_STREAM_PATH = "user_stories_output.jsonl"
+PDF_PATH = "user_stories_output.pdf"
+# Which stories were folded into which, written by the dedup node
+DUPLICATES_PATH = "user_stories_duplicates.json"
+
+# Final (validated) stories in every export format; USER_STORY_EXPORTS picks which are written
+EXPORT_FILES = {"pdf": PDF_PATH, "csv": "user_stories.csv", "jsonl": "user_stories.jsonl", "xlsx": "user_stories.xlsx"}
+EXPORT_FORMATS = [fmt.strip() for fmt in os.getenv("USER_STORY_EXPORTS", "pdf,csv,jsonl,xlsx").split(",") if fmt.strip() in EXPORT_FILES]
+
+# Number of work units generated at the same time
+MAX_CONCURRENCY = int(os.getenv("USER_STORY_MAX_CONCURRENCY", "4"))
+# Generate the first unit on its own, so the provider has cached the BRD prefix before the other units are sent.
+# Costs one unit of latency; without it the first MAX_CONCURRENCY units all pay for the full prompt.
+PRIME_PROMPT_CACHE = os.getenv("USER_STORY_PRIME_PROMPT_CACHE", "1") == "1"
 
 # Define State
 class UserStoryState(TypedDict):
-    generated_output: str
-    validated_output: str
+    generated_output: str  # blob reference (sdlc_common.blobs) of the generated stories as JSON
+    validated_output: str  # blob reference of the validated stories; the same blob when validation changed nothing
     pdf_path: str
+    user_stories: str  # blob reference of the current stories as JSON (generated, then deduplicated, then validated)
+    brd_data: Union[dict, str]  # optional: BRD fields to use instead of the hardcoded brd_data, or a blob reference to them as JSON
+    brd_document: str  # optional: the BRD as sent to the LLM (default: brd_data as JSON), or a blob reference to it
+    output_dir: str  # optional: directory for the story stream, PDF and exports
+    exports: dict  # written by the output node: {format: path}
+    duplicates: list  # written by the dedup node: [{"kept": id, "title": ..., "merged": [...]}]
 
-# Load environment variables
-load_dotenv()
-
-# Initialize LLM
-llm = init_llm("gpt-4o")
-llm = llm.bind(max_completion_tokens=None)  # To avoid max_completion_tokens error
+# Initialize LLM lazily; environment variables are loaded from .env right before first use
+llm = lazy_llm("gpt-4o", setup=load_dotenv, bind={"max_completion_tokens": None})  # To avoid max_completion_tokens error
+# Replies are constrained to {"user_stories": [UserStory, ...]} by the provider (structured output)
+structured_llm = llm.bind(response_format=response_format())
 
 # Hardcoded BRD Details
 brd_data = {
@@ -42,172 +77,186 @@ brd_data = {
     "roles": "1. Project Manager: Oversee project execution, manage timelines, and coordinate between teams. 2. Data Engineers: Responsible for the actual migration of tables and stored procedures, and for setting up data integrations.3. IT Security Team: Ensure compliance with data security requirements. 4. QA Analysts: Conduct thorough testing to ensure the functionality and performance of the new system meet project standards. 5.Stakeholders (Marketing Teams, Dealers): Participate in UAT to validate the system meets their needs."
 }
 
-# Generate User Stories Node
-def generate_user_stories_node(state: UserStoryState) -> UserStoryState:
-    brd_content = json.dumps(brd_data)
-
+# Stories for one work unit (objective / in-scope item), streamed to the sink as they complete
+def generate_unit_stories(unit: dict, brd_content: str, sink, sink_lock: threading.Lock) -> list:
+    # The BRD comes first and is the same for every unit, so the provider can serve it from its prompt cache
     prompt = ChatPromptTemplate.from_messages([
-        SystemMessage(content="You are an SAP Functional Consultant. Generate a list of user stories, by breaking down the tasks into multiple smallest possible levels, from the provided BRD content for an SAP project. Each user story must include: Title, Description, Acceptance Criteria, Definition of Done (DoD), and Definition of Ready (DoR). Format each user story clearly and use SAP-specific terminology. Output the user stories in a JSON format where each story is an object with fields 'title', 'description', 'acceptance_criteria', 'definition_of_done', and 'definition_of_ready'."),
-        HumanMessage(content=f"BRD Content: {brd_content}")
+        brd_context(brd_content),
+        SystemMessage(content="You are an SAP Functional Consultant. Generate a list of user stories, by breaking down the tasks into multiple smallest possible levels, from the provided BRD content for an SAP project. Each user story must include: Title, Description, Acceptance Criteria, Definition of Done (DoD), and Definition of Ready (DoR). Format each user story clearly and use SAP-specific terminology. Return the stories in the user_stories array of the response schema."),
+        HumanMessage(content=f"Only generate user stories for this work item ({unit['label']}): {unit['text']}")
     ])
-    chain = prompt | llm | StrOutputParser()
-    generated_output = chain.invoke({"input_data": brd_content})
+    chain = prompt | structured_llm | StrOutputParser()
 
-    return {
-        "generated_output": generated_output,
-        "validated_output": state["validated_output"],  # Preserve existing value
-        "pdf_path": state["pdf_path"]  # Preserve existing value
-    }
+    parser = StoryStreamParser()
+    stories = []
+    for chunk in chain.stream({}):
+        for story in parser.feed(chunk):
+            story, problems = validate_story(story)
+            stories.append(story)
+            status = f"invalid: {'; '.join(problems)}" if problems else "complete"
+            with sink_lock:
+                sink.write(json.dumps({"work_unit": unit["id"], **story}) + "\n")
+                sink.flush()
+                logger.info(f"[{unit['id']}] Story {len(stories)}: {story.get('title', '')} ({status})")
+    return stories
+
+# Nodes return only the keys they change; story lists as JSON go to the blob store and state keeps references
+
+def load_stories(state: UserStoryState) -> list:
+    return get_blob_store().get_json(state["user_stories"]) if state.get("user_stories") else []
+
+def state_brd(state: UserStoryState) -> dict:
+    brd = state.get("brd_data") or brd_data
+    return get_blob_store().get_json(brd) if is_ref(brd) else brd
+
+# Generate User Stories Node
+def generate_user_stories_node(state: UserStoryState) -> dict:
+    brd = state_brd(state)
+    brd_content = get_blob_store().resolve(state.get("brd_document") or "") or json.dumps(brd)
+    stream_path = os.path.join(state.get("output_dir") or "", STORY_STREAM_PATH)
+
+    # The same BRD up to wording, numbering and whitespace: reuse its validated stories
+    cache = get_semantic_cache()
+    match = cache.lookup("user_stories", canonical_fields(brd)) if cache else None
+    if match:
+        user_stories = json.loads(match["artifact"])
+        with open(stream_path, "w", encoding="utf-8") as sink:
+            sink.writelines(json.dumps(story) + "\n" for story in user_stories)
+        logger.info(f"Reusing {len(user_stories)} cached user stories (similarity {match['similarity']:.2f})")
+        ref = get_blob_store().put_json(user_stories)
+        return {"generated_output": ref, "user_stories": ref}
 
-# Validate User Stories Node
-def validate_user_stories_node(state: UserStoryState) -> UserStoryState:
-    # Add error handling for missing key
-    if "generated_output" not in state:
-        raise KeyError("State is missing 'generated_output'. Ensure the 'generate' node ran successfully.")
-    generated_output = state["generated_output"]
+    # One generation per work unit, run concurrently instead of one long response
+    units = split_work_units(brd)
+    sink_lock = threading.Lock()
+    with open(stream_path, "w", encoding="utf-8") as sink, \
+            ThreadPoolExecutor(max_workers=MAX_CONCURRENCY) as executor:
+        def generate(unit):
+            return generate_unit_stories(unit, brd_content, sink, sink_lock)
 
+        if PRIME_PROMPT_CACHE and len(units) > MAX_CONCURRENCY and cacheable(brd_content):
+            results = map_ordered(executor, generate, units[:1]) + map_ordered(executor, generate, units[1:])
+        else:
+            results = map_ordered(executor, generate, units)
+
+    user_stories = merge_unit_stories(units, results)
+    logger.info(f"Generated {len(user_stories)} unique user stories from {len(units)} work units")
+
+    ref = get_blob_store().put_json(user_stories)
+    return {"generated_output": ref, "user_stories": ref}
+
+# Dedup Node: near-duplicate stories are merged locally before validation and export
+def dedup_user_stories_node(state: UserStoryState) -> dict:
+    generated = load_stories(state)
+    user_stories, duplicates = dedup_stories(generated)
+    with open(os.path.join(state.get("output_dir") or "", DUPLICATES_PATH), "w", encoding="utf-8") as f:
+        json.dump(duplicates, f, indent=2)
+    for record in duplicates:
+        logger.info(f"Merged {', '.join(item['id'] for item in record['merged'])} into {record['kept']}: {record['title']}")
+    logger.info(f"Kept {len(user_stories)} of {len(generated)} user stories after near-duplicate detection")
+
+    return {"user_stories": get_blob_store().put_json(user_stories), "duplicates": duplicates}
+
+# Targeted repair: only the stories that failed validation go back to the LLM
+def repair_stories(stories: list, problems: dict) -> dict:
+    failing = [
+        {"story": {key: value for key, value in stories[index].items() if key not in ("id", "work_unit")}, "problems": problems[index]}
+        for index in sorted(problems)
+    ]
     prompt = ChatPromptTemplate.from_messages([
-        SystemMessage(content="Validate the following user stories for completeness and SAP standards. Ensure each user story includes: Title, Description, Acceptance Criteria, Definition of Done (DoD), and Definition of Ready (DoR). If incomplete, add missing fields with appropriate values for an SAP project. Return the validated user stories in the same JSON format."),
-        HumanMessage(content=f"User Stories: {generated_output}")
+        SystemMessage(content="You are an SAP Functional Consultant. The user stories below failed schema validation. For each story, fix only the listed problems: keep its title and intent, and fill missing or empty fields with appropriate values for an SAP project. Return exactly one corrected story per input story, in the same order."),
+        HumanMessage(content=json.dumps(failing, indent=2))
     ])
-    chain = prompt | llm | StrOutputParser()
-    validated_output = chain.invoke({"generated_output": generated_output})
+    chain = prompt | structured_llm | StrOutputParser()
+    repaired = parse_stories(chain.invoke({}))
 
-    return {
-        "generated_output": state["generated_output"],
-        "validated_output": validated_output,
-        "pdf_path": state["pdf_path"]  # Preserve existing value
-    }
+    fixed = {}
+    for position, index in enumerate(sorted(problems)):
+        if position < len(repaired):
+            # Keep the ID and work unit assigned during generation
+            story, errors = validate_story({**stories[index], **repaired[position]})
+            if not errors:
+                fixed[index] = story
+    return fixed
 
-# Output PDF Node
-def output_pdf_node(state: UserStoryState) -> UserStoryState:
-    validated_output = state["validated_output"]
-
-    # Debug: Print the entire state and validated_output to inspect
-    print("State in output_pdf_node:")
-    print(state)
-    print("Validated Output (JSON string):")
-    print(validated_output)
-
-    # Clean the validated_output by removing Markdown code block markers
-    cleaned_output = validated_output.strip()
-    if cleaned_output.startswith("```json"):
-        # Remove the ```json at the start and ``` at the end
-        cleaned_output = cleaned_output[len("```json"):].strip()
-        if cleaned_output.endswith("```"):
-            cleaned_output = cleaned_output[:-len("```")].strip()
-
-    # Debug: Print the cleaned output
-    print("Cleaned Validated Output (after removing Markdown):")
-    print(cleaned_output)
-
-    # Parse JSON output
-    try:
-        user_stories = json.loads(cleaned_output)
-    except json.JSONDecodeError as e:
-        print(f"Error parsing cleaned JSON: {e}")
-        user_stories = []
-
-    # Debug: Print the parsed user stories
-    print("Parsed User Stories:")
-    print(user_stories)
-
-    # Create PDF
-    pdf_path = "user_stories_output.pdf"
-    doc = SimpleDocTemplate(pdf_path, pagesize=letter)
-    styles = getSampleStyleSheet()
-    elements = []
-
-    # Add Title
-    elements.append(Paragraph("User Stories", styles["Title"]))
-    elements.append(Paragraph("<br/>", styles["Normal"]))  # Spacer
-
-    # Prepare table data
-    table_data = [["Title", "Description", "Acceptance Criteria", "Definition of Done", "Definition of Ready"]]
-    if isinstance(user_stories, list) and user_stories:
-        for story in user_stories:
-            # Handle acceptance_criteria and other fields that might be lists
-            acceptance_criteria = story.get("acceptance_criteria", "")
-            if isinstance(acceptance_criteria, list):
-                acceptance_criteria = "; ".join(acceptance_criteria)
-            definition_of_done = story.get("definition_of_done", "")
-            if isinstance(definition_of_done, list):
-                definition_of_done = "; ".join(definition_of_done)
-            definition_of_ready = story.get("definition_of_ready", "")
-            if isinstance(definition_of_ready, list):
-                definition_of_ready = "; ".join(definition_of_ready)
-
-            table_data.append([
-                Paragraph(story.get("title", ""), styles["Normal"]),
-                Paragraph(story.get("description", ""), styles["Normal"]),
-                Paragraph(acceptance_criteria, styles["Normal"]),
-                Paragraph(definition_of_done, styles["Normal"]),
-                Paragraph(definition_of_ready, styles["Normal"])
-            ])
+# Validate User Stories Node: local schema validation instead of a second full LLM pass
+def validate_user_stories_node(state: UserStoryState) -> dict:
+    user_stories, problems = validate_stories(load_stories(state))
+    if problems:
+        logger.info(f"Repairing {len(problems)} of {len(user_stories)} user stories that failed validation")
+        for index, story in repair_stories(user_stories, problems).items():
+            user_stories[index] = story
+            del problems[index]
+        for index, errors in problems.items():
+            # Kept rather than dropped so no story is lost; the exports show what is missing
+            logger.warning(f"Story {user_stories[index].get('id', index + 1)} is still invalid: {'; '.join(errors)}")
     else:
-        print("Warning: No user stories available to display in the table.")
-        table_data.append(["No user stories generated.", "", "", "", ""])  # Add a placeholder row
-
-    # Debug: Print the table data
-    print("Table Data for PDF:")
-    print(table_data)
-
-    # Create table
-    table = Table(table_data)
-    table.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
-        ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-        ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-        ("FONTSIZE", (0, 0), (-1, -1), 10),
-        ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
-        ("BACKGROUND", (0, 1), (-1, -1), colors.beige),
-        ("GRID", (0, 0), (-1, -1), 1, colors.black),
-        ("VALIGN", (0, 0), (-1, -1), "TOP"),
-        ("WORDWRAP", (0, 0), (-1, -1), "CJK")
-    ]))
-    elements.append(table)
-
-    # Build PDF
-    doc.build(elements)
-    print(f"PDF generated at: {pdf_path}")
-
-    return {
-        "generated_output": state["generated_output"],
-        "validated_output": state["validated_output"],
-        "pdf_path": pdf_path
-    }
+        logger.info(f"All {len(user_stories)} user stories passed validation; no LLM repair needed")
+    cache = get_semantic_cache()
+    if cache:
+        cache.store("user_stories", canonical_fields(state_brd(state)), json.dumps(user_stories))
 
-# Define Graph
-graph = StateGraph(UserStoryState)
+    ref = get_blob_store().put_json(user_stories)
+    return {"validated_output": ref, "user_stories": ref}
 
-# Add Nodes
-graph.add_node("generate", generate_user_stories_node)
-graph.add_node("validate", validate_user_stories_node)
-graph.add_node("output", output_pdf_node)
+# Output Node: PDF for review plus CSV / JSONL / XLSX for the Jira / ALM import tooling
+def output_pdf_node(state: UserStoryState) -> dict:
+    user_stories = load_stories(state)
+    if not user_stories:
+        logger.warning("No user stories available to display in the table.")
 
-# Add Edges
-graph.add_edge(START, "generate")
-graph.add_edge("generate", "validate")
-graph.add_edge("validate", "output")
-graph.add_edge("output", END)
+    output_dir = state.get("output_dir") or ""
+    paths = {fmt: os.path.join(output_dir, EXPORT_FILES[fmt]) for fmt in EXPORT_FORMATS}
+    exports = export_stories(user_stories, paths)
+    for fmt, path in exports.items():
+        logger.info(f"{fmt.upper()} generated at: {path}")
 
-# Compile Graph
-app = graph.compile()
+    return {"pdf_path": exports.get("pdf", ""), "exports": exports}
 
-# Run Graph
-initial_state = {
-    "generated_output": "",
-    "validated_output": "",
-    "pdf_path": ""
-}
+# Define Graph (compiled on first use; importing langgraph is slow)
+@lru_cache(maxsize=None)
+def get_graph():
+    from langgraph.graph import StateGraph, START, END
+
+    graph = StateGraph(UserStoryState)
+
+    # Add Nodes
+    graph.add_node("generate", traced_node("generate", generate_user_stories_node))
+    graph.add_node("dedup", traced_node("dedup", dedup_user_stories_node))
+    graph.add_node("validate", traced_node("validate", validate_user_stories_node))
+    graph.add_node("output", traced_node("output", output_pdf_node))
+
+    # Add Edges
+    graph.add_edge(START, "generate")
+    graph.add_edge("generate", "dedup")
+    graph.add_edge("dedup", "validate")
+    graph.add_edge("validate", "output")
+    graph.add_edge("output", END)
+
+    # Compile Graph
+    return graph.compile()
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    # Run Graph
+    initial_state = {
+        "generated_output": "",
+        "validated_output": "",
+        "pdf_path": "",
+        "user_stories": ""
+    }
+
+    with trace("user_stories"):
+        result = get_graph().invoke(initial_state, config={"recursion_limit": 50})
 
-result = app.invoke(initial_state, config={"recursion_limit": 50})
+    # Final Output
+    print("Generated User Stories (Raw):")
+    print(get_blob_store().get(result["generated_output"]))
+    print("\nValidated User Stories:")
+    print(get_blob_store().get(result["validated_output"]))
+    print("\nPDF Path:")
+    print(result["pdf_path"])
+    return result
 
-# Final Output
-print("Generated User Stories (Raw):")
-print(result["generated_output"])
-print("\nValidated User Stories:")
-print(result["validated_output"])
-print("\nPDF Path:")
-print(result["pdf_path"])
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Render time and peak memory of sdlc_common.pdf_render for 10-, 100- and 1,000-page documents.
+
+Compares the shared renderer with the previous per-line Paragraph approach. Each
+measurement runs in a fresh process; peak MB is the growth of its max RSS.
+
+    python benchmarks/bench_pdf_render.py [--pages 10 100 1000] [--skip-legacy]
+"""
+import argparse
+import multiprocessing
+import os
+import re
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Paragraph, SimpleDocTemplate
+
+from sdlc_common.pdf_render import markdown_to_flowables
+
+# Roughly three sections fit on a letter page
+SECTIONS_PER_PAGE = 3
+SECTION = """## {n}. Functional Requirement {n}
+
+The system **must** migrate table `ZSALES_{n}` from Oracle to Redshift and keep row counts, checksums and
+audit columns aligned with the source. Data is validated after every load and *discrepancies* are reported.
+
+- Extract data incrementally using the change timestamp
+- Transform currency fields to the reporting currency
+- Load into the staging schema, then merge into the target
+
+| Field | Source | Target | Rule |
+|-------|--------|--------|------|
+| MATNR | MARA-MATNR | material_id | trim leading zeros |
+| WERKS | MARC-WERKS | plant_id | direct |
+| MENGE | EKPO-MENGE | quantity | convert to base unit |
+
+```
+SELECT matnr, werks, menge FROM ekpo WHERE aedat >= :last_run
+```
+
+Acceptance: all records reconcile, no duplicates and the load completes within the nightly window.
+"""
+
+
+def synthetic_markdown(pages: int) -> str:
+    return "# Benchmark Document\n\n" + "\n".join(SECTION.format(n=n) for n in range(1, pages * SECTIONS_PER_PAGE + 1))
+
+
+def render_shared(markdown: str, path: str) -> int:
+    doc = SimpleDocTemplate(path, pagesize=letter)
+    doc.build(markdown_to_flowables(markdown, title="Benchmark"))
+    return doc.page
+
+
+def render_legacy(markdown: str, path: str) -> int:
+    # Previous approach: new stylesheet per call, markdown stripped, one Paragraph per line
+    styles = getSampleStyleSheet()
+    doc = SimpleDocTemplate(path, pagesize=letter)
+    elements = [Paragraph("Benchmark", styles["Title"])]
+    text = re.sub(r"#{1,6}\s*", "", re.sub(r"\*\*(.*?)\*\*", r"\1", markdown))
+    for line in text.split("\n"):
+        if line.strip():
+            elements.append(Paragraph(line.strip().replace("<", "&lt;").replace(">", "&gt;"), styles["Normal"]))
+    doc.build(elements)
+    return doc.page
+
+
+def _run(name: str, pages: int) -> dict:
+    # Runs in a fresh process so ru_maxrss reflects this render only
+    render = RENDERERS[name]
+    markdown = synthetic_markdown(pages)
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.pdf")
+        start = time.perf_counter()
+        rendered = render(markdown, path)
+        elapsed = time.perf_counter() - start
+        size = os.path.getsize(path)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {"pages": rendered, "seconds": elapsed, "peak_mb": (peak - baseline) / 1024, "pdf_kb": size / 1024}
+
+
+def measure(name: str, pages: int) -> dict:
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(_run, (name, pages))
+
+
+RENDERERS = {"shared": render_shared, "legacy": render_legacy}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--skip-legacy", action="store_true", help="Only measure the shared renderer")
+    args = parser.parse_args()
+
+    renderers = ["shared"] + ([] if args.skip_legacy else ["legacy"])
+    print(f"{'renderer':<10}{'target':>8}{'pages':>8}{'seconds':>10}{'peak MB':>10}{'PDF KB':>10}")
+    for pages in args.pages:
+        for name in renderers:
+            result = measure(name, pages)
+            print(f"{name:<10}{pages:>8}{result['pages']:>8}{result['seconds']:>10.2f}{result['peak_mb']:>10.1f}{result['pdf_kb']:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""End-to-end latency, throughput and memory of the BRD, User Story, FDD and Code doc graphs.
+
+Runs offline: every LLM call is answered by sdlc_common.fake_llm with the latency,
+token throughput and error rate given on the command line, and the response cache
+is disabled. Each pipeline is measured in a fresh process. The process does one
+warm-up run, then --runs sequential runs (p50/p95 latency), then the same number
+of runs --concurrency at a time (throughput). Peak MB is the growth of the
+process max RSS.
+
+    python benchmarks/bench_pipelines.py [--pipelines brd user-stories fdd code-doc] [--runs 5]
+        [--concurrency 4] [--latency 0.2] [--tokens-per-second 2000] [--error-rate 0] [--rate-limits JSON]
+        [--tail-rate 0] [--tail-latency 10] [--hedge all]
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from sdlc_common.nodes import load_node
+
+SAMPLE_BRD_INPUT = os.path.join(REPO_ROOT, "BRD Node", "SampleBatchInput.jsonl")
+
+ABAP_ROUTINE = """
+*&---------------------------------------------------------------------*
+*& Form LOAD_{n}
+*&---------------------------------------------------------------------*
+FORM load_{n} USING pv_werks TYPE werks_d CHANGING ct_data TYPE ty_t_data.
+  DATA: lt_ekpo TYPE STANDARD TABLE OF ekpo,
+        ls_ekpo TYPE ekpo.
+  SELECT * FROM ekpo INTO TABLE lt_ekpo WHERE werks = pv_werks AND loekz = space.
+  LOOP AT lt_ekpo INTO ls_ekpo.
+    SELECT SINGLE maktx FROM makt INTO @DATA(lv_maktx) WHERE matnr = @ls_ekpo-matnr AND spras = @sy-langu.
+    APPEND VALUE #( ebeln = ls_ekpo-ebeln ebelp = ls_ekpo-ebelp matnr = ls_ekpo-matnr maktx = lv_maktx menge = ls_ekpo-menge ) TO ct_data.
+  ENDLOOP.
+  SORT ct_data BY ebeln ebelp.
+  DELETE ADJACENT DUPLICATES FROM ct_data COMPARING ebeln ebelp.
+ENDFORM.
+"""
+
+
+def synthetic_abap(routines: int) -> str:
+    header = "REPORT zbench_load.\n\nTYPES ty_t_data TYPE STANDARD TABLE OF zbench_s WITH DEFAULT KEY.\nDATA gt_data TYPE ty_t_data.\nPARAMETERS p_werks TYPE werks_d.\n\nSTART-OF-SELECTION.\n"
+    calls = "".join(f"  PERFORM load_{n} USING p_werks CHANGING gt_data.\n" for n in range(1, routines + 1))
+    return header + calls + "".join(ABAP_ROUTINE.format(n=n) for n in range(1, routines + 1))
+
+
+def brd_runner(workdir: str, options: dict):
+    brd = load_node("brd")
+    with open(SAMPLE_BRD_INPUT, encoding="utf-8") as f:
+        record = json.loads(f.readline())
+    graph = brd.get_graph()
+
+    def run(i: int) -> bool:
+        user_input = brd.BRDInput(**{**record, "project_name": f"{record['project_name']} {i}"})
+        state = brd.BRDState(user_input=user_input, draft_brd="", validated_brd="", error="", output_dir=workdir, output_path="")
+        return not graph.invoke(state).get("error")
+    return run
+
+
+def user_story_runner(workdir: str, options: dict):
+    node = load_node("user-stories")
+    graph = node.get_graph()
+
+    def run(i: int) -> bool:
+        state = {"generated_output": "", "validated_output": "", "pdf_path": "", "user_stories": ""}
+        return bool(node.load_stories(graph.invoke(state, config={"recursion_limit": 50})))
+    return run
+
+
+def fdd_runner(workdir: str, options: dict):
+    node = load_node("fdd")
+    with open(SAMPLE_BRD_INPUT, encoding="utf-8") as f:
+        brd = f.readline()
+    graph = node.get_graph()
+
+    def run(i: int) -> bool:
+        state = {"brd": brd, "fdd_gpt4o": "", "fdd_gemini": "", "fdd_final": "", "pdf_path": ""}
+        return bool(graph.invoke(state)["pdf_path"])
+    return run
+
+
+def code_doc_runner(workdir: str, options: dict):
+    load_node("code-doc")
+    import code_doc
+
+    source = synthetic_abap(options["abap_routines"])
+
+    def run(i: int) -> bool:
+        now = time.time()
+        job = {"id": f"bench-{i}", "submitted_at": now, "started_at": now}
+        return bool(code_doc.run_documentation_job(job, source)["pdf_filename"])
+    return run
+
+
+RUNNERS = {"brd": brd_runner, "user-stories": user_story_runner, "fdd": fdd_runner, "code-doc": code_doc_runner}
+
+
+def _run(name: str, runs: int, concurrency: int, options: dict) -> dict:
+    # Runs in a fresh process so ru_maxrss reflects this pipeline only
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    with tempfile.TemporaryDirectory() as workdir, open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        # Story streams, PDFs and BRDs are written to the working / save directory
+        os.chdir(workdir)
+        os.environ["ABAP_DOC_SAVE_DIR"] = workdir
+        run = RUNNERS[name](workdir, options)
+
+        def safe_run(i: int) -> bool:
+            try:
+                return run(i)
+            except Exception:
+                return False
+
+        safe_run(0)  # warm-up: imports, graph compilation, PDF styles
+        latencies, failures = [], 0
+        for i in range(1, runs + 1):
+            start = time.perf_counter()
+            failures += not safe_run(i)
+            latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            concurrent_ok = list(executor.map(safe_run, range(runs + 1, 2 * runs + 1)))
+        wall = time.perf_counter() - start
+        os.chdir(REPO_ROOT)
+
+    ordered = sorted(latencies)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "p50_seconds": statistics.median(ordered),
+        "p95_seconds": ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))],
+        "failures": failures + concurrent_ok.count(False),
+        "runs_per_second": runs / wall,
+        "peak_mb": (peak - baseline) / 1024,
+    }
+
+
+def measure(name: str, runs: int, concurrency: int, options: dict) -> dict:
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(_run, (name, runs, concurrency, options))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pipelines", nargs="+", choices=list(RUNNERS), default=list(RUNNERS))
+    parser.add_argument("--runs", type=int, default=5, help="Sequential runs, and again concurrent runs, per pipeline")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake LLM seconds to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=2000, help="Fake LLM generation speed")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of fake LLM calls that fail")
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="Fraction of fake LLM calls that are slow")
+    parser.add_argument("--tail-latency", type=float, default=10.0, help="Extra seconds for a slow fake LLM call")
+    parser.add_argument("--hedge", default="", help="LLM_HEDGE value, e.g. all (default: no hedging)")
+    parser.add_argument("--rate-limits", default="{}", help='Scheduler budgets, e.g. \'{"gpt-4o": {"rpm": 300, "tpm": 150000}}\'')
+    parser.add_argument("--abap-routines", type=int, default=40, help="FORM routines in the synthetic ABAP program")
+    args = parser.parse_args()
+
+    # Inherited by the spawned measurement processes
+    os.environ.update({
+        "SDLC_FAKE_LLM": "1",
+        "FAKE_LLM_LATENCY": str(args.latency),
+        "FAKE_LLM_TOKENS_PER_SECOND": str(args.tokens_per_second),
+        "FAKE_LLM_ERROR_RATE": str(args.error_rate),
+        "FAKE_LLM_TAIL_RATE": str(args.tail_rate),
+        "FAKE_LLM_TAIL_LATENCY": str(args.tail_latency),
+        "LLM_HEDGE": args.hedge,
+        "LLM_RATE_LIMITS": args.rate_limits,
+        "LLM_CACHE_DISABLED": "1",
+        "SDLC_TRACE_DISABLED": "1",
+        "PYTHONWARNINGS": "ignore",
+    })
+    options = {"abap_routines": args.abap_routines}
+
+    print(f"{'pipeline':<14}{'runs':>6}{'failed':>8}{'p50 s':>9}{'p95 s':>9}{'conc':>6}{'runs/s':>9}{'peak MB':>9}")
+    for name in args.pipelines:
+        result = measure(name, args.runs, args.concurrency, options)
+        print(
+            f"{name:<14}{args.runs:>6}{result['failures']:>8}{result['p50_seconds']:>9.2f}{result['p95_seconds']:>9.2f}"
+            f"{args.concurrency:>6}{result['runs_per_second']:>9.2f}{result['peak_mb']:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
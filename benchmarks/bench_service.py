@@ -0,0 +1,161 @@
+"""Load test for the async service (sdlc_service.py) against the fake LLM.
+
+Starts ``python sdlc.py service`` in a subprocess with every LLM call answered
+by sdlc_common.fake_llm (latency and token throughput from the command line,
+response and semantic caches disabled). It then sends --requests requests per
+endpoint, --concurrency at a time, from one asyncio client and reports
+throughput and p50/p95 latency. With --disconnects N, N more requests per
+endpoint are abandoned after --disconnect-after seconds. The
+sdlc_service_requests_total counter then shows whether the server cancelled them.
+
+    python benchmarks/bench_service.py [--endpoints brd user-stories fdd code-doc] [--requests 32]
+        [--concurrency 16] [--latency 0.2] [--tokens-per-second 2000] [--disconnects 0] [--port 8765]
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "benchmarks"))
+
+from bench_pipelines import SAMPLE_BRD_INPUT, synthetic_abap
+
+
+def payloads(abap_routines: int) -> dict:
+    with open(SAMPLE_BRD_INPUT, encoding="utf-8") as f:
+        record = json.loads(f.readline())
+    return {
+        "brd": lambda i: {**record, "project_name": f"{record['project_name']} {i}"},
+        "user-stories": lambda i: {},
+        "fdd": lambda i: {"brd": json.dumps(record)},
+        "code-doc": lambda i: {"abap_code": synthetic_abap(abap_routines)},
+    }
+
+
+async def load(client: httpx.AsyncClient, endpoint: str, payload, requests: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, statuses = [], []
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client.post(f"/{endpoint}", json=payload(i))
+                statuses.append(response.status_code)
+            except httpx.HTTPError:
+                statuses.append(0)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    wall = time.perf_counter() - start
+    ordered = sorted(latencies)
+    return {
+        "ok": statuses.count(200),
+        "failed": len(statuses) - statuses.count(200),
+        "requests_per_second": requests / wall,
+        "p50_seconds": statistics.median(ordered),
+        "p95_seconds": ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))],
+    }
+
+
+async def abandon(client: httpx.AsyncClient, endpoint: str, payload, count: int, after: float) -> None:
+    async def one(i: int) -> None:
+        # The timeout closes the connection, which the server sees as a disconnect
+        with_timeout = httpx.Timeout(after)
+        try:
+            await client.post(f"/{endpoint}", json=payload(i), timeout=with_timeout)
+        except httpx.TimeoutException:
+            pass
+
+    await asyncio.gather(*(one(i) for i in range(count)))
+
+
+def cancelled_counts(metrics: str) -> dict:
+    pattern = re.compile(r'^sdlc_service_requests_total\{endpoint="([^"]+)",status="cancelled"\} (\S+)$', re.M)
+    return {endpoint: int(float(value)) for endpoint, value in pattern.findall(metrics)}
+
+
+async def run(args) -> None:
+    bodies = payloads(args.abap_routines)
+    limits = httpx.Limits(max_connections=args.concurrency + args.disconnects, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", timeout=600, limits=limits) as client:
+        for _ in range(600):
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    break
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+        else:
+            raise RuntimeError("service did not start")
+
+        print(f"{'endpoint':<14}{'requests':>9}{'failed':>8}{'conc':>6}{'req/s':>9}{'p50 s':>9}{'p95 s':>9}")
+        for endpoint in args.endpoints:
+            # Warm-up: PDF styles, first model client, node caches
+            await client.post(f"/{endpoint}", json=bodies[endpoint](0))
+            result = await load(client, endpoint, bodies[endpoint], args.requests, args.concurrency)
+            print(
+                f"{endpoint:<14}{args.requests:>9}{result['failed']:>8}{args.concurrency:>6}"
+                f"{result['requests_per_second']:>9.2f}{result['p50_seconds']:>9.2f}{result['p95_seconds']:>9.2f}"
+            )
+
+        if args.disconnects:
+            for endpoint in args.endpoints:
+                await abandon(client, endpoint, bodies[endpoint], args.disconnects, args.disconnect_after)
+            # Give the server a moment to notice the closed connections
+            await asyncio.sleep(1)
+            cancelled = cancelled_counts((await client.get("/metrics")).text)
+            for endpoint in args.endpoints:
+                print(f"{endpoint:<14}abandoned {args.disconnects}, cancelled by the server: {cancelled.get(endpoint, 0)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--endpoints", nargs="+", choices=["brd", "user-stories", "fdd", "code-doc"], default=["brd", "user-stories", "fdd", "code-doc"])
+    parser.add_argument("--requests", type=int, default=32, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight at a time")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake LLM seconds to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=2000, help="Fake LLM generation speed")
+    parser.add_argument("--abap-routines", type=int, default=10, help="FORM routines in the synthetic ABAP program")
+    parser.add_argument("--disconnects", type=int, default=0, help="Requests per endpoint abandoned by the client")
+    parser.add_argument("--disconnect-after", type=float, default=0.3, help="Seconds before an abandoned request is dropped")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        env = {
+            **os.environ,
+            "SDLC_FAKE_LLM": "1",
+            "FAKE_LLM_LATENCY": str(args.latency),
+            "FAKE_LLM_TOKENS_PER_SECOND": str(args.tokens_per_second),
+            "LLM_CACHE_DISABLED": "1",
+            "SEMANTIC_CACHE": "0",
+            "SDLC_TRACE_DISABLED": "1",
+            "SDLC_SERVICE_OUTPUT_ROOT": workdir,
+            "ABAP_DOC_SAVE_DIR": workdir,
+            "USER_STORY_EXPORTS": "jsonl",
+            "PYTHONWARNINGS": "ignore",
+        }
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(REPO_ROOT, "sdlc.py"), "service", "--port", str(args.port)],
+            cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            asyncio.run(run(args))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
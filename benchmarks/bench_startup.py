@@ -0,0 +1,51 @@
+"""Cold-start time of every node: fresh interpreter, import the node, exit.
+
+Nothing is generated and no LLM client is created; with lazy imports this is the
+cost a caller pays to reuse a node's functions or to start the Flask app.
+
+    python benchmarks/bench_startup.py [--repeat 5]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from sdlc_common.nodes import NODES
+
+SNIPPETS = {
+    "python (baseline)": "pass",
+    **{f"import {name}": f"from sdlc_common.nodes import load_node; load_node({name!r})" for name in NODES},
+    "code-doc first request": (
+        "from sdlc_common.nodes import load_node; "
+        "load_node('code-doc').app.test_client().get('/')"
+    ),
+}
+
+
+def cold_start(snippet: str) -> float:
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", snippet],
+        cwd=REPO_ROOT, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'target':<28}{'median s':>10}{'min s':>10}")
+    for label, snippet in SNIPPETS.items():
+        times = [cold_start(snippet) for _ in range(args.repeat)]
+        print(f"{label:<28}{statistics.median(times):>10.3f}{min(times):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""State size, memory and prompt tokens of one end-to-end pipeline run with a large BRD.
+
+Runs ``sdlc_pipeline`` (BRD -> user stories + FDD -> manifest, with the SQLite
+checkpointer) offline against sdlc_common.fake_llm, in a fresh process, with
+provider prefix caching simulated (FAKE_LLM_PROMPT_CACHE=1). The BRD grows with
+--in-scope-items and --stakeholders. It reports:
+
+    checkpoint KB   size of the checkpoint database after the run
+    state KB        final pipeline state as serialized by the checkpointer
+    peak MB         peak Python heap during the run (tracemalloc)
+    prompt tok      prompt tokens sent, and how many the provider could serve from its prompt cache
+    cost            estimated USD, with cached prompt tokens at LLM_CACHED_PROMPT_PRICE_FACTOR
+
+    python benchmarks/bench_state.py [--in-scope-items 40] [--stakeholders 10]
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+SAMPLE_BRD_INPUT = os.path.join(REPO_ROOT, "BRD Node", "SampleBatchInput.jsonl")
+
+
+def project(in_scope_items: int, stakeholders: int) -> dict:
+    with open(SAMPLE_BRD_INPUT, encoding="utf-8") as f:
+        record = json.loads(f.readline())
+    return {
+        **record,
+        "in_scope_items": [f"Migrate and reconcile subject area {n} ({record['scope_area']})" for n in range(1, in_scope_items + 1)],
+        "stakeholders": [f"Business team {n}" for n in range(1, stakeholders + 1)],
+    }
+
+
+def counters(registry) -> dict:
+    """LLM calls, tokens by type and cost so far, summed over models and labels."""
+    totals = {}
+    for (name, labels), value in list(registry._values.items()):
+        labels = dict(labels)
+        if name == "sdlc_llm_requests_total":
+            key = "calls"
+        elif name == "sdlc_llm_tokens_total":
+            key = labels["type"]
+        elif name == "sdlc_llm_cost_usd_total":
+            key = "cost"
+        else:
+            continue
+        totals[key] = totals.get(key, 0) + value
+    return totals
+
+
+def _run(brd_input: dict) -> dict:
+    from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+    import sdlc_pipeline
+    from sdlc_common import tracing
+
+    with tempfile.TemporaryDirectory() as workdir, open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        os.chdir(workdir)
+        input_path = os.path.join(workdir, "project.json")
+        with open(input_path, "w", encoding="utf-8") as f:
+            json.dump(brd_input, f)
+        graph = sdlc_pipeline.get_graph(sdlc_pipeline.checkpoint_path(workdir))
+        # Imports and graph compilation are not part of the measurement
+        for name in ("brd", "user-stories", "fdd"):
+            sdlc_pipeline.load_node(name).get_graph()
+
+        # The pipeline records its own trace, so totals come from the process-wide metrics
+        before = counters(tracing.metrics)
+        tracemalloc.start()
+        sdlc_pipeline.start_run(graph, input_path, "bench", workdir)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        totals = {name: value - before.get(name, 0) for name, value in counters(tracing.metrics).items()}
+
+        values = graph.get_state(sdlc_pipeline.run_config("bench")).values
+        _, state_bytes = JsonPlusSerializer().dumps_typed(values)
+        checkpoint_bytes = sum(
+            os.path.getsize(os.path.join(workdir, name)) for name in os.listdir(workdir) if name.startswith("checkpoints.sqlite3")
+        )
+        os.chdir(REPO_ROOT)
+    return {
+        "checkpoint_kb": checkpoint_bytes / 1024,
+        "state_kb": len(state_bytes) / 1024,
+        "peak_mb": peak / 1024 / 1024,
+        "llm_calls": int(totals.get("calls", 0)),
+        "prompt_tokens": int(totals.get("prompt", 0)),
+        "cached_prompt_tokens": int(totals.get("cached_prompt", 0)),
+        "cost_usd": totals.get("cost", 0.0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--in-scope-items", type=int, default=40, help="In-scope items in the BRD input (one work unit each)")
+    parser.add_argument("--stakeholders", type=int, default=10)
+    args = parser.parse_args()
+
+    # Inherited by the spawned measurement process
+    os.environ.update({
+        "SDLC_FAKE_LLM": "1",
+        "FAKE_LLM_PROMPT_CACHE": "1",
+        "LLM_CACHE_DISABLED": "1",
+        "SDLC_TRACE_DISABLED": "1",
+        "USER_STORY_EXPORTS": "jsonl",
+        "PYTHONWARNINGS": "ignore",
+    })
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        result = pool.apply(_run, (project(args.in_scope_items, args.stakeholders),))
+
+    print(f"{'checkpoint KB':>14}{'state KB':>10}{'peak MB':>9}{'LLM calls':>11}{'prompt tok':>12}{'cached tok':>12}{'cost USD':>10}")
+    print(
+        f"{result['checkpoint_kb']:>14.1f}{result['state_kb']:>10.1f}{result['peak_mb']:>9.1f}{result['llm_calls']:>11}"
+        f"{result['prompt_tokens']:>12}{result['cached_prompt_tokens']:>12}{result['cost_usd']:>10.4f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Export time and peak memory of the User Story output node for 1,000 and 10,000 stories.
+
+Compares the previous output (every story in one PDF table, with the state and
+table data printed) against StoryExporter writing only the PDF, and writing PDF,
+CSV, JSONL and XLSX together. Each measurement runs in a fresh process; peak MB
+is the growth of its max RSS.
+
+    python benchmarks/bench_story_exports.py [--stories 1000 10000] [--skip-legacy]
+"""
+import argparse
+import contextlib
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, "User Story Node"))
+
+from story_export import COLUMNS, FORMATS, export_stories, story_row
+
+
+def synthetic_stories(count: int) -> list:
+    return [
+        {
+            "title": f"Migrate table ZSALES_{n} to Redshift",
+            "description": f"As a data engineer, I want to migrate table ZSALES_{n} from Oracle to AWS Redshift so that "
+                           "marketing teams can run analytics on the new platform without data loss.",
+            "acceptance_criteria": [
+                f"Row counts of ZSALES_{n} match between Oracle and Redshift",
+                "Checksums of key columns reconcile",
+                "Load completes within the nightly batch window",
+            ],
+            "definition_of_done": ["Code reviewed", "Unit tested", "Transported to QA", "UAT sign-off recorded"],
+            "definition_of_ready": ["Source schema documented", "Test data available"],
+        }
+        for n in range(1, count + 1)
+    ]
+
+
+def write_legacy(stories: list, workdir: str) -> None:
+    # Previous output_pdf_node: debug prints of the whole state, one table for every story
+    from reportlab.platypus import Paragraph, Spacer
+    from sdlc_common.pdf_render import build_pdf, get_styles, table_flowable
+
+    state = {"validated_output": "", "user_stories": stories}
+    print(state)
+    print(stories)
+    table_data = [[header for _, header in COLUMNS]] + [story_row(story) for story in stories]
+    print(table_data)
+    elements = [Paragraph("User Stories", get_styles()["Title"]), Spacer(1, 12), table_flowable(table_data)]
+    build_pdf(os.path.join(workdir, "user_stories_output.pdf"), elements)
+
+
+def write_pdf(stories: list, workdir: str) -> None:
+    export_stories(stories, {"pdf": os.path.join(workdir, "user_stories_output.pdf")})
+
+
+def write_all(stories: list, workdir: str) -> None:
+    export_stories(stories, {fmt: os.path.join(workdir, f"user_stories.{fmt}") for fmt in FORMATS})
+
+
+WRITERS = {"exporter-pdf": write_pdf, "exporter-all": write_all, "legacy": write_legacy}
+
+
+def _run(name: str, count: int) -> dict:
+    # Runs in a fresh process so ru_maxrss reflects this export only
+    stories = synthetic_stories(count)
+    from sdlc_common.pdf_render import get_styles
+    get_styles()
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    with tempfile.TemporaryDirectory() as workdir, open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        WRITERS[name](stories, workdir)
+        elapsed = time.perf_counter() - start
+        size = sum(os.path.getsize(os.path.join(workdir, f)) for f in os.listdir(workdir))
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {"seconds": elapsed, "peak_mb": (peak - baseline) / 1024, "output_kb": size / 1024}
+
+
+def measure(name: str, count: int) -> dict:
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(_run, (name, count))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stories", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--skip-legacy", action="store_true", help="Only measure StoryExporter")
+    args = parser.parse_args()
+
+    writers = ["exporter-pdf", "exporter-all"] + ([] if args.skip_legacy else ["legacy"])
+    print(f"{'writer':<14}{'stories':>9}{'seconds':>10}{'peak MB':>10}{'output KB':>11}")
+    for count in args.stories:
+        for name in writers:
+            result = measure(name, count)
+            print(f"{name:<14}{count:>9}{result['seconds']:>10.2f}{result['peak_mb']:>10.1f}{result['output_kb']:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
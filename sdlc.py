@@ -0,0 +1,29 @@
+"""Command-line entry point for the SDLC agent nodes.
+
+    python sdlc.py brd                               # interactive BRD generation
+    python sdlc.py brd-batch projects.jsonl --concurrency 8
+    python sdlc.py user-stories
+    python sdlc.py fdd BRD_project.md
+    python sdlc.py code-doc                          # start the ABAP documentation web app
+    python sdlc.py pipeline run project.json         # BRD -> user stories + FDD, with checkpoints
+    python sdlc.py service --port 8000               # async HTTP API for all of the above
+
+Only the selected node is imported; arguments after the node name are passed to its main().
+"""
+import argparse
+import logging
+
+from sdlc_common.nodes import NODES, load_node
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run an SDLC agent node.")
+    parser.add_argument("node", choices=sorted(NODES), help="Node to run")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="Arguments passed to the node")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    load_node(args.node).main(args.args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Helpers shared by the SDLC agent nodes (BRD, User Story, FS and Code doc)."""
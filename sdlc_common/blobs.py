@@ -0,0 +1,116 @@
+"""Content-addressed store for large artifacts referenced from graph state.
+
+LangGraph writes every value a node returns into its checkpoint. The node
+graphs also inherit the pipeline's checkpointer when they run as pipeline stages.
+A BRD, an FDD draft or a list of user stories kept in state is therefore
+serialized again at every step that returns it. Instead, a node puts the
+artifact here and keeps only its reference, "sha256:<hex>", in state.
+Identical content (a draft that validation left unchanged, an unedited BRD)
+is stored once.
+
+Blobs are files named by the SHA-256 of their content, so a write never
+changes an existing blob and concurrent writers of the same content agree.
+The default store prunes blobs that were not written or read for
+SDLC_BLOB_MAX_AGE_DAYS. A store with its own directory (e.g. a pipeline
+run's) keeps everything until the directory is removed.
+
+Configuration (environment variables):
+    SDLC_BLOB_DIR           default store directory (default: <repo>/.blobs)
+    SDLC_BLOB_MAX_AGE_DAYS  default store: blobs unused this long are removed (default: 7)
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Optional
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".blobs")
+PREFIX = "sha256:"
+
+
+def is_ref(value: Any) -> bool:
+    return isinstance(value, str) and value.startswith(PREFIX) and len(value) == len(PREFIX) + 64
+
+
+class BlobStore:
+    """Text blobs on disk, addressed by the SHA-256 of their content."""
+
+    def __init__(self, directory: str, max_age_seconds: Optional[float] = None):
+        self.directory = directory
+        self.max_age_seconds = max_age_seconds
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, ref: str) -> str:
+        if not is_ref(ref):
+            raise ValueError(f"Not a blob reference: {ref[:80]!r}")
+        digest = ref[len(PREFIX):]
+        return os.path.join(self.directory, digest[:2], digest[2:])
+
+    def put(self, text: str) -> str:
+        data = text.encode("utf-8")
+        ref = PREFIX + hashlib.sha256(data).hexdigest()
+        path = self._path(ref)
+        if os.path.exists(path):
+            # Already stored; refresh it so pruning keeps it
+            os.utime(path)
+            return ref
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file and rename, so a reader never sees a partial blob
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return ref
+
+    def get(self, ref: str) -> str:
+        path = self._path(ref)
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        if self.max_age_seconds is not None:
+            os.utime(path)
+        return text
+
+    def resolve(self, value: str) -> str:
+        """The text of a blob reference; any other string is returned as is (inputs may be either)."""
+        return self.get(value) if is_ref(value) else value
+
+    def put_json(self, value: Any) -> str:
+        return self.put(json.dumps(value, indent=2))
+
+    def get_json(self, ref: str) -> Any:
+        return json.loads(self.get(ref))
+
+    def prune(self) -> int:
+        """Remove blobs not written or read for max_age_seconds; returns how many were removed."""
+        if self.max_age_seconds is None:
+            return 0
+        cutoff = time.time() - self.max_age_seconds
+        removed = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                        removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+
+_default_store: Optional[BlobStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_blob_store() -> BlobStore:
+    """Process-wide store for the node graphs; old blobs are pruned when it is first used."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = BlobStore(
+                os.getenv("SDLC_BLOB_DIR", DEFAULT_DIR), float(os.getenv("SDLC_BLOB_MAX_AGE_DAYS", "7")) * 86400
+            )
+            _default_store.prune()
+        return _default_store
@@ -0,0 +1,323 @@
+"""Deterministic offline stand-in for the chat models, for benchmarks and local runs.
+
+With SDLC_FAKE_LLM=1, ``lazy_llm`` returns a FakeChatModel instead of calling
+init_llm, and the FDD node uses FakeGenerativeModel instead of Gemini. Nothing
+touches the network. The prompt is recognized (BRD, BRD repair, user stories,
+story repair, FDD, FDD merge and per-routine ABAP notes) and
+answered with a synthesized document of the right shape. A JSON-schema
+``response_format`` wraps a JSON list in an object keyed by the schema name. The same prompt always
+produces the same text, and BRDs pass local validation.
+
+Configuration (environment variables):
+    SDLC_FAKE_LLM                 set to 1 to replace every provider with the fake
+    FAKE_LLM_LATENCY              seconds before the first token (default: 0)
+    FAKE_LLM_TOKENS_PER_SECOND    generation speed; 0 returns instantly (default: 0)
+    FAKE_LLM_ERROR_RATE           fraction of calls that raise FakeLLMError (default: 0)
+    FAKE_LLM_TAIL_RATE            fraction of calls that are slow, to model tail latency (default: 0)
+    FAKE_LLM_TAIL_LATENCY         extra seconds before the first token of a slow call (default: 10)
+    FAKE_LLM_STORIES              user stories per work unit (default: 4)
+    FAKE_LLM_DUPLICATE_STORIES    retitled copies added per story, up to 3 (default: 0)
+    FAKE_LLM_SEED                 seed for the error sequence (default: 0)
+    FAKE_LLM_PROMPT_CACHE         set to 1 to report prefix cache reads like the OpenAI API (default: off)
+"""
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+FDD_SECTIONS = [
+    "Introduction", "Business Requirements", "Functional Requirements", "Assumptions and Constraints",
+    "In-Scope / Out-of-Scope", "Process Flow Description", "Use Case Scenarios",
+    "Screen Layout / Field Mapping", "Security and Roles", "Error Handling", "Dependencies", "Appendix",
+]
+STREAM_CHUNK_CHARS = 40
+# Provider prefix caching, in characters at four per token: prompts of 1024+ tokens, cached in 128-token steps
+PROMPT_CACHE_MIN_CHARS = 4096
+PROMPT_CACHE_BLOCK_CHARS = 512
+
+
+class FakeLLMError(RuntimeError):
+    # Looks like a provider 429 so the scheduler retries it
+    status_code = 429
+
+
+def enabled() -> bool:
+    return os.getenv("SDLC_FAKE_LLM") == "1"
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _filler(seed: str, sentences: int = 3) -> str:
+    # Stable pseudo-prose derived from the prompt, so identical prompts give identical answers
+    words = ["data", "process", "system", "migration", "validation", "report", "interface", "table",
+             "load", "schedule", "user", "quality", "performance", "security", "integration", "audit"]
+    digest = hashlib.sha256(seed.encode("utf-8")).digest()
+    out = []
+    for s in range(sentences):
+        picked = [words[digest[(s * 7 + i) % len(digest)] % len(words)] for i in range(9)]
+        out.append(f"The {picked[0]} {picked[1]} ensures {picked[2]} {picked[3]} and {picked[4]} {picked[5]} for every {picked[6]} {picked[7]} {picked[8]}.")
+    return " ".join(out)
+
+
+def _field(prompt: str, label: str) -> str:
+    match = re.search(rf"{re.escape(label)}:\s*(.*)", prompt)
+    return match.group(1).strip() if match else ""
+
+
+def _brd(prompt: str) -> str:
+    inputs = {label: _field(prompt, label) for label in (
+        "Project Name", "Project Purpose", "Scope Area", "In-Scope Items", "Out of Scope Items", "Stakeholders"
+    )}
+    bodies = {
+        "Purpose": f"The purpose of this project is to {inputs['Project Purpose']}.",
+        "Project Summary": f"{inputs['Project Name']}: {inputs['Scope Area']}.",
+        "In-Scope": "\n".join(f"- {item}" for item in inputs["In-Scope Items"].split(", ")),
+        "Out of Scope": "\n".join(f"- {item}" for item in inputs["Out of Scope Items"].split(", ")),
+        "Stakeholder Analysis": "\n".join(f"- {item}: {_filler(item, 1)}" for item in inputs["Stakeholders"].split(", ")),
+        "Roles and Responsibilities": "\n".join(f"- {item}: accountable for sign-off" for item in inputs["Stakeholders"].split(", ")),
+    }
+    names = ["Purpose", "Project Summary", "Project Success Criteria", "Project Objectives", "In-Scope", "Out of Scope",
+             "Non-Functional Requirements", "Assumptions", "Dependencies", "Constraints", "Stakeholder Analysis",
+             "Roles and Responsibilities"]
+    parts = [f"# Business Requirement Document: {inputs['Project Name']}"]
+    for number, name in enumerate(names, start=1):
+        parts.append(f"## {number}. {name}\n{bodies.get(name) or _filler(prompt + name)}")
+    return "\n\n".join(parts)
+
+
+def _brd_repair(prompt: str) -> str:
+    names = re.findall(r"^- ([^:\n]+):", prompt.split("**Sections to fix", 1)[-1].split("**Current content", 1)[0], re.M)
+    user_input = prompt.split("**User Inputs**:", 1)[-1].split("**Sections to fix", 1)[0].strip()
+    inputs = " ".join(line.strip() for line in user_input.splitlines())
+    return "\n\n".join(f"## {name}\nThis section reflects the inputs. {inputs}" for name in names)
+
+
+def _stories(prompt: str) -> str:
+    count = int(os.getenv("FAKE_LLM_STORIES", "4"))
+    # Retitled copies of each story, as models produce when told to split work into the smallest steps
+    copies = int(os.getenv("FAKE_LLM_DUPLICATE_STORIES", "0"))
+    item = _field(prompt, "Only generate user stories for this work item") or "the BRD"
+    item = re.sub(r"^\([^)]*\):\s*", "", item)[:80]
+    stories = [
+        {
+            "title": f"{item} - step {n}",
+            "description": f"As a data engineer, I want to complete step {n} of {item}. {_filler(item + str(n), 1)}",
+            "acceptance_criteria": [f"Step {n} output reconciles with the source", "No errors in the SAP application log"],
+            "definition_of_done": ["Code reviewed", "Unit tested", "Transported to QA"],
+            "definition_of_ready": ["Requirements agreed", "Test data available"],
+        }
+        for n in range(1, count + 1)
+    ]
+    stories += [
+        {**story, "title": f"{story['title']} ({label})"} for story in stories for label in ("detailed", "follow-up", "refined")[:copies]
+    ]
+    return json.dumps(stories, indent=2)
+
+
+def _repaired_stories(prompt: str) -> str:
+    failing = json.loads(prompt[prompt.index("["):])
+    defaults = {"description": "As a data engineer, I want this step completed.", "acceptance_criteria": ["Output reconciles with the source"],
+                "definition_of_done": ["Code reviewed"], "definition_of_ready": ["Requirements agreed"]}
+    return json.dumps([{**defaults, **{key: value for key, value in item["story"].items() if value}} for item in failing], indent=2)
+
+
+def _fdd(prompt: str) -> str:
+    parts = ["# Functional Design Document"]
+    for number, name in enumerate(FDD_SECTIONS, start=1):
+        parts.append(f"## {number}. {name}\n{_filler(prompt + name, 4)}")
+        if name == "Screen Layout / Field Mapping":
+            parts.append("| Field | Source | Target |\n|-------|--------|--------|\n| MATNR | MARA-MATNR | material_id |\n| WERKS | MARC-WERKS | plant_id |")
+    return "\n\n".join(parts)
+
+
+def _fdd_merge(prompt: str) -> str:
+    return prompt.split("FDD from GPT-4o:", 1)[-1].split("FDD from Gemini:", 1)[0].strip()
+
+
+def _fdd_section_merge(prompt: str) -> str:
+    # Keep the first version that exists of every section in the request
+    merged = []
+    for block in re.split(r"^(?=## \d+\. )", prompt, flags=re.M)[1:]:
+        heading, _, body = block.partition("\n")
+        versions = [version.partition("\n")[2].strip() for version in re.split(r"^### Version from ", body, flags=re.M)[1:]]
+        merged.append(f"{heading}\n{next((v for v in versions if v != '(missing)'), '')}")
+    return "\n\n".join(merged)
+
+
+def _abap_notes(prompt: str) -> str:
+    headings = ["Technical Documentation", "Code Review Comments", "Optimization Suggestions"]
+    return "\n".join(f"#### {heading}\n- {_filler(prompt + heading, 1)}" for heading in headings)
+
+
+# First matching marker decides the response
+RESPONDERS = [
+    ("Business Requirement Document (BRD) based on the following inputs", _brd),
+    ("failed validation against the user inputs", _brd_repair),
+    ("user stories below failed schema validation", _repaired_stories),
+    ("Generate a list of user stories", _stories),
+    ("Merge each FDD section below", _fdd_section_merge),
+    ("merge the best parts into a single", _fdd_merge),
+    ("Functional Design Document (FDD)", _fdd),
+    ("Write concise notes", _abap_notes),
+]
+
+
+def respond(prompt: str, response_format: Optional[dict] = None) -> str:
+    for marker, responder in RESPONDERS:
+        if marker in prompt:
+            text = responder(prompt)
+            break
+    else:
+        text = _filler(prompt, 5)
+    if (response_format or {}).get("type") == "json_schema" and text.startswith("["):
+        text = json.dumps({response_format["json_schema"]["name"]: json.loads(text)}, indent=2)
+    return text
+
+
+class _Behaviour:
+    """Latency, throughput and error injection shared by both fakes."""
+
+    _lock = threading.Lock()
+    _random: Optional[random.Random] = None
+
+    @classmethod
+    def _draw(cls, rate: float) -> bool:
+        with cls._lock:
+            if cls._random is None:
+                cls._random = random.Random(int(os.getenv("FAKE_LLM_SEED", "0")))
+            return cls._random.random() < rate
+
+    @classmethod
+    def maybe_fail(cls, model: str) -> None:
+        error_rate = float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))
+        if error_rate and cls._draw(error_rate):
+            raise FakeLLMError(f"Injected failure from fake {model}")
+
+    @classmethod
+    def first_token_delay(cls) -> None:
+        latency = float(os.getenv("FAKE_LLM_LATENCY", "0"))
+        tail_rate = float(os.getenv("FAKE_LLM_TAIL_RATE", "0"))
+        if tail_rate and cls._draw(tail_rate):
+            latency += float(os.getenv("FAKE_LLM_TAIL_LATENCY", "10"))
+        if latency:
+            time.sleep(latency)
+
+    @staticmethod
+    def generation_delay(text: str) -> None:
+        tokens_per_second = float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", "0"))
+        if tokens_per_second:
+            time.sleep(estimate_tokens(text) / tokens_per_second)
+
+
+class _PromptCache:
+    """Prefixes of finished calls per model; a prompt reads the longest cached prefix, in whole blocks.
+
+    As with the provider, a prefix is cached once the call that sent it has
+    finished, so calls sent at the same time all miss.
+    """
+
+    _lock = threading.Lock()
+    _prefixes: set = set()
+
+    @staticmethod
+    def _keys(model: str, prompt: str) -> List[tuple]:
+        if os.getenv("FAKE_LLM_PROMPT_CACHE") != "1" or len(prompt) < PROMPT_CACHE_MIN_CHARS:
+            return []
+        digest = hashlib.sha256(model.encode("utf-8"))
+        keys = []
+        for end in range(PROMPT_CACHE_BLOCK_CHARS, len(prompt) + 1, PROMPT_CACHE_BLOCK_CHARS):
+            digest.update(prompt[end - PROMPT_CACHE_BLOCK_CHARS:end].encode("utf-8"))
+            keys.append((end, digest.hexdigest()))
+        return keys
+
+    @classmethod
+    def read(cls, model: str, prompt: str) -> int:
+        """Prompt tokens of this call served from the cache."""
+        cached = 0
+        with cls._lock:
+            for end, key in cls._keys(model, prompt):
+                if key not in cls._prefixes:
+                    break
+                cached = end
+        return cached // 4 if cached >= PROMPT_CACHE_MIN_CHARS else 0
+
+    @classmethod
+    def write(cls, model: str, prompt: str) -> None:
+        keys = cls._keys(model, prompt)
+        with cls._lock:
+            cls._prefixes.update(key for _, key in keys)
+
+
+def _prompt_text(messages: List[BaseMessage]) -> str:
+    return "\n".join(message.content if isinstance(message.content, str) else json.dumps(message.content) for message in messages)
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model with the same invoke/stream interface as the Gen AI Hub models."""
+
+    model_name: str = "gpt-4o"
+
+    @property
+    def _llm_type(self) -> str:
+        return "sdlc-fake"
+
+    def _usage(self, prompt: str, text: str, cached: int) -> dict:
+        prompt_tokens, completion_tokens = estimate_tokens(prompt), estimate_tokens(text)
+        return {
+            "input_tokens": prompt_tokens, "output_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens,
+            "input_token_details": {"cache_read": cached},
+        }
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        prompt = _prompt_text(messages)
+        cached = _PromptCache.read(self.model_name, prompt)
+        _Behaviour.first_token_delay()
+        _Behaviour.maybe_fail(self.model_name)
+        text = respond(prompt, kwargs.get("response_format"))
+        _Behaviour.generation_delay(text)
+        _PromptCache.write(self.model_name, prompt)
+        message = AIMessage(content=text, usage_metadata=self._usage(prompt, text, cached))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        prompt = _prompt_text(messages)
+        cached = _PromptCache.read(self.model_name, prompt)
+        _Behaviour.first_token_delay()
+        _Behaviour.maybe_fail(self.model_name)
+        text = respond(prompt, kwargs.get("response_format"))
+        for start in range(0, len(text), STREAM_CHUNK_CHARS):
+            piece = text[start:start + STREAM_CHUNK_CHARS]
+            _Behaviour.generation_delay(piece)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+        _PromptCache.write(self.model_name, prompt)
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(prompt, text, cached)))
+
+
+class FakeGenerateContentResponse:
+    def __init__(self, text: str, prompt_tokens: int):
+        self.text = text
+        self.usage_metadata = {"prompt_token_count": prompt_tokens, "candidates_token_count": estimate_tokens(text)}
+
+
+class FakeGenerativeModel:
+    """Stand-in for google.generativeai.GenerativeModel (generate_content only)."""
+
+    def __init__(self, model_name: str = "gemini-2.0-flash"):
+        self.model_name = model_name
+
+    def generate_content(self, prompt: str) -> FakeGenerateContentResponse:
+        _Behaviour.first_token_delay()
+        _Behaviour.maybe_fail(self.model_name)
+        text = respond(prompt)
+        _Behaviour.generation_delay(text)
+        return FakeGenerateContentResponse(text, estimate_tokens(prompt))
@@ -0,0 +1,253 @@
+"""Hedged LLM requests: a slow call is raced against the other provider.
+
+When hedging is on for the current pipeline or node, a cache miss in
+``CachedLLM`` or ``cached_call`` runs on a hedging thread while the caller waits.
+If the model has not answered by the deadline, the same prompt goes to the
+backup model. The deadline is the LLM_HEDGE_PERCENTILE latency of recent calls
+to that model from the same node. By default GPT-4o and Gemini back each other up.
+The first non-empty answer is returned. A primary that fails outright also falls
+back to the backup.
+
+The losing request is cancelled. A request still waiting for rate-limit budget,
+or still streaming, stops (see scheduler.cancellable). A blocking request
+already in flight cannot be interrupted; it finishes in the background, its
+tokens are still charged, and its answer is cached for the next identical call.
+Streams are hedged on time to the first chunk; once the primary has produced a
+chunk it is kept.
+
+Configuration (environment variables):
+    LLM_HEDGE                 comma-separated pipelines or nodes to hedge (e.g. "brd,code_doc"), or "all" (default: off)
+    LLM_HEDGE_BACKUPS         JSON {"model": "backup model"} added to DEFAULT_BACKUPS
+    LLM_HEDGE_PERCENTILE      latency percentile used as the deadline (default: 95)
+    LLM_HEDGE_INITIAL_DELAY   deadline in seconds until MIN_SAMPLES calls have been seen (default: 30)
+    LLM_HEDGE_WORKERS         threads running hedged primary and backup calls (default: 32)
+"""
+import contextvars
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from sdlc_common import scheduler, tracing
+
+DEFAULT_BACKUPS = {"gpt-4o": "gemini-2.0-flash", "gemini-2.0-flash": "gpt-4o"}
+MIN_SAMPLES = 20
+WINDOW = 200
+
+# Set inside a backup request so it is never hedged itself
+_in_backup: contextvars.ContextVar = contextvars.ContextVar("sdlc_hedge_backup", default=False)
+
+_latencies: Dict[tuple, deque] = {}
+_latencies_lock = threading.Lock()
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=int(os.getenv("LLM_HEDGE_WORKERS", "32")), thread_name_prefix="llm-hedge")
+        return _pool
+
+
+def backup_for(model: str) -> Optional[str]:
+    """Backup model for a call to ``model`` made here, or None when this call is not hedged."""
+    targets = {name.strip() for name in os.getenv("LLM_HEDGE", "").split(",") if name.strip()}
+    if not targets or _in_backup.get():
+        return None
+    labels = tracing.context_labels()
+    if "all" not in targets and not targets & {labels["pipeline"], labels["node"]}:
+        return None
+    return {**DEFAULT_BACKUPS, **json.loads(os.getenv("LLM_HEDGE_BACKUPS", "{}"))}.get(model)
+
+
+def _key(model: str, kind: str) -> tuple:
+    labels = tracing.context_labels()
+    return model, labels["pipeline"], labels["node"], kind
+
+
+def _observe(key: tuple, seconds: float) -> None:
+    with _latencies_lock:
+        _latencies.setdefault(key, deque(maxlen=WINDOW)).append(seconds)
+
+
+def deadline(key: tuple) -> float:
+    """Seconds to wait for the primary before sending the backup request."""
+    with _latencies_lock:
+        samples = sorted(_latencies.get(key, ()))
+    if len(samples) < MIN_SAMPLES:
+        delay = float(os.getenv("LLM_HEDGE_INITIAL_DELAY", "30"))
+    else:
+        percentile = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+        delay = samples[min(len(samples) - 1, int(round(percentile / 100 * (len(samples) - 1))))]
+    tracing.metrics.set("sdlc_llm_hedge_delay_seconds", delay, model=key[0], pipeline=key[1], node=key[2], kind=key[3])
+    return delay
+
+
+def _text(response: Any) -> str:
+    if isinstance(response, str):
+        return response
+    return getattr(response, "content", None) or getattr(response, "text", None) or ""
+
+
+def _acceptable(future: Future) -> bool:
+    return not future.cancelled() and future.exception() is None and bool(_text(future.result()).strip())
+
+
+def _submit(fn: Callable[[], Any], cancel: threading.Event, backup: bool = False) -> Future:
+    def run():
+        _in_backup.set(backup)
+        with scheduler.cancellable(cancel):
+            return fn()
+    return tracing.submit(_executor(), run)
+
+
+def _cancel(future: Future, event: threading.Event, model: str) -> None:
+    event.set()
+    future.cancel()
+    scheduler.get_scheduler(model).wake()
+
+
+def _backup(model: str, prompt: Any) -> str:
+    from sdlc_common import llm_cache
+    if model.startswith("gemini"):
+        text = llm_cache.normalize_prompt(prompt)
+        return llm_cache.cached_call(model, {}, text, lambda: llm_cache.gemini_model(model).generate_content(text).text)
+    return llm_cache.chat_model(model).invoke(prompt).content
+
+
+def _count(model: str, backup: str, outcome: str) -> None:
+    tracing.metrics.inc("sdlc_llm_hedge_total", model=model, backup=backup, outcome=outcome, **tracing.context_labels())
+
+
+def call(model: str, prompt: Any, primary: Callable[[], Any], abandoned: Optional[Callable[[Any], None]] = None) -> Tuple[Any, str]:
+    """Run ``primary`` hedged against the backup model; returns (response, model that answered).
+
+    A backup answer is returned as a string. ``abandoned`` receives the primary's
+    response when it arrives after the backup has already answered.
+    """
+    backup = backup_for(model)
+    if backup is None:
+        return primary(), model
+    key = _key(model, "response")
+    delay = deadline(key)
+    start = time.perf_counter()
+    lock = threading.Lock()
+    won = {}
+    cancel_primary, cancel_backup = threading.Event(), threading.Event()
+
+    def primary_done(future: Future) -> None:
+        if future.cancelled() or future.exception() is not None:
+            return
+        elapsed = time.perf_counter() - start
+        if _acceptable(future):
+            _observe(key, elapsed)
+        with lock:
+            backup_won_at = won.get(backup)
+        if backup_won_at is None:
+            return
+        if _acceptable(future):
+            tracing.metrics.observe("sdlc_llm_hedge_saved_seconds", elapsed - backup_won_at, model=model)
+        if abandoned is not None:
+            abandoned(future.result())
+
+    first = _submit(primary, cancel_primary)
+    first.add_done_callback(primary_done)
+    wait([first], timeout=delay)
+    if first.done() and _acceptable(first):
+        _count(model, backup, "not_hedged")
+        return first.result(), model
+
+    second = _submit(lambda: _backup(backup, prompt), cancel_backup, backup=True)
+    futures = {first: (model, cancel_primary), second: (backup, cancel_backup)}
+    pending = set(futures)
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        with lock:
+            # The primary wins ties; once the backup is recorded as the winner, primary_done hands over a late answer
+            winner = next((future for future in (first, second) if future.done() and _acceptable(future)), None)
+            if winner is None:
+                continue
+            answered_by = futures[winner][0]
+            won[answered_by] = time.perf_counter() - start
+        loser = second if winner is first else first
+        _cancel(loser, futures[loser][1], futures[loser][0])
+        _count(model, backup, "primary" if answered_by == model else "backup")
+        return winner.result(), answered_by
+
+    _count(model, backup, "failed")
+    if first.exception() is not None:
+        raise first.exception()
+    return first.result(), model
+
+
+def stream(model: str, prompt: Any, primary: Callable[[], Iterator[Any]], wrap: Callable[[str, str], Any]) -> Iterator[Any]:
+    """Stream ``primary``, hedged on time to first chunk; ``wrap(text, backup)`` turns a backup answer into a chunk."""
+    backup = backup_for(model)
+    if backup is None:
+        yield from primary()
+        return
+    key = _key(model, "first_chunk")
+    delay = deadline(key)
+    start = time.perf_counter()
+    events: queue.Queue = queue.Queue()
+    cancel_primary, cancel_backup = threading.Event(), threading.Event()
+
+    def pump():
+        try:
+            for chunk in primary():
+                events.put(("chunk", chunk))
+        except Exception as e:
+            events.put(("error", e))
+        else:
+            events.put(("end", None))
+
+    first = _submit(pump, cancel_primary)
+    second = None
+    primary_failed, primary_error = False, None
+    try:
+        try:
+            kind, item = events.get(timeout=delay)
+        except queue.Empty:
+            kind, item = "slow", None
+        # Until the primary yields its first chunk: start the backup, and use it if it answers first
+        while kind != "chunk":
+            if kind in ("error", "end"):
+                primary_failed, primary_error = True, item
+            if kind == "backup" and _acceptable(item):
+                _cancel(first, cancel_primary, model)
+                _count(model, backup, "backup")
+                yield wrap(item.result(), backup)
+                return
+            if second is None:
+                second = _submit(lambda: _backup(backup, prompt), cancel_backup, backup=True)
+                second.add_done_callback(lambda future: events.put(("backup", future)))
+            elif primary_failed and second.done():
+                _count(model, backup, "failed")
+                error = primary_error or second.exception()
+                if error is not None:
+                    raise error
+                return
+            kind, item = events.get()
+
+        _observe(key, time.perf_counter() - start)
+        if second is not None:
+            _cancel(second, cancel_backup, backup)
+        _count(model, backup, "not_hedged" if second is None else "primary")
+        yield item
+        while True:
+            kind, item = events.get()
+            if kind == "chunk":
+                yield item
+            elif kind == "error":
+                raise item
+            elif kind == "end":
+                return
+    finally:
+        # Also reached when the consumer stops reading early
+        _cancel(first, cancel_primary, model)
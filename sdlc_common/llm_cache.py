@@ -0,0 +1,418 @@
+"""Persistent, content-addressed cache for LLM responses.
+
+Responses are keyed on (model, parameters, normalized prompt) and stored in a
+SQLite database so that every node - and every process - reuses the same
+entries. Old and least recently used entries are evicted by age and by total size.
+
+Configuration (environment variables):
+    LLM_CACHE_PATH          database file (default: <repo>/.llm_cache/responses.sqlite3)
+    LLM_CACHE_MAX_MB        total size budget in MB (default: 512)
+    LLM_CACHE_MAX_AGE_DAYS  entries older than this are dropped (default: 30)
+    LLM_CACHE_DISABLED      set to 1 to bypass the cache entirely
+"""
+import functools
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.runnables import Runnable
+
+from sdlc_common import hedging, scheduler, tracing
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".llm_cache", "responses.sqlite3"
+)
+
+
+def normalize_prompt(prompt: Any) -> str:
+    """Render a prompt (string, PromptValue or message list) into a canonical string."""
+    if hasattr(prompt, "to_messages"):
+        prompt = prompt.to_messages()
+    if isinstance(prompt, (list, tuple)):
+        parts = []
+        for message in prompt:
+            if isinstance(message, str):
+                parts.append(message)
+            elif isinstance(message, (list, tuple)):
+                parts.append(f"{message[0]}: {message[1]}")
+            else:
+                content = message.content if isinstance(message.content, str) else json.dumps(message.content, sort_keys=True)
+                parts.append(f"{message.type}: {content}")
+        text = "\n".join(parts)
+    else:
+        text = str(prompt)
+    # Whitespace-only differences must not produce a different key
+    text = text.replace("\r\n", "\n")
+    text = "\n".join(line.rstrip() for line in text.strip().split("\n"))
+    return re.sub(r"\n{3,}", "\n\n", text)
+
+
+def make_key(model: str, params: Optional[Dict[str, Any]], prompt: Any) -> str:
+    payload = json.dumps(
+        {"model": model, "params": params or {}, "prompt": normalize_prompt(prompt)},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """SQLite-backed response store with size- and age-based LRU eviction."""
+
+    def __init__(self, path: Optional[str] = None, max_bytes: Optional[int] = None, max_age_seconds: Optional[float] = None):
+        self.path = path or os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH)
+        self.max_bytes = max_bytes if max_bytes is not None else int(float(os.getenv("LLM_CACHE_MAX_MB", "512")) * 1024 * 1024)
+        self.max_age_seconds = (
+            max_age_seconds if max_age_seconds is not None else float(os.getenv("LLM_CACHE_MAX_AGE_DAYS", "30")) * 86400
+        )
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses(last_access)")
+            conn.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO stats VALUES ('hits', 0), ('misses', 0)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; WAL lets several processes read while one writes
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, conn: sqlite3.Connection, name: str) -> None:
+        with self._lock:
+            if name == "hits":
+                self.hits += 1
+            else:
+                self.misses += 1
+        conn.execute("UPDATE stats SET value = value + 1 WHERE name = ?", (name,))
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT response, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.max_age_seconds:
+                self._count(conn, "misses")
+                return None
+            conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._count(conn, "hits")
+            return row[0]
+
+    def put(self, key: str, model: str, response: str) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, len(response.encode("utf-8")), now, now),
+            )
+        self.evict()
+
+    def get_or_compute(self, model: str, params: Optional[Dict[str, Any]], prompt: Any, compute: Callable[[], str]) -> str:
+        """Return the cached response for this request, calling ``compute`` on a miss."""
+        key = make_key(model, params, prompt)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        response = compute()
+        self.put(key, model, response)
+        return response
+
+    def evict(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.max_age_seconds,))
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            stale = []
+            for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_access ASC"):
+                if total <= self.max_bytes:
+                    break
+                stale.append((key,))
+                total -= size
+            conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+            conn.execute("UPDATE stats SET value = 0")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counts for this process and for the shared database."""
+        with self._connect() as conn:
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            persisted = dict(conn.execute("SELECT name, value FROM stats").fetchall())
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "entries": entries,
+            "bytes": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "total_hits": persisted.get("hits", 0),
+            "total_misses": persisted.get("misses", 0),
+        }
+
+
+_default_cache: Optional[LLMCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> Optional[LLMCache]:
+    """Process-wide cache instance, or None when LLM_CACHE_DISABLED is set."""
+    global _default_cache
+    if os.getenv("LLM_CACHE_DISABLED") == "1":
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = LLMCache()
+        return _default_cache
+
+
+def estimate_tokens(text: Any) -> int:
+    # Roughly four characters per token for English text and code
+    return max(1, len(normalize_prompt(text)) // 4)
+
+
+def message_usage(message: Any) -> Optional[Tuple[int, int]]:
+    """(prompt_tokens, completion_tokens) reported by the provider, if any."""
+    usage = getattr(message, "usage_metadata", None)
+    if usage:
+        return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    usage = (getattr(message, "response_metadata", None) or {}).get("token_usage")
+    if usage:
+        return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+    return None
+
+
+def cached_prompt_tokens(message: Any) -> int:
+    """Prompt tokens the provider served from its prompt (prefix) cache, if it reports them."""
+    details = (getattr(message, "usage_metadata", None) or {}).get("input_token_details") or {}
+    if "cache_read" in details:
+        return int(details["cache_read"] or 0)
+    usage = (getattr(message, "response_metadata", None) or {}).get("token_usage") or {}
+    return int((usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0)
+
+
+def streamed_tokens(prompt: Any, chunks: List[Any]) -> int:
+    """Tokens billed for the chunks of a stream received so far: the provider's usage if a chunk reported it, else an estimate."""
+    for chunk in reversed(chunks):
+        usage = message_usage(chunk)
+        if usage and sum(usage):
+            return sum(usage)
+    return estimate_tokens(prompt) + estimate_tokens("".join(str(getattr(chunk, "content", "") or "") for chunk in chunks))
+
+
+def _record_usage(span: dict, prompt: Any, completion: str, usage: Optional[Tuple[int, int]] = None, cached: int = 0) -> None:
+    if usage:
+        tracing.record_usage(span, *usage, cached_prompt_tokens=cached)
+    else:
+        tracing.record_usage(span, estimate_tokens(prompt), estimate_tokens(completion), estimated=True)
+
+
+def cached_call(model: str, params: Optional[Dict[str, Any]], prompt: Any, compute: Callable[[], str]) -> str:
+    """Cache a provider call that is not a LangChain runnable (e.g. google.generativeai)."""
+    with tracing.llm_call(model) as span:
+        cache = get_default_cache()
+        key = make_key(model, params, prompt)
+        if cache is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                span["cache_hit"] = True
+                return cached
+        limiter = scheduler.get_scheduler(model)
+        reserved = estimate_tokens(prompt) + scheduler.completion_reserve(params)
+
+        def abandoned(late: str) -> None:
+            # A hedged call that lost: still pay for it, and keep its answer
+            used = estimate_tokens(prompt), estimate_tokens(late)
+            limiter.settle(reserved, sum(used))
+            tracing.charge(model, *used)
+            if cache is not None:
+                cache.put(key, model, late)
+
+        response, answered_by = hedging.call(model, prompt, lambda: limiter.call(compute, reserved, span), abandoned)
+        if answered_by != model:
+            span["hedge_winner"] = answered_by
+            return response
+        _record_usage(span, prompt, response)
+        limiter.settle(reserved, span["prompt_tokens"] + span["completion_tokens"])
+        if cache is not None:
+            cache.put(key, model, response)
+        return response
+
+
+class CachedLLM(Runnable):
+    """Drop-in wrapper for a chat model that serves repeated requests from the shared cache.
+
+    Works anywhere the wrapped model did: ``llm.invoke(prompt)`` and ``prompt | llm | parser``.
+    ``llm`` may also be a zero-argument factory; the model is then created on the
+    first cache miss, so importing a node never authenticates against a provider.
+    """
+
+    def __init__(self, llm: Any, model: str, params: Optional[Dict[str, Any]] = None, cache: Optional[LLMCache] = None):
+        self._llm = llm if isinstance(llm, Runnable) else None
+        self._factory = None if self._llm is not None else llm
+        self._llm_lock = threading.Lock()
+        self.model = model
+        self.params = params or {}
+        self._cache = cache
+
+    @property
+    def llm(self) -> Runnable:
+        if self._llm is None:
+            with self._llm_lock:
+                if self._llm is None:
+                    self._llm = self._factory()
+        return self._llm
+
+    @property
+    def cache(self) -> Optional[LLMCache]:
+        return self._cache or get_default_cache()
+
+    def invoke(self, input: Any, config: Optional[Dict[str, Any]] = None, **kwargs: Any) -> AIMessage:
+        with tracing.llm_call(self.model) as span:
+            cache = self.cache
+            key = make_key(self.model, {**self.params, **kwargs}, input)
+            if cache is not None:
+                cached = cache.get(key)
+                if cached is not None:
+                    span["cache_hit"] = True
+                    return AIMessage(content=cached, response_metadata={"cache_hit": True})
+            limiter = scheduler.get_scheduler(self.model)
+            reserved = estimate_tokens(input) + scheduler.completion_reserve(self.params)
+
+            def abandoned(late: AIMessage) -> None:
+                used = message_usage(late) or (estimate_tokens(input), estimate_tokens(late.content))
+                limiter.settle(reserved, sum(used))
+                tracing.charge(self.model, *used)
+                if cache is not None:
+                    cache.put(key, self.model, late.content)
+
+            response, answered_by = hedging.call(
+                self.model, input, lambda: limiter.call(lambda: self.llm.invoke(input, config, **kwargs), reserved, span), abandoned
+            )
+            if answered_by != self.model:
+                # The backup's tokens are recorded on its own span
+                span["hedge_winner"] = answered_by
+                return AIMessage(content=response, response_metadata={"model_name": answered_by, "hedged": True})
+            _record_usage(span, input, response.content, message_usage(response), cached_prompt_tokens(response))
+            limiter.settle(reserved, span["prompt_tokens"] + span["completion_tokens"])
+            if cache is not None:
+                cache.put(key, self.model, response.content)
+            return response
+
+    def stream(self, input: Any, config: Optional[Dict[str, Any]] = None, **kwargs: Any) -> Iterator[AIMessageChunk]:
+        with tracing.llm_call(self.model) as span:
+            cache = self.cache
+            key = make_key(self.model, {**self.params, **kwargs}, input)
+            if cache is not None:
+                cached = cache.get(key)
+                if cached is not None:
+                    span["cache_hit"] = True
+                    yield AIMessageChunk(content=cached, response_metadata={"cache_hit": True})
+                    return
+            limiter = scheduler.get_scheduler(self.model)
+            reserved = estimate_tokens(input) + scheduler.completion_reserve(self.params)
+            parts, usage, cached = [], None, 0
+            # The scheduler settles the reservation, also when the consumer stops reading early
+            chunks = hedging.stream(
+                self.model, input,
+                lambda: limiter.stream(
+                    lambda: self.llm.stream(input, config, **kwargs), reserved, span,
+                    used=lambda received: streamed_tokens(input, received),
+                ),
+                lambda text, answered_by: AIMessageChunk(content=text, response_metadata={"model_name": answered_by, "hedged": True}),
+            )
+            try:
+                for chunk in chunks:
+                    if chunk.response_metadata.get("hedged"):
+                        span["hedge_winner"] = chunk.response_metadata["model_name"]
+                        yield chunk
+                        return
+                    parts.append(chunk.content)
+                    usage = message_usage(chunk) or usage
+                    cached = cached_prompt_tokens(chunk) or cached
+                    yield chunk
+            finally:
+                # Closes the provider stream now rather than when the generator is collected
+                chunks.close()
+            _record_usage(span, input, "".join(parts), usage, cached)
+            # Only a fully consumed stream is cached
+            if cache is not None:
+                cache.put(key, self.model, "".join(parts))
+
+
+def lazy_llm(model: str, setup: Optional[Callable[[], Any]] = None, bind: Optional[Dict[str, Any]] = None, **init_kwargs: Any) -> CachedLLM:
+    """Cached SAP Gen AI Hub chat model that is only initialized on first use.
+
+    ``setup`` runs right before initialization (e.g. load_dotenv); ``bind`` holds
+    call-time parameters such as ``max_completion_tokens``. With SDLC_FAKE_LLM=1 the
+    offline fake from sdlc_common.fake_llm is used instead.
+    """
+    def create() -> Runnable:
+        from sdlc_common import fake_llm
+        if fake_llm.enabled():
+            return fake_llm.FakeChatModel(model_name=model)
+        if setup is not None:
+            setup()
+        from gen_ai_hub.proxy.langchain.init_models import init_llm
+        llm = init_llm(model, **init_kwargs)
+        return llm.bind(**bind) if bind else llm
+
+    return CachedLLM(create, model, {**init_kwargs, **(bind or {})})
+
+
+def _load_dotenv() -> None:
+    from dotenv import load_dotenv
+    load_dotenv()
+
+
+@functools.lru_cache(maxsize=None)
+def chat_model(model: str) -> CachedLLM:
+    """Shared cached chat model for ``model``, configured from .env (used for hedge backups)."""
+    return lazy_llm(model, setup=_load_dotenv, bind={"max_completion_tokens": None})
+
+
+@functools.lru_cache(maxsize=None)
+def gemini_model(model: str) -> Any:
+    """google.generativeai model, configured from GOOGLE_API_KEY / GEMINI_API_KEY on first use."""
+    from sdlc_common import fake_llm
+    if fake_llm.enabled():
+        return fake_llm.FakeGenerativeModel(model)
+
+    import google.generativeai as genai
+
+    _load_dotenv()
+    genai.configure(api_key=os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY"))
+    return genai.GenerativeModel(model_name=model)
+
+
+if __name__ == "__main__":
+    print(json.dumps(LLMCache().stats(), indent=2))
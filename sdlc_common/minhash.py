@@ -0,0 +1,102 @@
+"""MinHash and LSH banding for finding near-duplicate texts without comparing every pair.
+
+Each text is reduced to its set of word shingles (runs of SHINGLE_SIZE words).
+The MinHash signature keeps the minimum of NUM_PERM hash functions over that
+set, and two signatures agree in a position with probability equal to the
+Jaccard similarity of the sets. Signatures are cut into bands; texts that share
+a whole band are candidates. Only candidates are compared, using the exact
+Jaccard similarity of their shingle sets, and a text is not compared again with
+texts it is already clustered with. With the default 64 permutations in
+16 bands, a pair at 0.8 similarity becomes a candidate with probability above
+0.999, and a pair at 0.3 with probability below 0.15.
+"""
+import hashlib
+import re
+from array import array
+from typing import Dict, Iterable, List, Set, Tuple
+
+SHINGLE_SIZE = 3
+NUM_PERM = 64
+BANDS = 16
+
+_EMPTY = 0xFFFFFFFF
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[str]:
+    """Every run of ``size`` consecutive lowercase words (the whole text if shorter)."""
+    words = re.findall(r"[a-z0-9]+", str(text).lower())
+    return {" ".join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))} if words else set()
+
+
+def jaccard(first: Set[str], second: Set[str]) -> float:
+    if not first and not second:
+        return 1.0
+    common = len(first & second)
+    return common / (len(first) + len(second) - common)
+
+
+class MinHasher:
+    """Signatures of NUM_PERM independent 32-bit hash functions; the same seed gives the same signatures.
+
+    One SHAKE-128 digest per shingle supplies all NUM_PERM hash values at once, and
+    the per-position minimum is taken in C, so a signature costs one hash per
+    shingle rather than one per shingle and permutation.
+    """
+
+    def __init__(self, num_perm: int = NUM_PERM, bands: int = BANDS, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._seed = f"{seed}:".encode()
+
+    def _hashes(self, shingle: str) -> array:
+        return array("I", hashlib.shake_128(self._seed + shingle.encode()).digest(4 * self.num_perm))
+
+    def signature(self, features: Set[str]) -> Tuple[int, ...]:
+        if not features:
+            return (_EMPTY,) * self.num_perm
+        return tuple(map(min, zip(*map(self._hashes, features))))
+
+    def band_keys(self, signature: Tuple[int, ...]) -> List[Tuple[int, ...]]:
+        """One key per band; texts with an equal key in any band are candidates."""
+        return [(band,) + signature[band * self.rows:(band + 1) * self.rows] for band in range(self.bands)]
+
+
+def near_duplicates(texts: Iterable[str], threshold: float, hasher: MinHasher = None) -> List[List[int]]:
+    """Group texts whose shingle sets have Jaccard similarity >= threshold.
+
+    Every text is in exactly one cluster, a list of indexes in ascending order;
+    clusters are ordered by their first index. Clusters are transitive: if A
+    matches B and B matches C, all three are in one cluster.
+    """
+    hasher = hasher or MinHasher()
+    sets = [shingles(text) for text in texts]
+    parent = list(range(len(sets)))
+
+    def find(index: int) -> int:
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    buckets: Dict[Tuple[int, ...], List[int]] = {}
+    for index, features in enumerate(sets):
+        candidates: Set[int] = set()
+        for key in hasher.band_keys(hasher.signature(features)):
+            members = buckets.setdefault(key, [])
+            candidates.update(members)
+            members.append(index)
+        root = index
+        for other in sorted(candidates):
+            # Already in this text's cluster through an earlier match: nothing to compare
+            other_root = find(other)
+            if other_root != root and jaccard(features, sets[other]) >= threshold:
+                parent[root] = other_root
+                root = other_root
+
+    clusters: Dict[int, List[int]] = {}
+    for index in range(len(sets)):
+        clusters.setdefault(find(index), []).append(index)
+    return list(clusters.values())
@@ -0,0 +1,44 @@
+"""Load the node scripts by name.
+
+The nodes live in directories with spaces in their names (and the FS node script
+has no .py extension), so they cannot be imported as packages. ``load_node`` puts
+the node directory on sys.path and loads the script under a fixed module name,
+so sibling imports such as ``from BrdNode import ...`` resolve to the same module.
+"""
+import importlib.machinery
+import importlib.util
+import os
+import sys
+from types import ModuleType
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name -> (directory, script, module name)
+NODES = {
+    "brd": ("BRD Node", "BrdNode.py", "BrdNode"),
+    "brd-batch": ("BRD Node", "batch_brd.py", "batch_brd"),
+    "user-stories": ("User Story Node", "userstory_node.py", "userstory_node"),
+    "fdd": ("FS Node", "Functional Design Document", "functional_design_document"),
+    "code-doc": ("Code doc Node", "app.py", "app"),
+    "pipeline": (".", "sdlc_pipeline.py", "sdlc_pipeline"),
+    "service": (".", "sdlc_service.py", "sdlc_service"),
+}
+
+
+def load_node(name: str) -> ModuleType:
+    directory, script, module_name = NODES[name]
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    node_dir = os.path.join(REPO_ROOT, directory)
+    if node_dir not in sys.path:
+        sys.path.insert(0, node_dir)
+    loader = importlib.machinery.SourceFileLoader(module_name, os.path.join(node_dir, script))
+    spec = importlib.util.spec_from_loader(module_name, loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    try:
+        loader.exec_module(module)
+    except BaseException:
+        del sys.modules[module_name]
+        raise
+    return module
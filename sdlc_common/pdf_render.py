@@ -0,0 +1,210 @@
+"""Markdown to PDF rendering shared by the BRD, User Story, FS and Code doc nodes.
+
+The Markdown is parsed once into blocks (headings, paragraphs, lists, tables and
+code blocks) which map onto reportlab flowables that split across pages, so very
+long documents and tables render without special handling. Styles are built once
+per process.
+"""
+import re
+from typing import List, Optional, Sequence, Tuple
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_LEFT
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import (
+    HRFlowable,
+    LongTable,
+    Paragraph,
+    Preformatted,
+    SimpleDocTemplate,
+    Spacer,
+    TableStyle,
+)
+
+_styles = None
+
+HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+BULLET = re.compile(r"^(\s*)[-*+]\s+(.*)$")
+ORDERED = re.compile(r"^(\s*)\d+[.)]\s+(.*)$")
+TABLE_ROW = re.compile(r"^\s*\|.*\|\s*$")
+TABLE_DIVIDER = re.compile(r"^\s*\|?\s*:?-{2,}:?\s*(\|\s*:?-{2,}:?\s*)*\|?\s*$")
+RULE = re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$")
+
+CELL_PADDING = 12  # default left + right cell padding
+MARKDOWN_CHARS = re.compile(r"[*_`\[<>&\n]")
+
+TABLE_STYLE = TableStyle([
+    ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
+    ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
+    ("BACKGROUND", (0, 1), (-1, -1), colors.beige),
+    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+    ("FONTSIZE", (0, 0), (-1, -1), 8),
+    ("LEADING", (0, 0), (-1, -1), 10),
+    ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
+    ("VALIGN", (0, 0), (-1, -1), "TOP"),
+    ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
+])
+
+
+def get_styles() -> dict:
+    """Paragraph styles, built on first use and shared afterwards."""
+    global _styles
+    if _styles is None:
+        sheet = getSampleStyleSheet()
+        styles = {name: sheet[name] for name in ("Title", "Normal", "Heading1", "Heading2", "Heading3", "Heading4", "Heading5", "Heading6")}
+        styles["Bullet"] = ParagraphStyle("MDBullet", parent=sheet["Normal"], leftIndent=18, bulletIndent=6)
+        styles["Code"] = ParagraphStyle("MDCode", parent=sheet["Code"], fontSize=8, leading=10)
+        styles["TableCell"] = ParagraphStyle("MDTableCell", parent=sheet["Normal"], fontSize=8, leading=10, alignment=TA_LEFT)
+        styles["TableHeader"] = ParagraphStyle(
+            "MDTableHeader", parent=styles["TableCell"], fontName="Helvetica-Bold", textColor=colors.whitesmoke
+        )
+        _styles = styles
+    return _styles
+
+
+def inline_markup(text: str) -> str:
+    """Escape text for reportlab and convert inline Markdown (bold, italic, code, links)."""
+    text = text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    text = re.sub(r"`([^`]+)`", r'<font name="Courier">\1</font>', text)
+    text = re.sub(r"\*\*(.+?)\*\*|__(.+?)__", lambda m: f"<b>{m.group(1) or m.group(2)}</b>", text)
+    text = re.sub(r"(?<![\w*])\*(?!\s)(.+?)(?<!\s)\*(?![\w*])", r"<i>\1</i>", text)
+    text = re.sub(r"\[([^\]]+)\]\(([^)\s]+)\)", r'<link href="\2">\1</link>', text)
+    return text
+
+
+def _table_cells(line: str) -> List[str]:
+    return [cell.strip() for cell in line.strip().strip("|").split("|")]
+
+
+def parse_markdown(text: str) -> List[Tuple]:
+    """Parse Markdown into blocks.
+
+    Blocks: ("heading", level, text), ("paragraph", text), ("list", ordered, [items]),
+    ("table", [rows]), ("code", text) and ("rule",).
+    """
+    blocks: List[Tuple] = []
+    lines = text.replace("\r\n", "\n").split("\n")
+    paragraph: List[str] = []
+    i = 0
+
+    def flush_paragraph():
+        if paragraph:
+            blocks.append(("paragraph", " ".join(paragraph)))
+            paragraph.clear()
+
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.strip()
+        if stripped.startswith("```"):
+            flush_paragraph()
+            code = []
+            i += 1
+            while i < len(lines) and not lines[i].strip().startswith("```"):
+                code.append(lines[i])
+                i += 1
+            blocks.append(("code", "\n".join(code)))
+        elif not stripped:
+            flush_paragraph()
+        elif HEADING.match(stripped):
+            flush_paragraph()
+            match = HEADING.match(stripped)
+            blocks.append(("heading", len(match.group(1)), match.group(2)))
+        elif RULE.match(stripped):
+            flush_paragraph()
+            blocks.append(("rule",))
+        elif TABLE_ROW.match(line) and i + 1 < len(lines) and TABLE_DIVIDER.match(lines[i + 1]):
+            flush_paragraph()
+            rows = [_table_cells(line)]
+            i += 2
+            while i < len(lines) and TABLE_ROW.match(lines[i]):
+                rows.append(_table_cells(lines[i]))
+                i += 1
+            blocks.append(("table", rows))
+            continue
+        elif BULLET.match(line) or ORDERED.match(line):
+            flush_paragraph()
+            ordered = bool(ORDERED.match(line))
+            items = []
+            while i < len(lines) and (BULLET.match(lines[i]) or ORDERED.match(lines[i]) or (items and lines[i].startswith("  ") and lines[i].strip())):
+                match = BULLET.match(lines[i]) or ORDERED.match(lines[i])
+                if match:
+                    items.append(match.group(2))
+                else:
+                    items[-1] += " " + lines[i].strip()
+                i += 1
+            blocks.append(("list", ordered, items))
+            continue
+        else:
+            paragraph.append(stripped)
+        i += 1
+    flush_paragraph()
+    return blocks
+
+
+def table_flowable(rows: Sequence[Sequence[str]], col_widths: Optional[Sequence[float]] = None, markup: bool = True) -> LongTable:
+    """Splittable table whose header row repeats on every page.
+
+    Cells that fit on one line and contain no markup are drawn as plain strings;
+    only the rest pay for Paragraph parsing and line wrapping. With markup=False
+    long cells are pre-wrapped into plain lines instead, which is several times
+    cheaper to lay out for tables with thousands of rows.
+    """
+    styles = get_styles()
+    width = max(len(row) for row in rows)
+    if col_widths is None:
+        col_widths = [(letter[0] - 2 * inch) / width] * width
+    data = []
+    for r, row in enumerate(rows):
+        font = "Helvetica-Bold" if r == 0 else "Helvetica"
+        style = styles["TableHeader" if r == 0 else "TableCell"]
+        cells = []
+        for c, cell in enumerate(row):
+            cell = str(cell)
+            if not markup:
+                cells.append("\n".join(simpleSplit(cell, font, 8, col_widths[c] - CELL_PADDING)))
+            elif not MARKDOWN_CHARS.search(cell) and stringWidth(cell, font, 8) <= col_widths[c] - CELL_PADDING:
+                cells.append(cell)
+            else:
+                cells.append(Paragraph(inline_markup(cell), style))
+        data.append(cells + [""] * (width - len(row)))
+    table = LongTable(data, colWidths=col_widths, repeatRows=1, splitByRow=1)
+    table.setStyle(TABLE_STYLE)
+    return table
+
+
+def markdown_to_flowables(text: str, title: Optional[str] = None) -> list:
+    styles = get_styles()
+    elements = [Paragraph(inline_markup(title), styles["Title"])] if title else []
+    for block in parse_markdown(text):
+        kind = block[0]
+        if kind == "heading":
+            elements.append(Paragraph(inline_markup(block[2]), styles[f"Heading{block[1]}"]))
+        elif kind == "paragraph":
+            elements.append(Paragraph(inline_markup(block[1]), styles["Normal"]))
+        elif kind == "list":
+            # One bulleted Paragraph per item is much cheaper to lay out than a ListFlowable
+            for number, item in enumerate(block[2], start=1):
+                bullet = f"{number}." if block[1] else "\u2022"
+                elements.append(Paragraph(inline_markup(item), styles["Bullet"], bulletText=bullet))
+        elif kind == "table":
+            elements.append(table_flowable(block[1]))
+            elements.append(Spacer(1, 6))
+        elif kind == "code":
+            elements.append(Preformatted(block[1], styles["Code"]))
+        elif kind == "rule":
+            elements.append(HRFlowable(width="100%", color=colors.grey))
+    return elements
+
+
+def build_pdf(pdf_path: str, elements: list) -> str:
+    SimpleDocTemplate(pdf_path, pagesize=letter).build(elements)
+    return pdf_path
+
+
+def render_markdown_pdf(pdf_path: str, markdown: str, title: Optional[str] = None) -> str:
+    """Render a Markdown document to pdf_path and return the path."""
+    return build_pdf(pdf_path, markdown_to_flowables(markdown, title))
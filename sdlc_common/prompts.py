@@ -0,0 +1,23 @@
+"""Prompt pieces shared by the nodes.
+
+Providers cache prompt prefixes: the OpenAI API reuses the longest previously
+seen prefix of a prompt of 1024+ tokens, in 128-token steps, and bills it at a
+discount. Requests about one project therefore start with the same BRD context
+message, byte for byte, and put their node-specific instructions after it. The
+user story calls for every work unit and the FDD draft of a pipeline run all
+share that prefix.
+"""
+from langchain_core.messages import SystemMessage
+
+# Shorter prompts are not cached by the provider (OpenAI: 1024 tokens, about 4 characters each)
+PROMPT_CACHE_MIN_CHARS = 4096
+
+
+def brd_context(brd: str) -> SystemMessage:
+    """First message of every request about a project: its BRD (Markdown, or the User Story node's JSON fields)."""
+    return SystemMessage(content=f"BRD of the SAP project:\n\n{brd.strip()}")
+
+
+def cacheable(brd: str) -> bool:
+    """Whether the BRD context alone is long enough for the provider to cache it."""
+    return len(brd) >= PROMPT_CACHE_MIN_CHARS
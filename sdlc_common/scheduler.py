@@ -0,0 +1,298 @@
+"""Rate-limit-aware scheduling and retries for every LLM call.
+
+Every call through ``CachedLLM`` or ``cached_call`` on a cache miss first takes
+budget from two token buckets per model: requests per minute and tokens per
+minute. The token cost is estimated from the prompt plus a completion reserve
+and settled against the reported usage afterwards. Callers wait in priority
+order, so interactive uploads go before pipeline runs and pipeline runs go before
+batch jobs. The priority comes from the surrounding ``with priority(...)`` block.
+
+Failed calls are retried with full-jitter exponential backoff when the error is
+retryable (429, 408, 5xx, timeouts, connection errors). A provider Retry-After
+pauses the whole model for every caller, so they do not all retry at once.
+Queue depth, budget waits and 429s are exported through sdlc_common.tracing.
+
+A call made inside ``with cancellable(event):`` gives up once the event is set:
+while it is waiting for budget, between retries, or between streamed chunks.
+Hedged requests use this to stop the losing provider call.
+
+Configuration (environment variables):
+    LLM_RATE_LIMITS          JSON {"model": {"rpm": 300, "tpm": 150000}}; models without an entry are not throttled
+    LLM_COMPLETION_RESERVE   tokens reserved for a completion before its size is known (default: 1000)
+    LLM_MAX_ATTEMPTS         attempts per call, including the first (default: 5)
+    LLM_BACKOFF_BASE         first backoff ceiling in seconds, doubled per attempt (default: 1)
+    LLM_BACKOFF_MAX          backoff ceiling in seconds (default: 30)
+"""
+import contextvars
+import heapq
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from sdlc_common import tracing
+
+INTERACTIVE, NORMAL, BATCH = 0, 1, 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", NORMAL: "normal", BATCH: "batch"}
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+RETRYABLE_ERRORS = (
+    "RateLimit", "TooManyRequests", "ResourceExhausted", "Timeout", "APIConnection",
+    "ServiceUnavailable", "InternalServerError", "ConnectionError",
+)
+
+_priority: contextvars.ContextVar = contextvars.ContextVar("sdlc_llm_priority", default=NORMAL)
+_cancel: contextvars.ContextVar = contextvars.ContextVar("sdlc_llm_cancel", default=None)
+
+
+class Cancelled(Exception):
+    """The call's cancel event was set before it finished."""
+
+
+@contextmanager
+def priority(level: int) -> Iterator[None]:
+    """Run the block's LLM calls in the given priority class (INTERACTIVE, NORMAL or BATCH)."""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+@contextmanager
+def cancellable(event: threading.Event) -> Iterator[None]:
+    """Stop the block's LLM calls when ``event`` is set (see ModelScheduler.wake)."""
+    token = _cancel.set(event)
+    try:
+        yield
+    finally:
+        _cancel.reset(token)
+
+
+def _check_cancelled() -> None:
+    event = _cancel.get()
+    if event is not None and event.is_set():
+        raise Cancelled("LLM call cancelled")
+
+
+class TokenBucket:
+    """Holds up to ``per_minute`` units, refilled continuously; None means unlimited."""
+
+    def __init__(self, per_minute: Optional[float]):
+        self.capacity = per_minute
+        self.level = per_minute or 0.0
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.capacity / 60)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        if self.capacity is None:
+            return 0.0
+        self._refill(now)
+        # A request larger than the whole budget only waits for a full bucket
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.level) * 60 / self.capacity)
+
+    def take(self, amount: float) -> None:
+        if self.capacity is not None:
+            self.level -= amount
+
+    def give_back(self, amount: float) -> None:
+        # Negative amounts charge usage above the reservation; the level may go below zero
+        if self.capacity is not None:
+            self.level = min(self.capacity, self.level + amount)
+
+
+class ModelScheduler:
+    """Budget, priority queue and retry policy for one model."""
+
+    def __init__(self, model: str, rpm: Optional[float] = None, tpm: Optional[float] = None):
+        self.model = model
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.paused_until = 0.0
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._sequence = itertools.count()
+
+    def _publish_depth(self) -> None:
+        counts = {level: 0 for level in PRIORITY_NAMES}
+        for level, _ in self._waiting:
+            counts[level] += 1
+        for level, count in counts.items():
+            tracing.metrics.set("sdlc_llm_queue_depth", count, model=self.model, priority=PRIORITY_NAMES[level])
+
+    def acquire(self, tokens: float, level: int) -> float:
+        """Block until this call may start; returns the time spent waiting."""
+        start = time.monotonic()
+        ticket = (level, next(self._sequence))
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            self._publish_depth()
+            while True:
+                try:
+                    _check_cancelled()
+                except Cancelled:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                    self._publish_depth()
+                    self._cond.notify_all()
+                    raise
+                if self._waiting[0] != ticket:
+                    self._cond.wait()
+                    continue
+                now = time.monotonic()
+                wait = max(self.paused_until - now, self.requests.wait_time(1, now), self.tokens.wait_time(tokens, now))
+                if wait <= 0:
+                    break
+                self._cond.wait(wait)
+            self.requests.take(1)
+            self.tokens.take(tokens)
+            heapq.heappop(self._waiting)
+            self._publish_depth()
+            self._cond.notify_all()
+        waited = time.monotonic() - start
+        tracing.metrics.observe("sdlc_llm_scheduler_wait_seconds", waited, model=self.model, priority=PRIORITY_NAMES[level])
+        return waited
+
+    def settle(self, reserved: float, used: float) -> None:
+        """Return unused reserved tokens, or charge the overrun."""
+        with self._cond:
+            self.tokens.give_back(reserved - used)
+            self._cond.notify_all()
+
+    def wake(self) -> None:
+        """Let waiting callers re-check their cancel events."""
+        with self._cond:
+            self._cond.notify_all()
+
+    def pause(self, seconds: float) -> None:
+        with self._cond:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self._cond.notify_all()
+
+    def backoff(self, error: Exception, attempt: int) -> float:
+        """Delay before the next attempt; a Retry-After pauses every caller of this model."""
+        status = status_code(error)
+        if status == 429 or any(name in type(error).__name__ for name in ("RateLimit", "TooManyRequests", "ResourceExhausted")):
+            tracing.metrics.inc("sdlc_llm_rate_limited_total", model=self.model)
+        base = float(os.getenv("LLM_BACKOFF_BASE", "1"))
+        ceiling = float(os.getenv("LLM_BACKOFF_MAX", "30"))
+        delay = random.uniform(0, min(ceiling, base * 2 ** attempt))
+        wait = retry_after(error)
+        if wait is not None:
+            self.pause(wait)
+            delay += wait
+        return delay
+
+    def call(self, fn: Callable[[], Any], tokens: float, span: Optional[dict] = None) -> Any:
+        attempts = int(os.getenv("LLM_MAX_ATTEMPTS", "5"))
+        level = _priority.get()
+        for attempt in range(attempts):
+            waited = self.acquire(tokens, level)
+            if span is not None:
+                span["rate_limit_wait_seconds"] = round(span.get("rate_limit_wait_seconds", 0.0) + waited, 4)
+            try:
+                return fn()
+            except Exception as e:
+                self.settle(tokens, 0)
+                if attempt == attempts - 1 or not is_retryable(e):
+                    raise
+                tracing.record_retry()
+                time.sleep(self.backoff(e, attempt))
+
+    def stream(
+        self, fn: Callable[[], Iterator[Any]], tokens: float, span: Optional[dict] = None,
+        used: Optional[Callable[[List[Any]], float]] = None,
+    ) -> Iterator[Any]:
+        """Like call() for a streaming response; only retried while nothing has been yielded.
+
+        Each attempt settles its reservation however it ends: completed, failed, cancelled, or
+        closed early by the consumer. An attempt that received nothing is refunded. Otherwise it is
+        charged ``used(chunks)``, the tokens billed for the chunks received so far; without
+        ``used`` the whole reservation is kept.
+        """
+        attempts = int(os.getenv("LLM_MAX_ATTEMPTS", "5"))
+        level = _priority.get()
+        for attempt in range(attempts):
+            waited = self.acquire(tokens, level)
+            if span is not None:
+                span["rate_limit_wait_seconds"] = round(span.get("rate_limit_wait_seconds", 0.0) + waited, 4)
+            chunks: List[Any] = []
+            try:
+                for chunk in fn():
+                    # Counted before the cancel check: the provider has already sent it
+                    chunks.append(chunk)
+                    _check_cancelled()
+                    yield chunk
+                return
+            except Exception as e:
+                if chunks or attempt == attempts - 1 or not is_retryable(e):
+                    raise
+                error = e
+            finally:
+                # Also runs on GeneratorExit when the consumer stops reading
+                self.settle(tokens, (used(chunks) if used is not None else tokens) if chunks else 0)
+            tracing.record_retry()
+            time.sleep(self.backoff(error, attempt))
+
+
+def status_code(error: Exception) -> Optional[int]:
+    for source in (error, getattr(error, "response", None)):
+        for attribute in ("status_code", "code", "status"):
+            value = getattr(source, attribute, None)
+            if isinstance(value, int):
+                return value
+    return None
+
+
+def is_retryable(error: Exception) -> bool:
+    status = status_code(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    return any(name in type(error).__name__ for name in RETRYABLE_ERRORS)
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds from a Retry-After header (delta or HTTP date) or attribute, if present."""
+    value = getattr(error, "retry_after", None)
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if value is None and headers is not None:
+        value = headers.get("retry-after") or headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(str(value)).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+_schedulers: Dict[str, ModelScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(model: str) -> ModelScheduler:
+    with _schedulers_lock:
+        if model not in _schedulers:
+            limits = json.loads(os.getenv("LLM_RATE_LIMITS", "{}")).get(model, {})
+            _schedulers[model] = ModelScheduler(model, limits.get("rpm"), limits.get("tpm"))
+        return _schedulers[model]
+
+
+def completion_reserve(params: Optional[Dict[str, Any]] = None) -> int:
+    for key in ("max_tokens", "max_completion_tokens", "max_output_tokens"):
+        value = (params or {}).get(key)
+        if isinstance(value, int):
+            return value
+    return int(os.getenv("LLM_COMPLETION_RESERVE", "1000"))
@@ -0,0 +1,236 @@
+"""Similarity cache for whole generated artifacts (BRDs, user stories, ABAP documentation).
+
+The response cache in llm_cache only matches byte-identical prompts (after
+whitespace normalization). Requests that differ in comments, project naming
+or trivial wording miss it and regenerate from scratch. This cache works one
+level up: a node canonicalizes its request (e.g. ABAP without comments, BRD
+fields lower-cased and sorted) and looks it up by similarity. The request text
+is indexed with MinHash-LSH (sdlc_common.minhash). A candidate matches when the
+Jaccard similarity of its word shingles reaches the caller's threshold. Each
+node decides what to do with a match: return the stored artifact, or use it as
+a draft that is checked and patched.
+
+Entries are evicted by age and, least recently used first, beyond
+SEMANTIC_CACHE_MAX_ENTRIES. Lookups are counted per kind and result (hit, draft,
+miss) in sdlc_semantic_cache_lookups_total, with the current hit rate in the
+sdlc_semantic_cache_hit_rate gauge.
+
+Configuration (environment variables):
+    SEMANTIC_CACHE                  set to 1 to enable (default: off)
+    SEMANTIC_CACHE_PATH             database file (default: <repo>/.llm_cache/semantic.sqlite3)
+    SEMANTIC_CACHE_THRESHOLD        similarity at which a stored artifact is reused as is (default: 0.9)
+    SEMANTIC_CACHE_DRAFT_THRESHOLD  similarity at which it is still used as a draft, where a node supports it (default: 0.6)
+    SEMANTIC_CACHE_THRESHOLDS       JSON {"kind": threshold} overriding SEMANTIC_CACHE_THRESHOLD per kind
+    SEMANTIC_CACHE_MAX_ENTRIES      entries kept across all kinds (default: 2000)
+    SEMANTIC_CACHE_MAX_AGE_DAYS     entries older than this are dropped (default: 30)
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+from sdlc_common import tracing
+from sdlc_common.minhash import MinHasher, jaccard, shingles
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".llm_cache", "semantic.sqlite3")
+# Code that differs in more than comments, whitespace and case needs its own documentation, and a BRD
+# with one more scope item or objective needs stories for it: nothing checks cached stories for coverage
+DEFAULT_THRESHOLDS = {"abap_doc": 1.0, "user_stories": 1.0}
+
+
+def canonical_text(text: Any) -> str:
+    """Lower-case words only: punctuation, numbering and whitespace differences disappear."""
+    return " ".join(re.findall(r"[a-z0-9]+", str(text).lower()))
+
+
+def canonical_fields(fields: Dict[str, Any], exclude: Iterable[str] = ()) -> str:
+    """One "field: words" line per field, in key order; list items are sorted, so their order does not matter."""
+    lines = []
+    for name in sorted(set(fields) - set(exclude)):
+        value = fields[name]
+        if isinstance(value, (list, tuple)):
+            value = " | ".join(sorted(canonical_text(item) for item in value))
+        else:
+            value = canonical_text(value)
+        lines.append(f"{name}: {value}")
+    return "\n".join(lines)
+
+
+def threshold(kind: str) -> float:
+    """Similarity at which an artifact of this kind is reused as is."""
+    overrides = {**DEFAULT_THRESHOLDS, **json.loads(os.getenv("SEMANTIC_CACHE_THRESHOLDS", "{}"))}
+    return float(overrides.get(kind, os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9")))
+
+
+def draft_threshold() -> float:
+    return float(os.getenv("SEMANTIC_CACHE_DRAFT_THRESHOLD", "0.6"))
+
+
+class SemanticCache:
+    """SQLite store of (kind, canonical request, artifact) with an LSH band index."""
+
+    def __init__(self, path: Optional[str] = None, max_entries: Optional[int] = None, max_age_seconds: Optional[float] = None):
+        self.path = path or os.getenv("SEMANTIC_CACHE_PATH", DEFAULT_PATH)
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "2000"))
+        self.max_age_seconds = (
+            max_age_seconds if max_age_seconds is not None else float(os.getenv("SEMANTIC_CACHE_MAX_AGE_DAYS", "30")) * 86400
+        )
+        self.hasher = MinHasher()
+        self.counts: Dict[str, Dict[str, int]] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS entries (
+                    id INTEGER PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    digest TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    artifact TEXT NOT NULL,
+                    meta TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    UNIQUE (kind, digest)
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries(last_access)")
+            conn.execute("CREATE TABLE IF NOT EXISTS bands (kind TEXT NOT NULL, band TEXT NOT NULL, entry_id INTEGER NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS bands_lookup ON bands(kind, band)")
+            conn.execute("CREATE TABLE IF NOT EXISTS stats (kind TEXT NOT NULL, result TEXT NOT NULL, value INTEGER NOT NULL, PRIMARY KEY (kind, result))")
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; WAL lets several processes read while one writes
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _bands(self, text: str) -> list:
+        return ["".join(f"{value:08x}" for value in key) for key in self.hasher.band_keys(self.hasher.signature(shingles(text)))]
+
+    def _count(self, conn: sqlite3.Connection, kind: str, result: str) -> None:
+        with self._lock:
+            counts = self.counts.setdefault(kind, {"hit": 0, "draft": 0, "miss": 0})
+            counts[result] += 1
+            lookups = sum(counts.values())
+            hit_rate = counts["hit"] / lookups
+        conn.execute(
+            "INSERT INTO stats VALUES (?, ?, 1) ON CONFLICT (kind, result) DO UPDATE SET value = value + 1", (kind, result)
+        )
+        tracing.metrics.inc("sdlc_semantic_cache_lookups_total", kind=kind, result=result)
+        tracing.metrics.set("sdlc_semantic_cache_hit_rate", hit_rate, kind=kind)
+
+    def lookup(self, kind: str, text: str, min_similarity: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Most similar stored artifact at or above ``min_similarity`` (default: the kind's reuse threshold).
+
+        Returns {"artifact", "meta", "similarity", "reuse"}, where ``reuse`` is True
+        when the similarity also reaches the reuse threshold (otherwise the match is
+        only good as a draft), or None.
+        """
+        reuse_at = threshold(kind)
+        min_similarity = reuse_at if min_similarity is None else min(min_similarity, reuse_at)
+        now = time.time()
+        query = shingles(text)
+        bands = self._bands(text)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"""SELECT id, text, artifact, meta FROM entries WHERE created >= ? AND id IN (
+                        SELECT entry_id FROM bands WHERE kind = ? AND band IN ({",".join("?" * len(bands))}))""",
+                (now - self.max_age_seconds, kind, *bands),
+            ).fetchall()
+            best, best_score = None, 0.0
+            for row in rows:
+                score = jaccard(query, shingles(row[1]))
+                if score > best_score:
+                    best, best_score = row, score
+            if best is None or best_score < min_similarity:
+                self._count(conn, kind, "miss")
+                return None
+            conn.execute("UPDATE entries SET last_access = ? WHERE id = ?", (now, best[0]))
+            reuse = best_score >= reuse_at
+            self._count(conn, kind, "hit" if reuse else "draft")
+            return {"artifact": best[2], "meta": json.loads(best[3]), "similarity": best_score, "reuse": reuse}
+
+    def store(self, kind: str, text: str, artifact: str, meta: Optional[Dict[str, Any]] = None) -> None:
+        """Store the artifact generated for this canonical request, replacing one for the same text."""
+        now = time.time()
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        with self._connect() as conn:
+            old = conn.execute("SELECT id FROM entries WHERE kind = ? AND digest = ?", (kind, digest)).fetchone()
+            if old is not None:
+                conn.execute("DELETE FROM bands WHERE entry_id = ?", old)
+                conn.execute("DELETE FROM entries WHERE id = ?", old)
+            entry_id = conn.execute(
+                "INSERT INTO entries (kind, digest, text, artifact, meta, created, last_access) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (kind, digest, text, artifact, json.dumps(meta or {}), now, now),
+            ).lastrowid
+            conn.executemany("INSERT INTO bands VALUES (?, ?, ?)", [(kind, band, entry_id) for band in self._bands(text)])
+        self.evict()
+
+    def evict(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM entries WHERE created < ?", (time.time() - self.max_age_seconds,))
+            conn.execute(
+                "DELETE FROM entries WHERE id IN (SELECT id FROM entries ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            conn.execute("DELETE FROM bands WHERE entry_id NOT IN (SELECT id FROM entries)")
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM entries")
+            conn.execute("DELETE FROM bands")
+            conn.execute("DELETE FROM stats")
+
+    def stats(self) -> Dict[str, Any]:
+        """Entries and lookup results per kind, for this process and for the shared database."""
+        with self._connect() as conn:
+            entries = dict(conn.execute("SELECT kind, COUNT(*) FROM entries GROUP BY kind").fetchall())
+            persisted: Dict[str, Dict[str, int]] = {}
+            for kind, result, value in conn.execute("SELECT kind, result, value FROM stats"):
+                persisted.setdefault(kind, {})[result] = value
+        kinds = {}
+        for kind in sorted(set(entries) | set(persisted) | set(self.counts)):
+            counts = self.counts.get(kind, {})
+            totals = persisted.get(kind, {})
+            lookups = sum(totals.values())
+            kinds[kind] = {
+                "entries": entries.get(kind, 0),
+                "hits": counts.get("hit", 0),
+                "drafts": counts.get("draft", 0),
+                "misses": counts.get("miss", 0),
+                "total_hits": totals.get("hit", 0),
+                "total_drafts": totals.get("draft", 0),
+                "total_misses": totals.get("miss", 0),
+                "total_hit_rate": totals.get("hit", 0) / lookups if lookups else 0.0,
+            }
+        return {"path": self.path, "kinds": kinds}
+
+
+_default_cache: Optional[SemanticCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_semantic_cache() -> Optional[SemanticCache]:
+    """Process-wide semantic cache, or None unless SEMANTIC_CACHE=1."""
+    global _default_cache
+    if os.getenv("SEMANTIC_CACHE") != "1":
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = SemanticCache()
+        return _default_cache
+
+
+if __name__ == "__main__":
+    print(json.dumps(SemanticCache().stats(), indent=2))
@@ -0,0 +1,67 @@
+import pytest
+
+from sdlc_common.minhash import MinHasher, jaccard, near_duplicates, shingles
+
+# 100 distinct words: changing one word changes 3 of its 98 shingles
+WORDS = [f"word{index}" for index in range(100)]
+
+
+def text(words=WORDS):
+    return " ".join(words)
+
+
+def edited(*positions):
+    return text([f"changed{index}" if index in positions else word for index, word in enumerate(WORDS)])
+
+
+def test_shingles_are_lowercase_word_runs():
+    assert shingles("Migrate the  KNA1 table, then VBAK.") == {"migrate the kna1", "the kna1 table", "kna1 table then", "table then vbak"}
+    assert shingles("Two words") == {"two words"}
+    assert shingles("  ...  ") == set()
+
+
+def test_jaccard():
+    assert jaccard({"a", "b", "c"}, {"b", "c", "d"}) == 0.5
+    assert jaccard(set(), set()) == 1.0
+    assert jaccard({"a"}, set()) == 0.0
+
+
+def test_signatures_depend_only_on_the_shingles_and_the_seed():
+    features = shingles(text())
+
+    assert MinHasher().signature(features) == MinHasher().signature(set(features))
+    assert MinHasher(seed=2).signature(features) != MinHasher().signature(features)
+    assert len(MinHasher().band_keys(MinHasher().signature(features))) == 16
+
+
+def test_signature_agreement_estimates_jaccard():
+    hasher = MinHasher(num_perm=256, bands=32)
+    first, second = shingles(text()), shingles(edited(*range(0, 100, 10)))
+    agreement = sum(a == b for a, b in zip(hasher.signature(first), hasher.signature(second))) / hasher.num_perm
+
+    assert agreement == pytest.approx(jaccard(first, second), abs=0.1)
+
+
+def test_bands_must_divide_the_permutations():
+    with pytest.raises(ValueError):
+        MinHasher(num_perm=64, bands=10)
+
+
+def test_near_duplicate_shares_a_band_and_unrelated_text_does_not():
+    hasher = MinHasher()
+    bands = set(hasher.band_keys(hasher.signature(shingles(text()))))
+    near = set(hasher.band_keys(hasher.signature(shingles(edited(50)))))
+    unrelated = set(hasher.band_keys(hasher.signature(shingles(" ".join(f"other{index}" for index in range(100))))))
+
+    assert bands & near
+    assert not bands & unrelated
+
+
+def test_near_duplicates_clusters_similar_texts_transitively():
+    unrelated = " ".join(f"other{index}" for index in range(100))
+    # 0 ~ 1 and 1 ~ 3, while 0 and 3 differ in more words than the threshold allows
+    texts = [edited(10, 11), edited(10, 11, 40, 41), unrelated, edited(40, 41, 70, 71)]
+
+    assert jaccard(shingles(texts[0]), shingles(texts[3])) < 0.8 <= jaccard(shingles(texts[1]), shingles(texts[3]))
+    assert near_duplicates(texts, 0.8) == [[0, 1, 3], [2]]
+    assert near_duplicates(texts, 0.99) == [[0], [1], [2], [3]]
@@ -0,0 +1,226 @@
+import threading
+import time
+from email.utils import formatdate
+
+import pytest
+
+from sdlc_common import scheduler
+from sdlc_common.scheduler import BATCH, INTERACTIVE, Cancelled, ModelScheduler, cancellable, priority
+
+
+class ProviderError(Exception):
+    def __init__(self, status_code=None, retry_after=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        if retry_after is not None:
+            self.retry_after = retry_after
+
+
+class Response:
+    def __init__(self, headers):
+        self.headers = headers
+
+
+class HeaderError(Exception):
+    def __init__(self, status_code, headers):
+        super().__init__(f"HTTP {status_code}")
+        self.response = Response(headers)
+        self.response.status_code = status_code
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setenv("LLM_BACKOFF_BASE", "0")
+    monkeypatch.setenv("LLM_MAX_ATTEMPTS", "3")
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        time.sleep(0.01)
+
+
+@pytest.mark.parametrize("status, retryable", [(408, True), (429, True), (500, True), (503, True), (400, False), (401, False), (409, False)])
+def test_is_retryable_by_status(status, retryable):
+    assert scheduler.is_retryable(ProviderError(status)) is retryable
+
+
+def test_is_retryable_by_error_name_without_status():
+    class RateLimitError(Exception):
+        pass
+
+    assert scheduler.is_retryable(RateLimitError())
+    assert not scheduler.is_retryable(ValueError("bad prompt"))
+
+
+def test_retry_after_from_attribute_header_and_http_date():
+    assert scheduler.retry_after(ProviderError(429, retry_after=7)) == 7.0
+    assert scheduler.retry_after(HeaderError(429, {"retry-after": "2.5"})) == 2.5
+    assert 25 < scheduler.retry_after(HeaderError(503, {"Retry-After": formatdate(time.time() + 30, usegmt=True)})) <= 30
+    assert scheduler.retry_after(HeaderError(429, {"retry-after": "soon"})) is None
+    assert scheduler.retry_after(ProviderError(500)) is None
+
+
+def test_backoff_is_full_jitter_within_the_ceiling(monkeypatch):
+    monkeypatch.setenv("LLM_BACKOFF_BASE", "1")
+    monkeypatch.setenv("LLM_BACKOFF_MAX", "5")
+    ceilings = []
+    monkeypatch.setattr(scheduler.random, "uniform", lambda low, high: ceilings.append((low, high)) or high)
+    model = ModelScheduler("test-backoff")
+
+    delays = [model.backoff(ProviderError(500), attempt) for attempt in range(5)]
+
+    assert ceilings == [(0, 1), (0, 2), (0, 4), (0, 5), (0, 5)]
+    assert delays == [1, 2, 4, 5, 5]
+
+
+def test_retry_after_pauses_every_caller_of_the_model(monkeypatch):
+    monkeypatch.setattr(scheduler.random, "uniform", lambda low, high: 0.0)
+    model = ModelScheduler("test-pause")
+
+    delay = model.backoff(ProviderError(429, retry_after=0.3), attempt=0)
+
+    assert delay == pytest.approx(0.3)
+    # Another caller now waits for the pause even though the buckets are unlimited
+    assert model.acquire(1, INTERACTIVE) >= 0.25
+
+
+def test_call_retries_retryable_errors_and_refunds_failed_attempts():
+    model = ModelScheduler("test-call", tpm=10_000)
+    outcomes = iter([ProviderError(503), ProviderError(429), "answer"])
+
+    def fn():
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert model.call(fn, tokens=1_000) == "answer"
+    # Two refunded attempts; the successful one stays reserved until the caller settles it
+    assert model.tokens.level == pytest.approx(9_000)
+
+
+def test_call_does_not_retry_a_conflict():
+    model = ModelScheduler("test-conflict")
+    calls = []
+
+    def fn():
+        calls.append(1)
+        raise ProviderError(409)
+
+    with pytest.raises(ProviderError):
+        model.call(fn, tokens=10)
+    assert len(calls) == 1
+
+
+def test_call_gives_up_after_max_attempts():
+    model = ModelScheduler("test-attempts")
+    calls = []
+
+    def fn():
+        calls.append(1)
+        raise ProviderError(500)
+
+    with pytest.raises(ProviderError):
+        model.call(fn, tokens=10)
+    assert len(calls) == 3
+
+
+def test_waiting_callers_start_in_priority_order():
+    model = ModelScheduler("test-priority", rpm=6)
+    model.requests.level = 0
+    started, cancel_batch = [], threading.Event()
+
+    def caller(level, name, event=None):
+        with priority(level), cancellable(event or threading.Event()):
+            try:
+                model.acquire(1, scheduler._priority.get())
+                started.append(name)
+            except Cancelled:
+                started.append(f"{name} cancelled")
+
+    batch = threading.Thread(target=caller, args=(BATCH, "batch", cancel_batch))
+    batch.start()
+    wait_until(lambda: len(model._waiting) == 1)
+    interactive = threading.Thread(target=caller, args=(INTERACTIVE, "interactive"))
+    interactive.start()
+    wait_until(lambda: len(model._waiting) == 2)
+
+    # Budget for a single request: the interactive caller gets it although it came second
+    with model._cond:
+        model.requests.level = 1
+        model._cond.notify_all()
+    interactive.join(5)
+    assert started == ["interactive"]
+
+    cancel_batch.set()
+    model.wake()
+    batch.join(5)
+    assert started == ["interactive", "batch cancelled"]
+    assert model._waiting == []
+
+
+def chunks_of(*texts, fail_with=None):
+    def fn():
+        for text in texts:
+            yield text
+        if fail_with is not None:
+            raise fail_with
+    return fn
+
+
+def used(chunks):
+    return 100 * len(chunks)
+
+
+def test_stream_settles_with_the_tokens_used_on_completion():
+    model = ModelScheduler("test-stream", tpm=10_000)
+
+    assert list(model.stream(chunks_of("a", "b"), tokens=1_000, used=used)) == ["a", "b"]
+    assert model.tokens.level == pytest.approx(9_800)
+
+
+def test_stream_settles_when_the_consumer_stops_early():
+    model = ModelScheduler("test-stream-close", tpm=10_000)
+
+    stream = model.stream(chunks_of("a", "b", "c"), tokens=1_000, used=used)
+    assert next(stream) == "a"
+    stream.close()
+
+    assert model.tokens.level == pytest.approx(9_900)
+
+
+def test_stream_charges_what_was_streamed_before_a_failure():
+    model = ModelScheduler("test-stream-fail", tpm=10_000)
+
+    stream = model.stream(chunks_of("a", "b", fail_with=ProviderError(503)), tokens=1_000, used=used)
+    with pytest.raises(ProviderError):
+        list(stream)
+
+    # Not retried once something was yielded, and not refunded either
+    assert model.tokens.level == pytest.approx(9_800)
+
+
+def test_stream_retries_and_refunds_attempts_that_streamed_nothing():
+    model = ModelScheduler("test-stream-retry", tpm=10_000)
+    attempts = iter([chunks_of(fail_with=ProviderError(429)), chunks_of("a")])
+
+    assert list(model.stream(lambda: next(attempts)(), tokens=1_000, used=used)) == ["a"]
+    assert model.tokens.level == pytest.approx(9_900)
+
+
+def test_stream_stops_between_chunks_when_cancelled():
+    model = ModelScheduler("test-stream-cancel", tpm=10_000)
+    event = threading.Event()
+
+    with cancellable(event):
+        stream = model.stream(chunks_of("a", "b", "c"), tokens=1_000, used=used)
+        assert next(stream) == "a"
+        event.set()
+        with pytest.raises(Cancelled):
+            next(stream)
+
+    # "b" had already arrived from the provider when the cancel was noticed
+    assert model.tokens.level == pytest.approx(9_800)
@@ -0,0 +1,132 @@
+import pytest
+
+from sdlc_common import semantic_cache
+from sdlc_common.semantic_cache import SemanticCache, canonical_fields, get_semantic_cache, threshold
+
+WORDS = [f"word{index}" for index in range(100)]
+
+
+def text(*changed):
+    return " ".join(f"changed{index}" if index in changed else word for index, word in enumerate(WORDS))
+
+
+def unrelated(prefix):
+    return " ".join(f"{prefix}{index}" for index in range(100))
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    for name in ("SEMANTIC_CACHE_THRESHOLD", "SEMANTIC_CACHE_THRESHOLDS"):
+        monkeypatch.delenv(name, raising=False)
+    return SemanticCache(str(tmp_path / "semantic.sqlite3"))
+
+
+def test_canonical_fields_ignore_case_punctuation_and_list_order():
+    first = canonical_fields({"scope": "Oracle -> Redshift!", "items": ["Tables", "Procedures"], "name": "Atlas"}, exclude=("name",))
+    second = canonical_fields({"items": ["procedures", "TABLES"], "scope": "oracle redshift"})
+
+    assert first == second == "items: procedures | tables\nscope: oracle redshift"
+
+
+def test_thresholds_per_kind(monkeypatch):
+    monkeypatch.delenv("SEMANTIC_CACHE_THRESHOLD", raising=False)
+    monkeypatch.setenv("SEMANTIC_CACHE_THRESHOLDS", '{"brd": 0.8}')
+
+    assert threshold("brd") == 0.8
+    assert threshold("user_stories") == 1.0
+    assert threshold("fdd") == 0.9
+    assert threshold("abap_doc") == 1.0
+
+
+def test_exact_and_near_duplicate_requests_hit(cache):
+    cache.store("brd", text(), "artifact", {"project_name": "Atlas"})
+
+    exact = cache.lookup("brd", text())
+    near = cache.lookup("brd", text(50))
+
+    assert exact == {"artifact": "artifact", "meta": {"project_name": "Atlas"}, "similarity": 1.0, "reuse": True}
+    assert near["reuse"] and 0.9 <= near["similarity"] < 1.0
+
+
+def test_less_similar_request_is_only_a_draft(cache):
+    cache.store("brd", text(), "artifact")
+    request = text(10, 30, 50, 70, 90)
+
+    assert cache.lookup("brd", request) is None
+    draft = cache.lookup("brd", request, 0.6)
+    assert not draft["reuse"] and 0.6 <= draft["similarity"] < 0.9
+
+
+def test_stories_are_not_reused_for_a_brd_with_another_scope_item(cache):
+    brd = {
+        "purpose": "The purpose of the oracle to redshift migration project is to modernize the technology stack and leverage AWS cloud capabilities to provide faster analytics and insights.",
+        "project_summary": "The project involves recreating the existing data warehouse from an on-premise Oracle database into AWS Redshift. This migration aims to enhance data processing capabilities and improve the efficiency of data analytics.",
+        "objectives": "1. Migrate all relevant tables from the Oracle database to AWS Redshift. 2.Convert and optimize all stored procedures for AWS Redshift.3. Implement data integration processes using AWS Glue and EMR. 4. Ensure data integrity and security during and after migration.",
+        "in_scope": "1. Table migration from Oracle to AWS Redshift. 2. Stored procedure migration to AWS Redshift.3. Data integration using AWS Glue and EMR.",
+        "out_scope": "1. Infrastructure setup for AWS Redshift. 2. Processing of Personally Identifiable Information (PII) data. 3. Administrative tasks unrelated to direct migration activities.",
+        "non_functional": "1. Performance: The system should handle queries at least 25 percent faster than the current Oracle setup. 2. Security: All data must be encrypted during transit and at rest.",
+    }
+    extended = dict(brd, in_scope=brd["in_scope"] + " 4. Reporting layer migration to Amazon QuickSight.")
+    reworded = {name: value.upper().replace(". ", ".  ") for name, value in brd.items()}
+    cache.store("user_stories", canonical_fields(brd), "[]")
+
+    # Similar enough for the generic reuse threshold, but the new scope item would get no stories
+    assert cache.lookup("user_stories", canonical_fields(extended), 0.9) is not None
+    assert cache.lookup("user_stories", canonical_fields(extended)) is None
+    assert cache.lookup("user_stories", canonical_fields(reworded))["reuse"]
+
+
+def test_unrelated_request_and_other_kinds_miss(cache):
+    cache.store("brd", text(), "artifact")
+
+    assert cache.lookup("brd", unrelated("other"), 0.1) is None
+    assert cache.lookup("user_stories", text()) is None
+    assert cache.stats()["kinds"]["brd"]["misses"] == 1
+    assert cache.stats()["kinds"]["user_stories"]["misses"] == 1
+
+
+def test_storing_the_same_request_replaces_its_artifact(cache):
+    cache.store("brd", text(), "first")
+    cache.store("brd", text(), "second")
+
+    assert cache.lookup("brd", text())["artifact"] == "second"
+    assert cache.stats()["kinds"]["brd"]["entries"] == 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    clock = iter(range(1_000_000, 2_000_000))
+    monkeypatch.setattr(semantic_cache.time, "time", lambda: next(clock))
+    cache = SemanticCache(str(tmp_path / "semantic.sqlite3"), max_entries=2)
+    cache.store("brd", text(), "a")
+    cache.store("brd", unrelated("second"), "b")
+    assert cache.lookup("brd", text())["artifact"] == "a"
+
+    cache.store("brd", unrelated("third"), "c")
+
+    assert cache.lookup("brd", text())["artifact"] == "a"
+    assert cache.lookup("brd", unrelated("second")) is None
+
+
+def test_entries_expire(tmp_path):
+    cache = SemanticCache(str(tmp_path / "semantic.sqlite3"), max_age_seconds=-1)
+    cache.store("brd", text(), "artifact")
+
+    assert cache.lookup("brd", text()) is None
+    assert cache.stats()["kinds"]["brd"]["entries"] == 0
+
+
+def test_stats_count_hits_drafts_and_misses(cache):
+    cache.store("brd", text(), "artifact")
+    cache.lookup("brd", text())
+    cache.lookup("brd", text(10, 30, 50, 70, 90), 0.6)
+    cache.lookup("brd", "unrelated request")
+
+    stats = cache.stats()["kinds"]["brd"]
+    assert (stats["hits"], stats["drafts"], stats["misses"]) == (1, 1, 1)
+    assert stats["total_hit_rate"] == pytest.approx(1 / 3)
+
+
+def test_disabled_unless_configured(monkeypatch):
+    monkeypatch.delenv("SEMANTIC_CACHE", raising=False)
+
+    assert get_semantic_cache() is None
@@ -0,0 +1,368 @@
+"""Latency, token and cost tracing for the SDLC pipelines.
+
+Graph nodes wrapped with ``traced_node`` and every LLM call made through
+``CachedLLM`` or ``cached_call`` record a span with wall time, time spent waiting
+for a worker thread, retries, prompt/completion tokens, cache hits and estimated
+cost. The spans of one pipeline run (``with trace("brd"):``) are appended to the
+trace file as a single JSON line. All spans also feed process-wide metrics that
+``render_metrics()`` exposes in Prometheus text format.
+
+Configuration (environment variables):
+    SDLC_TRACE_PATH      JSON-lines trace file (default: <repo>/.traces/traces.jsonl)
+    SDLC_TRACE_DISABLED  set to 1 to stop writing trace files (metrics are still collected)
+    LLM_PRICES           JSON {"model": [usd_per_1M_prompt, usd_per_1M_completion]} added to PRICES
+    LLM_CACHED_PROMPT_PRICE_FACTOR  price of a prompt token served from the provider's prompt cache,
+                         relative to an uncached one (default: 0.5)
+"""
+import contextvars
+import functools
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List
+
+DEFAULT_TRACE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".traces", "traces.jsonl"
+)
+
+# USD per one million prompt / completion tokens
+PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gemini-2.0-flash": (0.10, 0.40),
+}
+PRICES.update({model: tuple(price) for model, price in json.loads(os.getenv("LLM_PRICES", "{}")).items()})
+
+# Providers bill prompt tokens read from their prefix cache at a discount (gpt-4o: half price)
+CACHED_PROMPT_PRICE_FACTOR = float(os.getenv("LLM_CACHED_PROMPT_PRICE_FACTOR", "0.5"))
+
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+METRICS = {
+    "sdlc_pipeline_duration_seconds": ("histogram", "Wall time of a pipeline run"),
+    "sdlc_pipeline_queue_seconds": ("histogram", "Time a pipeline run waited in a job queue before starting"),
+    "sdlc_pipeline_runs_total": ("counter", "Pipeline runs by status"),
+    "sdlc_node_duration_seconds": ("histogram", "Wall time of a graph node"),
+    "sdlc_node_errors_total": ("counter", "Graph node executions that raised"),
+    "sdlc_retries_total": ("counter", "Retried LLM calls"),
+    "sdlc_llm_duration_seconds": ("histogram", "Wall time of an LLM call, including the cache lookup"),
+    "sdlc_llm_queue_seconds": ("histogram", "Time an LLM call waited for a worker thread"),
+    "sdlc_llm_requests_total": ("counter", "LLM calls by cache outcome"),
+    "sdlc_llm_errors_total": ("counter", "LLM calls that raised"),
+    "sdlc_llm_tokens_total": ("counter", "Prompt and completion tokens; cached_prompt is the part of prompt served from the provider's prompt cache"),
+    "sdlc_llm_cost_usd_total": ("counter", "Estimated LLM spend in USD"),
+    "sdlc_llm_queue_depth": ("gauge", "LLM calls waiting for rate-limit budget"),
+    "sdlc_llm_scheduler_wait_seconds": ("histogram", "Time an LLM call waited for rate-limit budget"),
+    "sdlc_llm_rate_limited_total": ("counter", "Provider responses that signalled rate limiting (429)"),
+    "sdlc_llm_hedge_total": ("counter", "Hedge-eligible LLM calls by outcome (not_hedged, primary, backup, failed)"),
+    "sdlc_llm_hedge_delay_seconds": ("gauge", "Current deadline before a backup request is sent"),
+    "sdlc_llm_hedge_saved_seconds": ("histogram", "Time saved when the backup answered before the primary"),
+    "sdlc_service_requests_total": ("counter", "Service requests by endpoint and status (ok, invalid, rejected, cancelled, error)"),
+    "sdlc_service_in_flight": ("gauge", "Graph runs in progress per service endpoint"),
+    "sdlc_service_waiting": ("gauge", "Service requests waiting for a concurrency slot"),
+    "sdlc_semantic_cache_lookups_total": ("counter", "Semantic cache lookups by artifact kind and result (hit, draft, miss)"),
+    "sdlc_semantic_cache_hit_rate": ("gauge", "Share of this process's semantic cache lookups that reused an artifact as is"),
+}
+
+_trace: contextvars.ContextVar = contextvars.ContextVar("sdlc_trace", default=None)
+_node: contextvars.ContextVar = contextvars.ContextVar("sdlc_node", default=None)
+_queued: contextvars.ContextVar = contextvars.ContextVar("sdlc_queued", default=0.0)
+_span_lock = threading.Lock()
+_export_lock = threading.Lock()
+
+
+class MetricsRegistry:
+    """Counters and histograms keyed by metric name and labels."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: Dict[tuple, Any] = {}
+
+    def inc(self, name: str, amount: float = 1.0, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set(self, name: str, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[(name, tuple(sorted(labels.items())))] = float(value)
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            # Cumulative bucket counts, then sum and count
+            histogram = self._values.setdefault(key, [0] * len(BUCKETS) + [0.0, 0])
+            for i, bound in enumerate(BUCKETS):
+                if value <= bound:
+                    histogram[i] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def render(self) -> str:
+        with self._lock:
+            values = {key: list(value) if isinstance(value, list) else value for key, value in self._values.items()}
+        lines = []
+        for name, (kind, description) in METRICS.items():
+            series = sorted((labels, value) for (metric, labels), value in values.items() if metric == name)
+            if not series:
+                continue
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in series:
+                if kind in ("counter", "gauge"):
+                    lines.append(f"{name}{_labels(labels)} {value:g}")
+                    continue
+                for bound, count in zip(BUCKETS, value):
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', f'{bound:g}'),))} {count}")
+                lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {value[-1]}")
+                lines.append(f"{name}_sum{_labels(labels)} {value[-2]:g}")
+                lines.append(f"{name}_count{_labels(labels)} {value[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    escaped = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        escaped.append(f'{key}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+metrics = MetricsRegistry()
+
+
+def render_metrics() -> str:
+    """All metrics collected by this process, in Prometheus text exposition format."""
+    return metrics.render()
+
+
+def context_labels() -> Dict[str, str]:
+    current_trace = _trace.get()
+    current_node = _node.get()
+    return {
+        "pipeline": current_trace["pipeline"] if current_trace else "",
+        "node": current_node["name"] if current_node else "",
+    }
+
+
+def _cost(model: str, prompt_tokens: int, completion_tokens: int, cached_prompt_tokens: int = 0) -> float:
+    prompt_price, completion_price = PRICES.get(model, (0.0, 0.0))
+    billed_prompt = prompt_tokens - cached_prompt_tokens * (1 - CACHED_PROMPT_PRICE_FACTOR)
+    return round((billed_prompt * prompt_price + completion_tokens * completion_price) / 1_000_000, 6)
+
+
+def _new_span(kind: str, name: str, **attrs: Any) -> dict:
+    queued = _queued.get()
+    if queued:
+        _queued.set(0.0)
+    return {
+        "kind": kind,
+        "name": name,
+        **context_labels(),
+        "started_at": time.time(),
+        "wall_seconds": 0.0,
+        "queue_seconds": round(queued, 4),
+        "error": None,
+        **attrs,
+    }
+
+
+def _finish(span: dict) -> None:
+    labels = {"pipeline": span["pipeline"], "node": span["node"]}
+    if span["kind"] == "node":
+        metrics.observe("sdlc_node_duration_seconds", span["wall_seconds"], **labels)
+        if span["error"]:
+            metrics.inc("sdlc_node_errors_total", **labels)
+    else:
+        model = span["model"]
+        metrics.observe("sdlc_llm_duration_seconds", span["wall_seconds"], model=model, **labels)
+        metrics.inc("sdlc_llm_requests_total", model=model, cache="hit" if span["cache_hit"] else "miss", **labels)
+        if span["queue_seconds"]:
+            metrics.observe("sdlc_llm_queue_seconds", span["queue_seconds"], model=model, **labels)
+        if span["error"]:
+            metrics.inc("sdlc_llm_errors_total", model=model, **labels)
+        if span["prompt_tokens"]:
+            metrics.inc("sdlc_llm_tokens_total", span["prompt_tokens"], model=model, type="prompt")
+        if span["cached_prompt_tokens"]:
+            metrics.inc("sdlc_llm_tokens_total", span["cached_prompt_tokens"], model=model, type="cached_prompt")
+        if span["completion_tokens"]:
+            metrics.inc("sdlc_llm_tokens_total", span["completion_tokens"], model=model, type="completion")
+        if span["cost_usd"]:
+            metrics.inc("sdlc_llm_cost_usd_total", span["cost_usd"], model=model)
+    current_trace = _trace.get()
+    if current_trace is not None:
+        with _span_lock:
+            current_trace["spans"].append(span)
+
+
+@contextmanager
+def trace(pipeline: str, **attrs: Any) -> Iterator[dict]:
+    """Group every span recorded inside the block into one exported trace."""
+    record = {
+        "trace_id": uuid.uuid4().hex,
+        "pipeline": pipeline,
+        "started_at": datetime.now().isoformat(timespec="milliseconds"),
+        "error": None,
+        **attrs,
+        "spans": [],
+    }
+    token = _trace.set(record)
+    start = time.perf_counter()
+    try:
+        yield record
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        record["wall_seconds"] = round(time.perf_counter() - start, 4)
+        _trace.reset(token)
+        with _span_lock:
+            llm_spans = [span for span in record["spans"] if span["kind"] == "llm"]
+        record["totals"] = {
+            "llm_calls": len(llm_spans),
+            "cache_hits": sum(1 for span in llm_spans if span["cache_hit"]),
+            "prompt_tokens": sum(span["prompt_tokens"] for span in llm_spans),
+            "cached_prompt_tokens": sum(span["cached_prompt_tokens"] for span in llm_spans),
+            "completion_tokens": sum(span["completion_tokens"] for span in llm_spans),
+            "cost_usd": round(sum(span["cost_usd"] for span in llm_spans), 6),
+        }
+        metrics.observe("sdlc_pipeline_duration_seconds", record["wall_seconds"], pipeline=pipeline)
+        metrics.inc("sdlc_pipeline_runs_total", pipeline=pipeline, status="failed" if record["error"] else "ok")
+        if record.get("queue_seconds"):
+            metrics.observe("sdlc_pipeline_queue_seconds", record["queue_seconds"], pipeline=pipeline)
+        export(record)
+
+
+def export(record: dict) -> None:
+    if os.getenv("SDLC_TRACE_DISABLED") == "1":
+        return
+    path = os.getenv("SDLC_TRACE_PATH", DEFAULT_TRACE_PATH)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    line = json.dumps(record, default=str) + "\n"
+    with _export_lock, open(path, "a", encoding="utf-8") as f:
+        f.write(line)
+
+
+def traced_node(name: str, fn: Callable) -> Callable:
+    """Wrap a graph node function so each execution records a node span."""
+    @functools.wraps(fn)
+    def wrapper(state, *args, **kwargs):
+        span = _new_span("node", name, retries=0)
+        span["node"] = name
+        token = _node.set(span)
+        start = time.perf_counter()
+        try:
+            return fn(state, *args, **kwargs)
+        except Exception as e:
+            span["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span["wall_seconds"] = round(time.perf_counter() - start, 4)
+            _node.reset(token)
+            _finish(span)
+    return wrapper
+
+
+@contextmanager
+def llm_call(model: str) -> Iterator[dict]:
+    """Record one LLM request; the caller fills in cache_hit and usage on the yielded span."""
+    span = _new_span(
+        "llm", model, model=model, cache_hit=False,
+        prompt_tokens=0, cached_prompt_tokens=0, completion_tokens=0, tokens_estimated=False, cost_usd=0.0,
+    )
+    start = time.perf_counter()
+    try:
+        yield span
+    except Exception as e:
+        span["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        span["wall_seconds"] = round(time.perf_counter() - start, 4)
+        _finish(span)
+
+
+def record_usage(span: dict, prompt_tokens: int, completion_tokens: int, estimated: bool = False, cached_prompt_tokens: int = 0) -> None:
+    span["prompt_tokens"] = int(prompt_tokens)
+    span["cached_prompt_tokens"] = int(cached_prompt_tokens)
+    span["completion_tokens"] = int(completion_tokens)
+    span["tokens_estimated"] = estimated
+    span["cost_usd"] = _cost(span["model"], prompt_tokens, completion_tokens, cached_prompt_tokens)
+
+
+def charge(model: str, prompt_tokens: int, completion_tokens: int) -> None:
+    """Count tokens and cost of a call that finished after its span (an abandoned hedge)."""
+    metrics.inc("sdlc_llm_tokens_total", prompt_tokens, model=model, type="prompt")
+    metrics.inc("sdlc_llm_tokens_total", completion_tokens, model=model, type="completion")
+    metrics.inc("sdlc_llm_cost_usd_total", _cost(model, prompt_tokens, completion_tokens), model=model)
+
+
+def record_retry() -> None:
+    """Count a retried LLM call against the current node."""
+    span = _node.get()
+    if span is not None:
+        with _span_lock:
+            span["retries"] += 1
+    metrics.inc("sdlc_retries_total", **context_labels())
+
+
+def submit(executor, fn: Callable, *args: Any):
+    """executor.submit that keeps the current trace and node, and records the time spent queued."""
+    context = contextvars.copy_context()
+    queued_at = time.perf_counter()
+
+    def run():
+        _queued.set(time.perf_counter() - queued_at)
+        return fn(*args)
+
+    return executor.submit(context.run, run)
+
+
+def map_ordered(executor, fn: Callable, items: Iterable) -> List[Any]:
+    """Traced equivalent of list(executor.map(fn, items))."""
+    return [future.result() for future in [submit(executor, fn, item) for item in items]]
+
+
+def summarize(path: str) -> List[dict]:
+    """Per pipeline/node latency, tokens and cost over every trace in the file."""
+    groups: Dict[tuple, List[dict]] = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                for span in json.loads(line)["spans"]:
+                    groups.setdefault((span["pipeline"], span["node"], span["kind"], span["name"]), []).append(span)
+    rows = []
+    for (pipeline, node, kind, name), spans in groups.items():
+        walls = sorted(span["wall_seconds"] for span in spans)
+        rows.append({
+            "pipeline": pipeline,
+            "node": node,
+            "span": name if kind == "llm" else "(node)",
+            "count": len(spans),
+            "p50_seconds": statistics.median(walls),
+            "p95_seconds": walls[min(len(walls) - 1, int(round(0.95 * (len(walls) - 1))))],
+            "total_seconds": sum(walls),
+            "cache_hits": sum(1 for span in spans if span.get("cache_hit")),
+            "tokens": sum(span.get("prompt_tokens", 0) + span.get("completion_tokens", 0) for span in spans),
+            "cost_usd": sum(span.get("cost_usd", 0.0) for span in spans),
+        })
+    return sorted(rows, key=lambda row: row["total_seconds"], reverse=True)
+
+
+if __name__ == "__main__":
+    # Hot paths first: python -m sdlc_common.tracing [traces.jsonl]
+    rows = summarize(sys.argv[1] if len(sys.argv) > 1 else os.getenv("SDLC_TRACE_PATH", DEFAULT_TRACE_PATH))
+    print(f"{'pipeline':<14}{'node':<18}{'span':<18}{'count':>7}{'p50 s':>9}{'p95 s':>9}{'total s':>10}{'hits':>6}{'tokens':>10}{'cost $':>10}")
+    for row in rows:
+        print(
+            f"{row['pipeline']:<14}{row['node']:<18}{row['span']:<18}{row['count']:>7}{row['p50_seconds']:>9.2f}"
+            f"{row['p95_seconds']:>9.2f}{row['total_seconds']:>10.2f}{row['cache_hits']:>6}{row['tokens']:>10}{row['cost_usd']:>10.4f}"
+        )
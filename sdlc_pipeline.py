@@ -0,0 +1,347 @@
+"""End-to-end SDLC pipeline: BRD -> (user stories + FDD in parallel) -> artifact manifest.
+
+The stages reuse the BRD, User Story and FS node graphs. The validated BRD is the
+input to both the user stories and the FDD. The graph is compiled with a SQLite
+checkpointer, so the state after every completed stage is persisted per run. Each
+run id is a LangGraph thread. Rerunning a run id after a failure resumes at the
+stage that failed. Completed parallel branches are kept and upstream documents
+are never regenerated.
+
+    python sdlc.py pipeline run project.json [--run-id ID]   # new run (or resume an existing id)
+    python sdlc.py pipeline resume ID                        # continue after a failure
+    python sdlc.py pipeline edit-brd ID [edited.md]          # apply an edited BRD, regenerate downstream
+    python sdlc.py pipeline rerun ID fdd                     # regenerate one stage and everything after it
+    python sdlc.py pipeline status ID
+
+Artifacts are written to <output-root>/<run id>/. The checkpoints are stored in
+<output-root>/checkpoints.sqlite3, or SDLC_CHECKPOINT_PATH if set. Checkpoints
+hold blob references (sdlc_common.blobs) for the BRD, the stories and the FDD.
+The blobs are kept in <run id>/blobs/ for as long as the run directory.
+"""
+import argparse
+import json
+import os
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List
+
+from typing_extensions import TypedDict
+
+from sdlc_common.blobs import BlobStore, get_blob_store
+from sdlc_common.nodes import load_node
+from sdlc_common.tracing import trace, traced_node
+
+DEFAULT_OUTPUT_ROOT = "sdlc_runs"
+
+STAGES = ["brd", "user_stories", "fdd", "package"]
+
+# BRD section -> field name used by the User Story node's brd_data
+STORY_FIELDS = {
+    "Purpose": "purpose",
+    "Project Summary": "project_summary",
+    "Project Success Criteria": "success_criteria",
+    "Project Objectives": "objectives",
+    "In-Scope": "in_scope",
+    "Out of Scope": "out_scope",
+    "Non-Functional Requirements": "non_functional",
+    "Assumptions": "assumptions",
+    "Dependencies": "dependencies",
+    "Constraints": "constraints",
+    "Stakeholder Analysis": "stakeholders",
+    "Roles and Responsibilities": "roles",
+}
+LIST_ITEM = re.compile(r"^\s*(?:[-*+]|\d+[.)])\s+(.*)$")
+
+
+class PipelineState(TypedDict):
+    run_dir: str
+    brd_input: dict
+    brd_markdown: str  # blob reference (run_blobs) of the validated BRD Markdown
+    brd_path: str
+    user_stories: str  # blob reference of the stories as JSON
+    user_stories_pdf: str
+    user_stories_exports: dict
+    user_stories_duplicates: list
+    fdd_markdown: str  # blob reference of the FDD Markdown
+    fdd_pdf: str
+    manifest_path: str
+
+
+def run_blobs(run_dir: str) -> BlobStore:
+    """Blob store of one run; unlike the nodes' shared store it is never pruned."""
+    return BlobStore(os.path.join(run_dir, "blobs"))
+
+
+def run_text(values: dict, key: str) -> str:
+    """Artifact text of a run; resolve() also accepts the plain text of runs checkpointed before blob references."""
+    return run_blobs(values["run_dir"]).resolve(values[key])
+
+
+def brd_story_fields(markdown: str) -> Dict[str, str]:
+    """Validated BRD Markdown -> the brd_data fields the User Story node expects.
+
+    Top-level list items become "1. ... 2. ..." text so that objectives and in-scope
+    items split into work units exactly like the hand-written brd_data.
+    """
+    load_node("brd")
+    from brd_validator import parse_sections
+
+    _, sections = parse_sections(markdown)
+    fields = {}
+    for name, (_, body) in sections.items():
+        items = [match.group(1).strip() for match in map(LIST_ITEM.match, body.splitlines()) if match]
+        if items:
+            fields[STORY_FIELDS[name]] = " ".join(f"{n}. {item}" for n, item in enumerate(items, start=1))
+        else:
+            fields[STORY_FIELDS[name]] = " ".join(body.split())
+    return fields
+
+
+# Stage 1: BRD from the project input (generation + local validation / repair)
+def brd_stage(state: PipelineState) -> dict:
+    brd = load_node("brd")
+    result = brd.get_graph().invoke(brd.BRDState(
+        user_input=brd.BRDInput(**state["brd_input"]),
+        draft_brd="",
+        validated_brd="",
+        error="",
+        output_dir=state["run_dir"],
+        output_path=""
+    ))
+    if result.get("error"):
+        # Raising keeps the last checkpoint before this stage, so a rerun starts here
+        raise RuntimeError(result["error"])
+    # The node's shared store may be pruned, so the run keeps its own copy
+    brd_markdown = get_blob_store().get(result["validated_brd"])
+    return {"brd_markdown": run_blobs(state["run_dir"]).put(brd_markdown), "brd_path": result["output_path"]}
+
+
+# Stage 2a: user stories from the validated BRD
+def user_stories_stage(state: PipelineState) -> dict:
+    node = load_node("user-stories")
+    brd_markdown = run_text(state, "brd_markdown")
+    result = node.get_graph().invoke({
+        "generated_output": "",
+        "validated_output": "",
+        "pdf_path": "",
+        "user_stories": "",
+        # The stage graph is checkpointed at every step, so large inputs go in as blob references
+        "brd_data": get_blob_store().put_json(brd_story_fields(brd_markdown)),
+        # Sent as the BRD of every story prompt, so they share their prefix with the FDD drafts
+        "brd_document": get_blob_store().put(brd_markdown),
+        "output_dir": state["run_dir"],
+    }, config={"recursion_limit": 50})
+    return {"user_stories": run_blobs(state["run_dir"]).put_json(node.load_stories(result)), "user_stories_pdf": result["pdf_path"], "user_stories_exports": result["exports"],
+            "user_stories_duplicates": result["duplicates"]}
+
+
+# Stage 2b: FDD from the validated BRD
+def fdd_stage(state: PipelineState) -> dict:
+    node = load_node("fdd")
+    result = node.get_graph().invoke({
+        "brd": get_blob_store().put(run_text(state, "brd_markdown")),
+        "fdd_gpt4o": "",
+        "fdd_gemini": "",
+        "fdd_final": "",
+        "pdf_path": "",
+        "output_dir": state["run_dir"],
+    })
+    fdd_markdown = get_blob_store().get(result["fdd_final"])
+    return {"fdd_markdown": run_blobs(state["run_dir"]).put(fdd_markdown), "fdd_pdf": result["pdf_path"]}
+
+
+# Stage 3: manifest of everything the run produced
+def package_stage(state: PipelineState) -> dict:
+    manifest_path = os.path.join(state["run_dir"], "manifest.json")
+    manifest = {
+        "project_name": state["brd_input"].get("project_name", ""),
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+        "brd": state["brd_path"],
+        "user_stories": len(json.loads(run_text(state, "user_stories"))),
+        "user_stories_pdf": state["user_stories_pdf"],
+        "user_stories_exports": state.get("user_stories_exports", {}),
+        "user_stories_merged": sum(len(record["merged"]) for record in state.get("user_stories_duplicates", [])),
+        "fdd_pdf": state["fdd_pdf"],
+    }
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return {"manifest_path": manifest_path}
+
+
+def checkpoint_path(output_root: str) -> str:
+    return os.getenv("SDLC_CHECKPOINT_PATH", os.path.join(output_root, "checkpoints.sqlite3"))
+
+
+@lru_cache(maxsize=None)
+def get_graph(checkpoint_db: str):
+    import sqlite3
+    from langgraph.checkpoint.sqlite import SqliteSaver
+    from langgraph.graph import StateGraph, START, END
+
+    graph = StateGraph(PipelineState)
+    graph.add_node("brd", traced_node("brd", brd_stage))
+    graph.add_node("user_stories", traced_node("user_stories", user_stories_stage))
+    graph.add_node("fdd", traced_node("fdd", fdd_stage))
+    graph.add_node("package", traced_node("package", package_stage))
+
+    # BRD first, then stories and FDD concurrently, joined for packaging
+    graph.add_edge(START, "brd")
+    graph.add_edge("brd", "user_stories")
+    graph.add_edge("brd", "fdd")
+    graph.add_edge(["user_stories", "fdd"], "package")
+    graph.add_edge("package", END)
+
+    directory = os.path.dirname(checkpoint_db)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # Parallel branches write checkpoints from worker threads
+    conn = sqlite3.connect(checkpoint_db, check_same_thread=False)
+    return graph.compile(checkpointer=SqliteSaver(conn))
+
+
+def run_config(run_id: str) -> dict:
+    return {"configurable": {"thread_id": run_id}}
+
+
+def completed_stages(graph, run_id: str) -> List[str]:
+    """Stages whose output is stored in the latest checkpoint of the run."""
+    values = graph.get_state(run_config(run_id)).values
+    produced = {
+        "brd": values.get("brd_markdown"),
+        # The stories themselves: the PDF is only one of the optional exports (USER_STORY_EXPORTS)
+        "user_stories": values.get("user_stories"),
+        "fdd": values.get("fdd_pdf"),
+        "package": values.get("manifest_path"),
+    }
+    return [stage for stage in STAGES if produced[stage]]
+
+
+def invoke(graph, run_id: str, state, config: dict = None) -> dict:
+    with trace("pipeline", run_id=run_id):
+        return graph.invoke(state, config or run_config(run_id))
+
+
+def start_run(graph, input_path: str, run_id: str, output_root: str) -> dict:
+    snapshot = graph.get_state(run_config(run_id))
+    if snapshot.values:
+        print(f"Run {run_id} already exists; resuming")
+        return resume_run(graph, run_id)
+    with open(input_path, encoding="utf-8") as f:
+        brd_input = json.load(f)
+    run_dir = os.path.join(output_root, run_id)
+    os.makedirs(run_dir, exist_ok=True)
+    initial_state = PipelineState(
+        run_dir=run_dir,
+        brd_input=brd_input,
+        brd_markdown="",
+        brd_path="",
+        user_stories="",
+        user_stories_pdf="",
+        fdd_markdown="",
+        fdd_pdf="",
+        manifest_path=""
+    )
+    return invoke(graph, run_id, initial_state)
+
+
+def resume_run(graph, run_id: str) -> dict:
+    snapshot = graph.get_state(run_config(run_id))
+    if not snapshot.values:
+        raise SystemExit(f"Unknown run id: {run_id}")
+    if not snapshot.next:
+        print(f"Run {run_id} is already complete")
+        return snapshot.values
+    print(f"Resuming run {run_id} at: {', '.join(snapshot.next)} (done: {', '.join(completed_stages(graph, run_id)) or 'nothing'})")
+    # None input continues from the latest checkpoint
+    return invoke(graph, run_id, None)
+
+
+def rerun_stage(graph, run_id: str, stage: str) -> dict:
+    """Regenerate one stage and everything downstream of it, keeping upstream output."""
+    for snapshot in graph.get_state_history(run_config(run_id)):
+        if stage in snapshot.next:
+            print(f"Rerunning run {run_id} from {stage} (also reruns: {', '.join(s for s in snapshot.next if s != stage) or 'none'})")
+            return invoke(graph, run_id, None, snapshot.config)
+    raise SystemExit(f"Run {run_id} has no checkpoint before stage {stage}")
+
+
+def edit_brd(graph, run_id: str, brd_file: str = None) -> dict:
+    """Use an edited BRD (by default the run's saved BRD file) and regenerate everything after it."""
+    snapshot = graph.get_state(run_config(run_id))
+    if not snapshot.values.get("brd_markdown"):
+        raise SystemExit(f"Run {run_id} has no BRD yet; use resume")
+    brd_file = brd_file or snapshot.values["brd_path"]
+    with open(brd_file, encoding="utf-8") as f:
+        edited = f.read()
+    if edited.strip() == run_text(snapshot.values, "brd_markdown").strip():
+        print("BRD is unchanged; nothing to regenerate")
+        return snapshot.values
+    if os.path.abspath(brd_file) != os.path.abspath(snapshot.values["brd_path"]):
+        with open(snapshot.values["brd_path"], "w", encoding="utf-8") as f:
+            f.write(edited)
+    # Record the edit as the BRD stage's output; its successors run next
+    brd_markdown = run_blobs(snapshot.values["run_dir"]).put(edited)
+    config = graph.update_state(run_config(run_id), {"brd_markdown": brd_markdown}, as_node="brd")
+    print(f"Applied edited BRD from {brd_file}; regenerating user stories and FDD")
+    return invoke(graph, run_id, None, config)
+
+
+def print_status(graph, run_id: str) -> None:
+    snapshot = graph.get_state(run_config(run_id))
+    if not snapshot.values:
+        raise SystemExit(f"Unknown run id: {run_id}")
+    print(f"Run {run_id}")
+    print(f"  done:    {', '.join(completed_stages(graph, run_id)) or 'nothing'}")
+    print(f"  pending: {', '.join(snapshot.next) or 'nothing (complete)'}")
+    for key in ("brd_path", "user_stories_pdf", "fdd_pdf", "manifest_path"):
+        if snapshot.values.get(key):
+            print(f"  {key}: {snapshot.values[key]}")
+    for fmt, path in (snapshot.values.get("user_stories_exports") or {}).items():
+        if fmt != "pdf":
+            print(f"  user_stories_{fmt}: {path}")
+
+
+def default_run_id(input_path: str) -> str:
+    with open(input_path, encoding="utf-8") as f:
+        name = json.load(f).get("project_name", "project")
+    slug = "-".join(re.findall(r"[a-z0-9]+", name.lower())) or "project"
+    return f"{slug}-{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the end-to-end SDLC pipeline with checkpointing.")
+    parser.add_argument("--output-root", default=DEFAULT_OUTPUT_ROOT, help="Directory for run folders and the checkpoint database")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="Start a run from a JSON file of BRD inputs")
+    run.add_argument("input", help="JSON object with the BRDInput fields")
+    run.add_argument("--run-id", help="Defaults to <project name>-<timestamp>; an existing id is resumed")
+    commands.add_parser("resume", help="Continue a run from its last checkpoint").add_argument("run_id")
+    rerun = commands.add_parser("rerun", help="Regenerate a stage and everything after it")
+    rerun.add_argument("run_id")
+    rerun.add_argument("stage", choices=STAGES)
+    edit = commands.add_parser("edit-brd", help="Apply an edited BRD and regenerate downstream documents")
+    edit.add_argument("run_id")
+    edit.add_argument("brd_file", nargs="?", help="Edited BRD Markdown (default: the run's saved BRD)")
+    commands.add_parser("status", help="Show completed and pending stages").add_argument("run_id")
+    args = parser.parse_args(argv)
+
+    graph = get_graph(checkpoint_path(args.output_root))
+    if args.command == "run":
+        result = start_run(graph, args.input, args.run_id or default_run_id(args.input), args.output_root)
+    elif args.command == "resume":
+        result = resume_run(graph, args.run_id)
+    elif args.command == "rerun":
+        result = rerun_stage(graph, args.run_id, args.stage)
+    elif args.command == "edit-brd":
+        result = edit_brd(graph, args.run_id, args.brd_file)
+    else:
+        print_status(graph, args.run_id)
+        return None
+    if result.get("manifest_path"):
+        print(f"Pipeline complete: {result['manifest_path']}")
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""Async HTTP service for the BRD, User Story, FDD and Code doc graphs.
+
+One ASGI app (Starlette on uvicorn) serves every node. Each request awaits its
+compiled graph's ``ainvoke``, so all requests share one event loop. The nodes are
+synchronous, and LangGraph runs them on the loop's thread pool, which is sized
+to the sum of the endpoint limits. The model clients are created once per
+process, so every request shares their HTTP connection pools.
+
+    POST /brd            BRD input fields (as in SampleBatchInput.jsonl)  -> {"brd", "path"}
+    POST /user-stories   {"brd_data": {...}} (optional; default: the node's sample BRD) -> {"user_stories", "duplicates", "exports"}
+    POST /fdd            {"brd": "<BRD Markdown>"}                       -> {"fdd", "pdf_path"}
+    POST /code-doc       {"abap_code": "..."} or the ABAP source as text/plain -> {"output", "findings", "pdf_filename"}
+    GET  /health         in-flight and waiting requests per endpoint
+    GET  /metrics        Prometheus metrics
+
+Each endpoint runs at most its concurrency limit of graphs at a time. Further
+requests wait, up to SDLC_SERVICE_QUEUE per endpoint, and the rest get 503.
+When a client disconnects, its graph run is cancelled. LLM calls already in
+flight for it stop at their next chunk or retry (sdlc_common.scheduler.cancellable),
+so they stop spending tokens.
+
+    python sdlc.py service [--host 127.0.0.1] [--port 8000]
+
+Configuration (environment variables):
+    SDLC_SERVICE_CONCURRENCY  JSON {"endpoint": limit} merged over DEFAULT_CONCURRENCY
+    SDLC_SERVICE_QUEUE        requests allowed to wait per endpoint (default: 64)
+    SDLC_SERVICE_OUTPUT_ROOT  directory for the files the nodes write, one subdirectory per request (default: sdlc_service_runs)
+"""
+import argparse
+import asyncio
+import json
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, suppress
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from sdlc_common import tracing
+from sdlc_common.blobs import get_blob_store
+from sdlc_common.nodes import load_node
+from sdlc_common.scheduler import INTERACTIVE, Cancelled, cancellable, priority
+
+DEFAULT_CONCURRENCY = {"brd": 16, "user-stories": 4, "fdd": 4, "code-doc": 8}
+CONCURRENCY = {**DEFAULT_CONCURRENCY, **json.loads(os.getenv("SDLC_SERVICE_CONCURRENCY", "{}"))}
+MAX_WAITING = int(os.getenv("SDLC_SERVICE_QUEUE", "64"))
+OUTPUT_ROOT = os.getenv("SDLC_SERVICE_OUTPUT_ROOT", "sdlc_service_runs")
+
+
+class BadRequest(Exception):
+    """The request body is not what the endpoint expects."""
+
+
+class Busy(Exception):
+    """The endpoint's queue is full."""
+
+
+class Disconnected(Exception):
+    """The client went away before its graph finished."""
+
+
+class EndpointLimit:
+    """At most ``limit`` graph runs at a time, with at most MAX_WAITING requests waiting for a slot."""
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = limit
+        self.in_flight = 0
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(limit)
+
+    def _publish(self) -> None:
+        tracing.metrics.set("sdlc_service_in_flight", self.in_flight, endpoint=self.name)
+        tracing.metrics.set("sdlc_service_waiting", self.waiting, endpoint=self.name)
+
+    @asynccontextmanager
+    async def slot(self):
+        if self._semaphore.locked() and self.waiting >= MAX_WAITING:
+            raise Busy(f"{self.name} has {self.waiting} requests waiting")
+        self.waiting += 1
+        self._publish()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        self._publish()
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+            self._publish()
+
+
+# Created in the lifespan handler, inside the server's event loop
+limits = {}
+
+
+async def _disconnected(request: Request) -> None:
+    # The body has been read, so the next ASGI message is the disconnect
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+
+
+async def run_graph(request: Request, endpoint: str, graph, state: dict, config: dict = None) -> dict:
+    """Await ``graph.ainvoke`` within the endpoint's limit; cancel it if the client disconnects."""
+    cancel = threading.Event()
+
+    async def work() -> dict:
+        async with limits[endpoint].slot():
+            # Service requests are interactive: their LLM calls go ahead of pipeline and batch work
+            with priority(INTERACTIVE), cancellable(cancel), tracing.trace(endpoint.replace("-", "_"), service=True) as run:
+                try:
+                    return await graph.ainvoke(state, config)
+                except asyncio.CancelledError:
+                    run["error"] = "Cancelled: client disconnected"
+                    raise
+
+    task = asyncio.create_task(work())
+    watcher = asyncio.create_task(_disconnected(request))
+    await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    if task.done():
+        watcher.cancel()
+        return task.result()
+    # Nodes already running in a worker thread finish their current step; their LLM calls see the event
+    cancel.set()
+    task.cancel()
+    with suppress(asyncio.CancelledError, Cancelled):
+        await task
+    raise Disconnected(endpoint)
+
+
+async def read_json(request: Request, required=()) -> dict:
+    try:
+        body = await request.json()
+    except ValueError as e:
+        raise BadRequest(f"body is not valid JSON: {e}")
+    if not isinstance(body, dict):
+        raise BadRequest("body must be a JSON object")
+    missing = [field for field in required if field not in body]
+    if missing:
+        raise BadRequest(f"missing field(s): {', '.join(missing)}")
+    return body
+
+
+def request_dir(endpoint: str) -> str:
+    path = os.path.join(OUTPUT_ROOT, endpoint, uuid.uuid4().hex)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+async def brd(request: Request) -> dict:
+    from pydantic import ValidationError
+
+    node = load_node("brd")
+    try:
+        user_input = node.BRDInput(**await read_json(request))
+    except ValidationError as e:
+        raise BadRequest(str(e))
+    result = await run_graph(request, "brd", node.get_graph(), node.BRDState(
+        user_input=user_input,
+        draft_brd="",
+        validated_brd="",
+        error="",
+        output_dir=request_dir("brd"),
+        output_path=""
+    ))
+    if result.get("error"):
+        raise RuntimeError(result["error"])
+    return {"brd": get_blob_store().get(result["validated_brd"]), "path": result["output_path"]}
+
+
+async def user_stories(request: Request) -> dict:
+    node = load_node("user-stories")
+    brd_data = (await read_json(request)).get("brd_data") if await request.body() else None
+    if brd_data is not None and not isinstance(brd_data, dict):
+        raise BadRequest("brd_data must be an object of BRD fields")
+    result = await run_graph(request, "user-stories", node.get_graph(), {
+        "generated_output": "",
+        "validated_output": "",
+        "pdf_path": "",
+        "user_stories": "",
+        "brd_data": brd_data or node.brd_data,
+        "output_dir": request_dir("user-stories"),
+    }, config={"recursion_limit": 50})
+    return {"user_stories": node.load_stories(result), "duplicates": result["duplicates"], "exports": result["exports"]}
+
+
+async def fdd(request: Request) -> dict:
+    node = load_node("fdd")
+    body = await read_json(request, required=("brd",))
+    result = await run_graph(request, "fdd", node.get_graph(), {
+        # Stored first, so text that looks like a blob reference is never resolved as one
+        "brd": get_blob_store().put(str(body["brd"])),
+        "fdd_gpt4o": "",
+        "fdd_gemini": "",
+        "fdd_final": "",
+        "pdf_path": "",
+        "output_dir": request_dir("fdd"),
+    })
+    return {"fdd": get_blob_store().get(result["fdd_final"]), "pdf_path": result["pdf_path"]}
+
+
+async def code_doc(request: Request) -> dict:
+    load_node("code-doc")
+    import code_doc
+
+    if request.headers.get("content-type", "").startswith("application/json"):
+        abap_code = (await read_json(request, required=("abap_code",)))["abap_code"]
+    else:
+        abap_code = (await request.body()).decode("utf-8")
+    result = await run_graph(request, "code-doc", code_doc.get_graph(), {"abap_code": abap_code, "output": "", "analysis": {}})
+    output = result["output"]
+    # PDF rendering is CPU-bound; keep it off the event loop
+    valid = code_doc.validate_output(output)
+    pdf_path = await asyncio.to_thread(code_doc.save_pdf, output, request_dir("code-doc")) if valid else None
+    return {
+        "output": output,
+        "findings": result["analysis"]["findings"],
+        "pdf_filename": os.path.basename(pdf_path) if pdf_path else None,
+        "pdf_path": pdf_path or "",
+    }
+
+
+def endpoint(name: str, handler):
+    async def route(request: Request) -> Response:
+        try:
+            body = await handler(request)
+        except Busy as e:
+            status = "rejected"
+            response = JSONResponse({"error": f"Server is busy: {e}"}, status_code=503, headers={"Retry-After": "5"})
+        except Disconnected:
+            # Nobody is listening; the status is only for the access log
+            status = "cancelled"
+            response = Response(status_code=499)
+        except BadRequest as e:
+            status = "invalid"
+            response = JSONResponse({"error": f"Invalid request: {e}"}, status_code=400)
+        except Exception as e:
+            status = "error"
+            response = JSONResponse({"error": str(e)}, status_code=500)
+        else:
+            status = "ok"
+            response = JSONResponse(body)
+        tracing.metrics.inc("sdlc_service_requests_total", endpoint=name, status=status)
+        return response
+    return Route(f"/{name}", route, methods=["POST"], name=name)
+
+
+async def health(request: Request) -> Response:
+    return JSONResponse({
+        name: {"limit": limit.limit, "in_flight": limit.in_flight, "waiting": limit.waiting} for name, limit in limits.items()
+    })
+
+
+async def metrics(request: Request) -> Response:
+    return Response(tracing.render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@asynccontextmanager
+async def lifespan(app: Starlette):
+    loop = asyncio.get_running_loop()
+    # One worker thread per graph that may run at once, so no endpoint waits for another's threads
+    executor = ThreadPoolExecutor(max_workers=sum(CONCURRENCY.values()), thread_name_prefix="sdlc-service")
+    loop.set_default_executor(executor)
+    limits.update({name: EndpointLimit(name, limit) for name, limit in CONCURRENCY.items()})
+    # Import the nodes and compile their graphs before the first request, not during it
+    for name in ("brd", "user-stories", "fdd", "code-doc"):
+        load_node(name)
+    import code_doc
+    for graph in (load_node("brd").get_graph, load_node("user-stories").get_graph, load_node("fdd").get_graph, code_doc.get_graph):
+        await asyncio.to_thread(graph)
+    yield
+    limits.clear()
+
+
+app = Starlette(
+    routes=[
+        endpoint("brd", brd),
+        endpoint("user-stories", user_stories),
+        endpoint("fdd", fdd),
+        endpoint("code-doc", code_doc),
+        Route("/health", health),
+        Route("/metrics", metrics),
+    ],
+    lifespan=lifespan,
+)
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the SDLC graphs over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args(argv)
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()